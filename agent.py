@@ -0,0 +1,151 @@
+"""
+Monitoring Agent
+Stream this host's snapshots to an aggregator as delta-encoded frames
+
+A connection starts with a hello (MAGIC, then a varint-length JSON
+header naming the host) followed by frames from snapshot_codec's
+SnapshotEncoder, each prefixed with its length as a 4-byte unsigned
+integer so the reader can use a single readexactly() per part. A new
+connection starts a new encoder, so its first frame is a keyframe.
+"""
+import json
+import os
+import socket
+import struct
+import threading
+
+from snapshot_codec import SnapshotEncoder, write_varint
+
+MAGIC = b'SYSMAGT\x01'
+
+DEFAULT_PORT = 9180
+
+FRAME_LENGTH = struct.Struct('>I')
+
+# Collectors an agent does not run: rankings with long command lines and paths
+EXCLUDED_KEYS = frozenset({'processes', 'cgroups'})
+
+# Seconds between connection attempts, doubling up to the maximum
+RECONNECT_MIN = 1.0
+RECONNECT_MAX = 30.0
+
+# Seconds a send may block before the connection is dropped
+SEND_TIMEOUT = 5.0
+
+# Minimum seconds between frames; the sampler publishes more often
+SEND_INTERVAL = 1.0
+
+def hello(name, intervals=None, cpus=None, token=None):
+    """Opening bytes of an agent connection"""
+    fields = {'host': name, 'intervals': intervals or {}, 'cpus': cpus}
+    if token is not None:
+        fields['token'] = token
+    header = json.dumps(fields).encode()
+    out = bytearray(MAGIC)
+    write_varint(out, len(header))
+    out += header
+    return bytes(out)
+
+def frame(payload):
+    """Length-prefixed frame"""
+    return FRAME_LENGTH.pack(len(payload)) + payload
+
+def parse_address(text, default_port=DEFAULT_PORT):
+    """'HOST', 'PORT', 'HOST:PORT' or ':PORT' -> (host, port); host may be ''"""
+    if text.isdigit():
+        return '', int(text)
+    host, sep, port = text.rpartition(':')
+    if not sep:
+        return text, default_port
+    return host, int(port)
+
+class AgentClient:
+    """Send snapshots to an aggregator from a background thread
+    
+    publish() only swaps in the newest snapshot, so the sampler never
+    waits on the network. The sender encodes whatever is newest at most
+    once per send_interval; snapshots published in between fold into
+    the next delta. Lost connections are retried with backoff.
+    """
+    
+    def __init__(self, host, port=DEFAULT_PORT, name=None, send_interval=SEND_INTERVAL,
+                 token=None):
+        """
+        host / port: aggregator address
+        name: host name reported to the aggregator (default: hostname)
+        send_interval: minimum seconds between frames
+        token: shared secret the aggregator expects (see Aggregator)
+        """
+        self.address = (host, port)
+        self.name = name or socket.gethostname()
+        self.token = token
+        self.send_interval = send_interval
+        self.connected = False
+        self.frames = 0
+        self.bytes = 0
+        self.connects = 0
+        self._pending = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Start the sender thread"""
+        self._thread = threading.Thread(target=self._run, name='agent', daemon=True)
+        self._thread.start()
+    
+    def publish(self, snapshot):
+        """Queue snapshot for sending (any thread)"""
+        self._pending = snapshot
+        self._wake.set()
+    
+    def close(self):
+        """Stop sending and drop the connection"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=SEND_TIMEOUT + 1)
+            self._thread = None
+    
+    def _run(self):
+        """Sender thread: connect, then send each new snapshot"""
+        delay = RECONNECT_MIN
+        while not self._stop.is_set():
+            try:
+                sock = socket.create_connection(self.address, timeout=SEND_TIMEOUT)
+            except OSError:
+                self._stop.wait(delay)
+                delay = min(RECONNECT_MAX, delay * 2)
+                continue
+            delay = RECONNECT_MIN
+            self.connects += 1
+            try:
+                self._stream(sock)
+            except OSError:
+                pass
+            finally:
+                self.connected = False
+                sock.close()
+    
+    def _stream(self, sock):
+        """Send the hello and then frames until stopped or disconnected"""
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        encoder = SnapshotEncoder()
+        sent_hello = False
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            snapshot = self._pending
+            if snapshot is None:
+                continue
+            out = b''
+            if not sent_hello:
+                intervals = {key: snapshot.interval(key) for key in snapshot}
+                out = hello(self.name, intervals, os.cpu_count(), self.token)
+                sent_hello = True
+            payload = encoder.encode(snapshot, snapshot.timestamp)
+            sock.sendall(out + frame(payload))
+            self.connected = True
+            self.frames += 1
+            self.bytes += len(payload) + FRAME_LENGTH.size
+            self._stop.wait(self.send_interval)
@@ -0,0 +1,278 @@
+"""
+Multi-Host Aggregator
+Receive agent streams over TCP and keep a compact summary of every host
+"""
+import asyncio
+import hmac
+import json
+import re
+import socket
+import threading
+import time
+
+from agent import MAGIC, FRAME_LENGTH, DEFAULT_PORT
+from snapshot_codec import SnapshotDecoder, read_varint
+
+# Loopback unless asked otherwise: agents on other machines need an
+# explicit address (and should get a token)
+DEFAULT_HOST = '127.0.0.1'
+
+# Largest accepted hello header / frame; anything bigger drops the agent
+MAX_HEADER = 64 * 1024
+MAX_FRAME = 16 * 1024 * 1024
+
+# Hosts kept (disconnected ones are evicted oldest first to make room),
+# open connections, and leaf names per connection (a 256-thread host
+# sends about 1000); beyond these new agents are refused or dropped
+MAX_HOSTS = 1024
+MAX_CONNECTIONS = 1024
+MAX_LEAVES = 16384
+
+# Longest host name kept from a hello
+MAX_NAME = 255
+
+# Seconds a new connection may take to send its hello
+HELLO_TIMEOUT = 10.0
+
+# Seconds without a frame before a host is shown as stale
+STALE_AFTER = 3.0
+
+# Summary column of each leaf name the summary reads
+_ROLES = (
+    ('cpu', re.compile(r'cpu_percents\[\d+\]$')),
+    ('cpu_temp', re.compile(r'cpu_temps\.[^.]+\.[^.]+$|cpu_package_temp$')),
+    ('gpu_temp', re.compile(r'gpus\[\d+\]\.temp$')),
+    ('memory', re.compile(r'memory_stats\.percent$')),
+    ('disk', re.compile(r'disk_io\.(read|write)_bytes$')),
+    ('net', re.compile(r'network_stats\.(rx|tx)_bytes$')),
+)
+
+class LeafIndex:
+    """Leaf ids of one decoder grouped by summary column
+    
+    Names arrive once per connection, so they are classified as they
+    appear; a frame then only reads the few leaves the summary shows
+    instead of rebuilding the whole snapshot.
+    """
+    
+    def __init__(self, decoder):
+        self.decoder = decoder
+        self.leaves = {role: [] for role, _ in _ROLES}
+        self._known = 0
+    
+    def _refresh(self):
+        """Classify names added since the last frame"""
+        names = self.decoder.names
+        for leaf in range(self._known, len(names)):
+            for role, pattern in _ROLES:
+                if pattern.match(names[leaf]):
+                    self.leaves[role].append(leaf)
+                    break
+        self._known = len(names)
+    
+    def _values(self, role):
+        value = self.decoder.leaf
+        return [v for v in map(value, self.leaves[role]) if v is not None]
+    
+    def summary(self):
+        """
+        (CPU avg %, busiest thread %, memory %, hottest CPU temperature,
+        hottest GPU temperature, disk bytes/s, network bytes/s); None for
+        values the agent does not report
+        """
+        if len(self.decoder.names) != self._known:
+            self._refresh()
+        cpus = self._values('cpu')
+        cpu_temps = self._values('cpu_temp')
+        gpu_temps = self._values('gpu_temp')
+        memory = self._values('memory')
+        disk = self._values('disk')
+        net = self._values('net')
+        return (sum(cpus) / len(cpus) if cpus else None, max(cpus) if cpus else None,
+                memory[0] if memory else None,
+                max(cpu_temps) if cpu_temps else None, max(gpu_temps) if gpu_temps else None,
+                sum(disk) if disk else None, sum(net) if net else None)
+
+class HostState:
+    """What the aggregator knows about one agent"""
+    
+    __slots__ = ('name', 'peer', 'cpus', 'intervals', 'summary',
+                 'updated', 'connected', 'frames', 'bytes')
+    
+    def __init__(self, name, peer, cpus=None, intervals=None):
+        self.name = name
+        self.peer = peer
+        self.cpus = cpus
+        self.intervals = intervals or {}
+        self.summary = None     # see LeafIndex.summary()
+        self.updated = None     # monotonic time of the newest frame
+        self.connected = True
+        self.frames = 0
+        self.bytes = 0
+    
+    def is_stale(self, now=None):
+        """Disconnected, or silent for longer than STALE_AFTER"""
+        if not self.connected or self.updated is None:
+            return True
+        return (time.monotonic() if now is None else now) - self.updated > STALE_AFTER
+
+class Aggregator:
+    """Accept agent connections and decode their frames on one asyncio loop
+    
+    The loop runs in its own thread, so the GTK main loop only reads the
+    finished per-host summaries; one coroutine per agent waits on its
+    socket, which keeps a hundred idle-most-of-the-second connections
+    at a small fraction of a core. Hosts that disconnect stay listed
+    (stale) until they come back under the same name, or until room is
+    needed for a new host once MAX_HOSTS are known.
+    
+    With a token, agents whose hello does not carry the same token are
+    dropped. The token only keeps strangers out; it is sent in clear.
+    """
+    
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, token=None):
+        """
+        host / port: address to listen on (port 0 picks a free port)
+        token: shared secret agents must send in their hello
+        """
+        self.hosts = {}         # name -> HostState
+        self.frames = 0
+        self.errors = 0
+        self.refused = 0        # connections dropped by a limit or a bad token
+        self.token = token
+        # Bound here so a taken port fails in the caller, not in the loop
+        self._socket = socket.create_server((host or DEFAULT_HOST, port), backlog=512)
+        self._socket.setblocking(False)
+        self._loop = None
+        self._server = None
+        self._connections = set()
+        self._ready = threading.Event()
+        self._thread = None
+    
+    @property
+    def address(self):
+        """(host, port) actually bound"""
+        return self._socket.getsockname()[:2]
+    
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self._run, name='aggregator', daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5.0)
+    
+    def close(self):
+        """Stop serving and drop every agent"""
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self._socket.close()
+    
+    def snapshot(self):
+        """Hosts sorted by name (for display)"""
+        return sorted(self.hosts.values(), key=lambda h: h.name)
+    
+    def _run(self):
+        """Aggregator thread: run the event loop until close()"""
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, sock=self._socket))
+            self._ready.set()
+            self._loop.run_forever()
+        finally:
+            if self._server is not None:
+                self._server.close()
+            # Closing the connections ends their handlers (cancelling them
+            # instead makes asyncio's stream callback log CancelledError)
+            for writer in list(self._connections):
+                writer.close()
+            tasks = asyncio.all_tasks(self._loop)
+            if tasks:
+                self._loop.run_until_complete(asyncio.wait(tasks, timeout=1.0))
+            self._loop.close()
+    
+    async def _handle(self, reader, writer):
+        """One agent connection: hello, then frames until EOF"""
+        peer = writer.get_extra_info('peername')
+        peer = peer[0] if peer else '?'
+        host = None
+        if len(self._connections) >= MAX_CONNECTIONS:
+            self.refused += 1
+            writer.close()
+            return
+        self._connections.add(writer)
+        try:
+            host = await asyncio.wait_for(self._hello(reader, peer), HELLO_TIMEOUT)
+            if host is None:
+                self.refused += 1
+                return
+            decoder = SnapshotDecoder()
+            index = LeafIndex(decoder)
+            while True:
+                length = FRAME_LENGTH.unpack(await reader.readexactly(FRAME_LENGTH.size))[0]
+                if length > MAX_FRAME:
+                    raise ValueError(f"frame of {length} bytes")
+                payload = await reader.readexactly(length)
+                _, updated = decoder.apply(payload)
+                if len(decoder.names) > MAX_LEAVES:
+                    raise ValueError(f"{len(decoder.names)} leaf names")
+                if updated:
+                    host.summary = index.summary()
+                host.updated = time.monotonic()
+                host.frames += 1
+                host.bytes += length + FRAME_LENGTH.size
+                self.frames += 1
+        except asyncio.IncompleteReadError:
+            pass    # Agent went away
+        except (OSError, ValueError, IndexError, KeyError, asyncio.TimeoutError):
+            self.errors += 1
+        finally:
+            if host is not None:
+                host.connected = False
+            self._connections.discard(writer)
+            writer.close()
+    
+    async def _hello(self, reader, peer):
+        """Read the opening header; returns the registered HostState
+        
+        None when the token does not match or no room can be made for
+        another host.
+        """
+        if await reader.readexactly(len(MAGIC)) != MAGIC:
+            raise ValueError("not an agent")
+        # Varint header length, at most 3 bytes under MAX_HEADER
+        raw = bytearray()
+        while not raw or raw[-1] & 0x80:
+            if len(raw) == 3:
+                raise ValueError("header too long")
+            raw += await reader.readexactly(1)
+        length = read_varint(raw, 0)[0]
+        if length > MAX_HEADER:
+            raise ValueError("header too long")
+        header = json.loads(await reader.readexactly(length))
+        if not isinstance(header, dict):
+            raise ValueError("bad header")
+        if self.token is not None and not hmac.compare_digest(
+                str(header.get('token', '')).encode(), self.token.encode()):
+            return None
+        name = str(header.get('host') or peer)[:MAX_NAME]
+        existing = self.hosts.get(name)
+        if existing is not None and existing.connected and existing.peer != peer:
+            # Two machines reporting the same hostname
+            name = f"{name}@{peer}"
+        if name not in self.hosts and len(self.hosts) >= MAX_HOSTS and not self._evict():
+            return None
+        host = HostState(name, peer, header.get('cpus'), header.get('intervals'))
+        self.hosts[name] = host
+        return host
+    
+    def _evict(self):
+        """Forget the disconnected host heard from longest ago; False if none"""
+        gone = [h for h in self.hosts.values() if not h.connected]
+        if not gone:
+            return False
+        oldest = min(gone, key=lambda h: h.updated if h.updated is not None else float('-inf'))
+        del self.hosts[oldest.name]
+        return True
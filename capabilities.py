@@ -0,0 +1,142 @@
+"""
+Capability Registry
+Probe each hardware data source once and remember what was found
+"""
+import threading
+from contextlib import contextmanager
+
+class Capability:
+    """Outcome of probing one data source"""
+    
+    def __init__(self, name, available, paths=None, handle=None, error=None):
+        """
+        name: registry name of the source (e.g. 'cuda')
+        available: whether the source can be used
+        paths: files or devices the probe resolved (e.g. {'temp': '/sys/...'})
+        handle: long-lived object the probe opened (library, backend, fd)
+        error: why the source is unavailable, if it is not
+        """
+        self.name = name
+        self.available = available
+        self.paths = paths or {}
+        self.handle = handle
+        self.error = error
+        self.users = 0          # collectors reading the handle (see Capabilities.use)
+        self.retired = False    # replaced by reprobe(); closed when users drops to 0
+    
+    def __repr__(self):
+        state = 'available' if self.available else f'unavailable: {self.error}'
+        return f"Capability({self.name!r}, {state})"
+    
+    def close(self):
+        """Release the handle the probe opened, if it can be closed"""
+        close = getattr(self.handle, 'close', None)
+        if callable(close):
+            try:
+                close()
+            except Exception:
+                pass
+        self.handle = None
+
+class Capabilities:
+    """Registry of one-time hardware probes
+    
+    Probes run on first use and their results are cached, so a host
+    without e.g. CUDA pays for the failed load once instead of every
+    tick. Call reprobe() after hotplug to discover sources again.
+    Collectors read handles inside use(), so a reprobe from another
+    thread never closes a handle that is still being read.
+    """
+    
+    _probes = {}
+    _results = {}
+    _lock = threading.RLock()
+    _probe_locks = {}       # name -> lock held while that source is probed
+    
+    @staticmethod
+    def register(name):
+        """Decorator registering a probe: func() -> Capability"""
+        def decorator(func):
+            Capabilities._probes[name] = func
+            return func
+        return decorator
+    
+    @staticmethod
+    def get(name):
+        """Get the Capability for name, probing it on first use
+        
+        Each source has its own probe lock, so a slow probe (e.g. starting
+        nvidia-smi) never holds up first use of the others.
+        """
+        result = Capabilities._results.get(name)
+        if result is not None:
+            return result
+        with Capabilities._lock:
+            probe_lock = Capabilities._probe_locks.setdefault(name, threading.Lock())
+        with probe_lock:
+            result = Capabilities._results.get(name)
+            if result is None:
+                try:
+                    result = Capabilities._probes[name]()
+                except Exception as e:
+                    result = Capability(name, False, error=str(e))
+                with Capabilities._lock:
+                    Capabilities._results[name] = result
+            return result
+    
+    @staticmethod
+    @contextmanager
+    def use(name):
+        """Hold name's Capability while reading its handle
+        
+        reprobe() retires the result at once (the next get() probes
+        again) but only closes it when the last holder lets go.
+        """
+        while True:
+            capability = Capabilities.get(name)
+            with Capabilities._lock:
+                if not capability.retired:
+                    capability.users += 1
+                    break
+        try:
+            yield capability
+        finally:
+            with Capabilities._lock:
+                capability.users -= 1
+                close = capability.retired and capability.users == 0
+            if close:
+                capability.close()
+    
+    @staticmethod
+    def available(name):
+        """Whether the named source was found"""
+        return Capabilities.get(name).available
+    
+    @staticmethod
+    def reprobe(name=None):
+        """Forget probe results (all, or just name) so they run again
+        
+        Handles nobody is reading are closed now; the rest by the last
+        use() holding them.
+        """
+        idle = []
+        with Capabilities._lock:
+            names = [name] if name is not None else list(Capabilities._results)
+            for key in names:
+                result = Capabilities._results.pop(key, None)
+                if result is not None:
+                    result.retired = True
+                    if result.users == 0:
+                        idle.append(result)
+        for result in idle:
+            result.close()
+    
+    @staticmethod
+    def close_all():
+        """Release every probe handle"""
+        Capabilities.reprobe()
+    
+    @staticmethod
+    def summary():
+        """Map every probed name to whether it is available"""
+        return {name: c.available for name, c in Capabilities._results.items()}
@@ -0,0 +1,164 @@
+"""
+Cgroup Section Component
+System pressure and the top cgroups by CPU, memory and I/O as trees
+"""
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, Pango
+
+from sampler import Snapshot
+from view_model import ViewModel
+
+# Opacity for rows whose collector has fallen behind
+STALE_OPACITY = 0.5
+
+# (scan list, table title, pressure resource)
+TABLES = (
+    ('cpu', 'cpu', 'cpu'),
+    ('memory', 'memory', 'memory'),
+    ('io', 'disk i/o', 'io'),
+)
+
+def _size(num_bytes):
+    """Compact byte count, e.g. 512K, 1.2G"""
+    for unit in ('K', 'M', 'G', 'T'):
+        num_bytes /= 1024
+        if num_bytes < 1000:
+            return f"{num_bytes:.1f}{unit}" if num_bytes < 10 else f"{num_bytes:.0f}{unit}"
+    return f"{num_bytes:.0f}P"
+
+def tree_prefixes(depths):
+    """
+    Depths of rows in depth-first order -> tree glyphs for each row
+    Top-level rows (depth 1) get no glyph.
+    """
+    # A row is the last of its siblings if no row at its depth follows
+    # before the tree climbs above it
+    last = [False] * len(depths)
+    seen = {}
+    for i in range(len(depths) - 1, -1, -1):
+        depth = depths[i]
+        last[i] = not seen.get(depth)
+        seen[depth] = True
+        for deeper in [d for d in seen if d > depth]:
+            del seen[deeper]
+    
+    prefixes = []
+    open_levels = {}    # depth -> more siblings follow at that depth
+    for depth, is_last in zip(depths, last):
+        if depth <= 1:
+            prefixes.append("")
+        else:
+            bars = ''.join("│ " if open_levels.get(d) else "  " for d in range(2, depth))
+            prefixes.append(bars + ("└─" if is_last else "├─"))
+        open_levels[depth] = not is_last
+    return prefixes
+
+def _percent(value):
+    return "-" if value is None else f"{value:.1f}"
+
+class CgroupView:
+    """Pressure line and top-cgroup trees
+    
+    Each table shows its top leaf cgroups under their ancestors, so the
+    number of lines changes with the tree shape; lines are added on
+    demand and blanked rather than removed. The whole section stays
+    hidden until the cgroups or pressure collector reports.
+    """
+    
+    def __init__(self, name_width=32):
+        """
+        name_width: characters of the indented cgroup name shown
+        """
+        self.name_width = name_width
+        self.widget = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
+        self.widget.set_margin_start(10)
+        self.widget.set_margin_end(10)
+        self.widget.set_margin_bottom(10)
+        self.widget.set_no_show_all(True)
+        
+        self._font = Pango.AttrList()
+        self._font.insert(Pango.attr_font_desc_new(
+            Pango.FontDescription.from_string("Ubuntu Mono 9")))
+        
+        self.view_model = ViewModel()
+        pressure = self._add_label(self.widget)
+        self.view_model.bind('pressure', pressure.set_text, self._format_pressure)
+        self._tables = {}   # key -> [box, bound lines]
+        for key, title, _ in TABLES:
+            self._add_label(self.widget, f"{'CPU%':>6} {'MEM':>6} {'R+W/s':>6} {'PSI%':>5}  "
+                                         f"cgroups by {title}")
+            box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
+            self.widget.pack_start(box, False, False, 0)
+            self._tables[key] = [box, 0]
+        count = self._add_label(self.widget)
+        self.view_model.bind('count', count.set_text,
+                             lambda n: f"{n} cgroups" if n else "")
+        self._shown = False
+    
+    def _add_label(self, box, text=""):
+        """Add one left-aligned monospace line"""
+        label = Gtk.Label(label=text)
+        label.set_attributes(self._font)
+        label.set_line_wrap(False)
+        label.set_selectable(False)
+        label.set_halign(Gtk.Align.START)
+        box.pack_start(label, False, False, 0)
+        return label
+    
+    def _add_row(self, key):
+        """Bind one more line of a table"""
+        table = self._tables[key]
+        label = self._add_label(table[0])
+        label.show()
+        self.view_model.bind(
+            (key, table[1]), label.set_text, self._format_row,
+            lambda stale, label=label: label.set_opacity(STALE_OPACITY if stale else 1.0))
+        table[1] += 1
+    
+    def _format_pressure(self, pressure):
+        """{resource: {'some', 'full'}} -> pressure line"""
+        if not pressure:
+            return ""
+        parts = [f"{name} {_percent(p.get('some'))}/{_percent(p.get('full'))}"
+                 for name, p in ((name, pressure.get(name) or {}) for _, _, name in TABLES)]
+        return "pressure  " + "  ".join(parts) + "  (some/full % avg10)"
+    
+    def _format_row(self, raw):
+        """(prefix, name, cpu, memory, io rate, pressure) or None -> table row"""
+        if raw is None:
+            return ""
+        prefix, name, cpu, memory, io, pressure = raw
+        memory = "-" if memory is None else _size(memory)
+        return (f"{cpu:>6.1f} {memory:>6} {_size(io):>6} {_percent(pressure):>5}  "
+                f"{(prefix + name)[:self.name_width]}")
+    
+    def update(self, data):
+        """Push changed rows into the tables"""
+        if 'cgroups' not in data and 'pressure' not in data:
+            return  # Not collected (yet, or not on this kernel)
+        if not self._shown:
+            self.widget.set_no_show_all(False)
+            self.widget.show_all()
+            self._shown = True
+        cgroups = data.get('cgroups') or {}
+        stale = isinstance(data, Snapshot) and data.is_stale('cgroups')
+        
+        vm = self.view_model
+        vm.begin_tick()
+        vm.set('pressure', data.get('pressure') or {},
+               isinstance(data, Snapshot) and data.is_stale('pressure'))
+        for key, _, _ in TABLES:
+            rows = cgroups.get(key) or []
+            while self._tables[key][1] < len(rows):
+                self._add_row(key)
+            prefixes = tree_prefixes([row['depth'] for row in rows])
+            for line in range(self._tables[key][1]):
+                raw = None
+                if line < len(rows):
+                    row = rows[line]
+                    raw = (prefixes[line], row['name'], row['cpu'], row['memory'],
+                           row['io'], row['pressure'])
+                vm.set((key, line), raw, stale)
+        vm.set('count', cgroups.get('count'))
+        vm.end_tick()
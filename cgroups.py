@@ -0,0 +1,458 @@
+"""
+Control Groups
+System pressure (PSI) and per-cgroup usage from the cgroup v2 hierarchy
+"""
+import errno
+import heapq
+import os
+import re
+import time
+from collections import OrderedDict
+
+from cpu_stat import read_all
+
+# PSI resources, also the per-cgroup <resource>.pressure files
+RESOURCES = ('cpu', 'memory', 'io')
+
+# Per-cgroup usage files, in CgroupInfo.fds order
+USAGE_FILES = ('cpu.stat', 'memory.current', 'io.stat')
+
+# Walk the hierarchy at least every this many scans even if nothing changed
+RESCAN_EVERY = 60
+
+# Descriptors the scanner keeps open (a cgroup's directory plus its
+# usage files); cgroups beyond them are read by path (open, read, close)
+MAX_OPEN_FDS = 256
+
+_IO_BYTES = re.compile(rb'[rw]bytes=(\d+)')
+
+def parse_pressure(data):
+    """
+    PSI file contents -> {'some': avg10, 'full': avg10} in percent
+    'full' is None where the kernel does not report it (cpu before 5.13).
+    """
+    pressure = {'some': None, 'full': None}
+    for line in data.split(b'\n'):
+        kind, _, fields = line.partition(b' ')
+        if kind in (b'some', b'full') and fields.startswith(b'avg10='):
+            pressure[kind.decode()] = float(fields[6:fields.index(b' ')])
+    return pressure
+
+def _open(name, dir_fd=None):
+    """Open a file read-only (relative to dir_fd), None if it does not exist"""
+    try:
+        return os.open(name, os.O_RDONLY, dir_fd=dir_fd)
+    except FileNotFoundError:
+        return None
+
+class PressureReader:
+    """System-wide pressure stall information over kept-open /proc/pressure files"""
+    
+    def __init__(self, proc_root='/proc'):
+        """
+        proc_root: procfs root (point at a fake tree for testing)
+        """
+        self._fds = {}
+        for name in RESOURCES:
+            fd = _open(os.path.join(proc_root, 'pressure', name))
+            if fd is not None:
+                self._fds[name] = fd
+    
+    @property
+    def available(self):
+        """Whether the kernel exposes PSI (CONFIG_PSI, not disabled with psi=0)"""
+        return bool(self._fds)
+    
+    def read(self):
+        """{'cpu' / 'memory' / 'io': {'some': avg10, 'full': avg10}}"""
+        return {name: parse_pressure(read_all(fd, 256)) for name, fd in self._fds.items()}
+    
+    def close(self):
+        """Close the pressure files"""
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds = {}
+
+class CgroupInfo:
+    """One cgroup directory with its open files and usage between scans"""
+    
+    __slots__ = ('path', 'name', 'depth', 'parent', 'children', 'descendants', 'dir_fd',
+                 'fds', 'present', 'prefix', 'usage', 'usage_time', 'cpu', 'memory',
+                 'io_bytes', 'io_time', 'io_rate')
+    
+    def __init__(self, path, name, parent):
+        self.path = path        # relative to the hierarchy root ('' for the root)
+        self.name = name
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.children = {}      # name -> CgroupInfo
+        self.descendants = None # nr_descendants when the subtree was last walked
+        self.dir_fd = None      # kept open while in the scanner's LRU
+        self.fds = None         # USAGE_FILES descriptors (None entries: file absent)
+        self.present = ()       # USAGE_FILES that exist, for cgroups read by path
+        self.prefix = None      # directory path with a trailing '/', for reads by path
+        self.usage = None       # cpu.stat usage_usec
+        self.usage_time = None
+        self.cpu = 0.0          # percent of one CPU
+        self.memory = None      # bytes (None without the memory controller)
+        self.io_bytes = None    # read + written bytes
+        self.io_time = None
+        self.io_rate = 0.0      # bytes/s
+
+class CgroupGone(Exception):
+    """The cgroup was removed while being read"""
+
+class CgroupScanner:
+    """Top cgroups by CPU, memory and I/O from the cgroup v2 hierarchy
+    
+    The tree is only walked again when the root's cgroup.stat reports a
+    different number of descendants, and then only into the subtrees
+    whose own nr_descendants changed; a walk only opens the directories
+    that are new. The whole tree is walked when that partial walk does
+    not account for every descendant (a leaf gained children), when a
+    read finds a cgroup removed and the count no longer matches (a
+    removal offset by a creation), and every RESCAN_EVERY scans.
+    
+    Every leaf's usage counters are read every scan. Up to max_open_fds
+    descriptors stay open in an LRU, so those cgroups cost three
+    pread()s and no path lookups; the rest are read by path. Cgroups
+    are kept open while there is room and the shown ones push out the
+    least recently read, so the slots go to what is on screen without
+    an LRU that every full pass would flush. The process descriptor
+    limit is left alone.
+    
+    Ranking considers leaf cgroups only (parents include their
+    children's usage). Each table lists the top leaves with their
+    ancestors, in tree order, with the shown cgroups' pressure;
+    ancestors are only read while shown.
+    """
+    
+    def __init__(self, root='/sys/fs/cgroup', top_n=5, max_open_fds=MAX_OPEN_FDS):
+        """
+        root: cgroup v2 mount point (point at a fake tree for testing)
+        top_n: leaf cgroups per table
+        max_open_fds: descriptors kept open between scans
+        """
+        self.root = root
+        self.top_n = top_n
+        self.max_open_fds = max_open_fds
+        self.rescans = 0        # hierarchy walks so far
+        self.reads = 0          # cgroups read by the last scan
+        self.open_fds = 0
+        
+        self._cgroups = {}      # path -> CgroupInfo
+        self._lru = OrderedDict()   # path -> CgroupInfo with open files, oldest first
+        self._leaf_list = []    # leaf CgroupInfo, rebuilt when the tree changes
+        self._leaves_stale = True
+        self._shown = set()     # CgroupInfo in the last tables
+        self._stat_fd = os.open(os.path.join(root, 'cgroup.stat'), os.O_RDONLY)
+        self._dirty = True
+        self._since_rescan = 0
+        self._root = self._add('', '', None)
+    
+    def close(self):
+        """Close every kept-open descriptor"""
+        for info in list(self._cgroups.values()):
+            self._close(info)
+        self._cgroups = {}
+        if self._stat_fd is not None:
+            os.close(self._stat_fd)
+            self._stat_fd = None
+    
+    def _add(self, path, name, parent):
+        """Register a newly found cgroup, opening it while there is room"""
+        info = CgroupInfo(path, name, parent)
+        info.prefix = os.path.join(self.root, path, '')
+        if not self._keep_open(info) and not info.present:
+            info.present = tuple(os.path.exists(info.prefix + f) for f in USAGE_FILES)
+        self._cgroups[path] = info
+        if parent is not None:
+            parent.children[name] = info
+        self._leaves_stale = True
+        return info
+    
+    def _keep_open(self, info, evict=False):
+        """
+        Open info's directory and usage files into the LRU
+        With evict, the least recently read cgroups are closed to make
+        room; otherwise nothing is opened once the LRU is full. Returns
+        whether info is open.
+        """
+        if info.fds is not None:
+            return True
+        needed = 1 + len(USAGE_FILES)
+        while evict and self._lru and self.open_fds + needed > self.max_open_fds:
+            self._close(self._lru.popitem(last=False)[1])
+        if self.open_fds + needed > self.max_open_fds:
+            return False
+        try:
+            info.dir_fd = os.open(os.path.join(self.root, info.path),
+                                  os.O_RDONLY | os.O_DIRECTORY)
+            self.open_fds += 1
+            info.fds = []
+            for f in USAGE_FILES:
+                info.fds.append(_open(f, info.dir_fd))
+                self.open_fds += info.fds[-1] is not None
+        except OSError as e:
+            for fd in [info.dir_fd] + (info.fds or []):
+                if fd is not None:
+                    os.close(fd)
+                    self.open_fds -= 1
+            info.dir_fd = info.fds = None
+            if e.errno not in (errno.EMFILE, errno.ENFILE):
+                raise
+            # Other descriptors took the room: read by path
+            info.present = tuple(os.path.exists(info.prefix + f) for f in USAGE_FILES)
+            return False
+        self._lru[info.path] = info
+        return True
+    
+    def _close(self, info):
+        """Close the descriptors of one cgroup (it is read by path from now on)"""
+        if info.fds is not None:
+            info.present = tuple(fd is not None for fd in info.fds)
+        self._lru.pop(info.path, None)
+        if info.dir_fd is not None:
+            os.close(info.dir_fd)
+            self.open_fds -= 1
+            info.dir_fd = None
+        for fd in info.fds or ():
+            if fd is not None:
+                os.close(fd)
+                self.open_fds -= 1
+        info.fds = None
+    
+    def _remove(self, info):
+        """Forget a removed cgroup and its whole subtree"""
+        stack = [info]
+        while stack:
+            node = stack.pop()
+            stack.extend(node.children.values())
+            self._close(node)
+            self._cgroups.pop(node.path, None)
+        if info.parent is not None:
+            info.parent.children.pop(info.name, None)
+        self._leaves_stale = True
+    
+    def _read_descendants(self, info):
+        """nr_descendants from a cgroup's cgroup.stat (None if unreadable)"""
+        try:
+            if info is self._root:
+                data = read_all(self._stat_fd, 256)
+            else:
+                fd = os.open('cgroup.stat', os.O_RDONLY, dir_fd=info.dir_fd) \
+                    if info.dir_fd is not None else \
+                    os.open(os.path.join(self.root, info.path, 'cgroup.stat'), os.O_RDONLY)
+                try:
+                    data = read_all(fd, 256)
+                finally:
+                    os.close(fd)
+        except OSError:
+            return None
+        for line in data.split(b'\n'):
+            if line.startswith(b'nr_descendants '):
+                return int(line[15:])
+        return None
+    
+    def _subdirs(self, info):
+        """Names of info's child cgroups"""
+        target = info.dir_fd if info.dir_fd is not None else os.path.join(self.root, info.path)
+        with os.scandir(target) as entries:
+            return {e.name for e in entries if e.is_dir(follow_symlinks=False)}
+    
+    def _rescan(self, descendants, full=False):
+        """
+        Walk the hierarchy, opening new cgroups and dropping removed ones
+        Only subtrees whose nr_descendants changed are entered, and leaves
+        are not checked at all, unless full. A partial walk that leaves the
+        count short of the root's nr_descendants is redone in full.
+        """
+        self.rescans += 1
+        total = descendants
+        stack = [(self._root, descendants)]
+        while stack:
+            info, descendants = stack.pop()
+            try:
+                names = self._subdirs(info)
+            except OSError:
+                if info is not self._root:
+                    self._remove(info)
+                continue
+            info.descendants = descendants
+            known = info.children
+            for name in known.keys() - names:
+                self._remove(known[name])
+            for name in names - known.keys():
+                try:
+                    self._add(f'{info.path}/{name}' if info.path else name, name, info)
+                except OSError:
+                    pass    # Removed again before it could be opened
+            for child in known.values():
+                if full or child.children or child.descendants is None:
+                    descendants = self._read_descendants(child)
+                    if full or descendants is None or descendants != child.descendants:
+                        stack.append((child, descendants))
+        if not full and total is not None and len(self._cgroups) - 1 != total:
+            self._rescan(total, full=True)
+    
+    def _read_usage(self, info, index):
+        """Contents of one usage file (None if the cgroup lacks it)"""
+        if info.fds is not None:
+            fd = info.fds[index]
+            if fd is None:
+                return None
+            try:
+                return read_all(fd, 1024)
+            except OSError:
+                raise CgroupGone()  # ENODEV once the cgroup is removed
+        if not info.present[index]:
+            return None
+        try:
+            fd = os.open(info.prefix + USAGE_FILES[index], os.O_RDONLY)
+        except (FileNotFoundError, NotADirectoryError):
+            raise CgroupGone()
+        try:
+            return read_all(fd, 1024)
+        except OSError:
+            raise CgroupGone()
+        finally:
+            os.close(fd)
+    
+    def _read(self, info, now):
+        """Refresh CPU%, memory and I/O rate of one cgroup"""
+        if info.fds is not None:
+            self._lru.move_to_end(info.path)
+        data = self._read_usage(info, 0)
+        if data:
+            # usage_usec is always the first line
+            usage = int(data.split(None, 2)[1])
+            if info.usage is not None and now > info.usage_time:
+                info.cpu = max(0, usage - info.usage) / 1e6 / (now - info.usage_time) * 100
+            info.usage = usage
+            info.usage_time = now
+        
+        data = self._read_usage(info, 1)
+        info.memory = int(data) if data else None
+        
+        data = self._read_usage(info, 2)
+        if data is not None:
+            io_bytes = sum(map(int, _IO_BYTES.findall(data)))
+            if info.io_bytes is not None and now > info.io_time:
+                info.io_rate = max(0, io_bytes - info.io_bytes) / (now - info.io_time)
+            info.io_bytes = io_bytes
+            info.io_time = now
+    
+    def _pressure(self, info, name):
+        """some avg10 of one cgroup's <name>.pressure (None if unavailable)"""
+        try:
+            if info.dir_fd is not None:
+                fd = _open(f'{name}.pressure', info.dir_fd)
+            else:
+                fd = _open(os.path.join(self.root, info.path, f'{name}.pressure'))
+        except OSError:
+            return None
+        if fd is None:
+            return None
+        try:
+            return parse_pressure(read_all(fd, 256))['some']
+        except (OSError, ValueError):
+            return None
+        finally:
+            os.close(fd)
+    
+    def _leaves(self):
+        """Leaf cgroups (cached until the tree changes)"""
+        if self._leaves_stale:
+            self._leaf_list = [info for info in self._cgroups.values()
+                               if not info.children and info is not self._root]
+            self._leaves_stale = False
+        return self._leaf_list
+    
+    def _refresh(self, infos, now):
+        """Read the given cgroups, dropping the ones that were removed"""
+        cgroups = self._cgroups
+        for info in infos:
+            if cgroups.get(info.path) is not info or info is self._root:
+                continue    # Dropped earlier in this scan
+            try:
+                self._read(info, now)
+            except CgroupGone:
+                self._remove(info)
+                self._dirty = True
+    
+    def _rows(self, shown, key, pressure):
+        """Rows of the shown cgroups, depth-first, largest child first"""
+        rows = []
+        stack = [self._root]
+        while stack:
+            info = stack.pop()
+            if info is not self._root:
+                rows.append({
+                    'name': info.name,
+                    'path': info.path,
+                    'depth': info.depth,
+                    'cpu': info.cpu,
+                    'memory': info.memory,
+                    'io': info.io_rate,
+                    'pressure': self._pressure(info, pressure),
+                })
+            children = [c for c in info.children.values() if c in shown]
+            # Ascending so the largest child is popped (shown) first
+            stack.extend(sorted(children, key=lambda c: key(c) or 0))
+        return rows
+    
+    def scan(self, now=None):
+        """
+        Refresh every leaf cgroup and rank them
+        Returns {'cpu': [...], 'memory': [...], 'io': [...], 'count': n}
+        with one dict per row (name, path, depth, cpu, memory, io and the
+        table resource's pressure) in tree order.
+        """
+        now = time.monotonic() if now is None else now
+        self._since_rescan += 1
+        descendants = self._read_descendants(self._root)
+        full = self._dirty or self._since_rescan >= RESCAN_EVERY
+        if full or descendants != self._root.descendants:
+            self._rescan(descendants, full)
+            self._dirty = False
+            if full:
+                self._since_rescan = 0
+        cgroups = self._cgroups
+        
+        infos = list(self._leaves())
+        self._refresh(infos, now)
+        if self._dirty and descendants is not None and len(cgroups) - 1 != descendants:
+            # A removed cgroup was replaced by a new one: find it now
+            self._rescan(descendants, full=True)
+            self._dirty = False
+            self._since_rescan = 0
+        
+        leaves = self._leaves()
+        tables = {}
+        for name, key in (('cpu', lambda c: c.cpu), ('memory', lambda c: c.memory or 0),
+                          ('io', lambda c: c.io_rate)):
+            tables[name] = (key, heapq.nlargest(self.top_n, leaves, key=key))
+        
+        # Ancestors of the shown leaves are read only while shown
+        shown = {}
+        for name, (key, top) in tables.items():
+            infos_shown = shown[name] = set()
+            for info in top:
+                while info is not None and info not in infos_shown:
+                    infos_shown.add(info)
+                    info = info.parent
+        self._shown = set().union(*shown.values())
+        # Shown cgroups take LRU slots from the least recently read ones
+        for info in self._shown:
+            try:
+                self._keep_open(info, evict=True)
+            except OSError:
+                pass    # Removed since the read; the next scan drops it
+        ancestors = [info for info in self._shown if info.children]
+        self._refresh(ancestors, now)
+        self.reads = len(infos) + len(ancestors)
+        
+        result = {name: self._rows(shown[name], key, name)
+                  for name, (key, top) in tables.items()}
+        result['count'] = len(cgroups) - 1
+        return result
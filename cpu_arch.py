@@ -1,26 +1,56 @@
 """
 CPU Architecture Utilities
-Handle CPU-specific mappings (14900K: 8 P-cores + 16 E-cores)
+Handle CPU-specific mappings using the topology discovered from sysfs
 """
+import time
+
+from cpu_topology import CPUTopology
+
+# Seconds between checks of cpu/online by views calling poll_hotplug()
+HOTPLUG_CHECK_SECONDS = 5.0
 
 class CPUArchitecture:
-    """CPU architecture helper for Intel 14900K"""
+    """CPU architecture helper backed by CPUTopology"""
+    
+    # Discovered on first use; see refresh() for CPU hotplug
+    _topology = None
+    _checked = 0.0
+    
+    @staticmethod
+    def topology():
+        """Get the shared CPUTopology"""
+        if CPUArchitecture._topology is None:
+            from system_data import SystemData
+            CPUArchitecture._topology = CPUTopology(SystemData.sysfs_root)
+        return CPUArchitecture._topology
+    
+    @staticmethod
+    def refresh():
+        """Re-read topology after CPU hotplug; returns True if it changed"""
+        CPUArchitecture._checked = time.monotonic()
+        return CPUArchitecture.topology().refresh()
+    
+    @staticmethod
+    def poll_hotplug():
+        """refresh() at most every HOTPLUG_CHECK_SECONDS; returns the topology generation"""
+        if time.monotonic() - CPUArchitecture._checked >= HOTPLUG_CHECK_SECONDS:
+            CPUArchitecture.refresh()
+        return CPUArchitecture.topology().generation
     
     @staticmethod
     def thread_to_core(thread_id):
         """
-        Map thread ID to physical core ID
+        Map thread ID to its (package ID, physical core ID)
         
-        14900K Layout:
-        - P-cores (threads 0-15): cores 0,4,8,12,16,20,24,28 with HT
-        - E-cores (threads 16-31): cores 32-47 without HT
+        Core IDs come from cpu*/topology/core_id, which is also the number
+        coretemp uses in its 'Core N' labels; they restart in every
+        package, so the package ID is part of the key.
         """
-        if thread_id < 16:
-            # P-cores with hyperthreading
-            # Thread 0,1 -> Core 0; Thread 2,3 -> Core 4, etc.
-            p_core_index = thread_id // 2
-            return p_core_index * 4
-        else:
-            # E-cores without hyperthreading
-            # Thread 16 -> Core 32; Thread 17 -> Core 33, etc.
-            return 32 + (thread_id - 16)
+        return CPUArchitecture.topology().core_of(thread_id)
+    
+    @staticmethod
+    def core_temp(cpu_temps, thread_id):
+        """Temperature of a thread's core from {package: {core: temp}}, or None"""
+        package, core = CPUArchitecture.thread_to_core(thread_id)
+        temps = cpu_temps.get(package)
+        return temps.get(core) if isinstance(temps, dict) else None
@@ -2,33 +2,141 @@
 CPU Graph Widget
 Reusable CPU usage graph component
 """
+import time
+
 import cairo
 
+from history import HistoryRing
+from history_graph import render_history, ORANGE
+
 class CPUGraph:
     """CPU usage graph widget"""
     
-    def __init__(self, cpu_num, max_points=50):
+    def __init__(self, cpu_num, max_points=50, history=None, row=0, incremental=False,
+                 zoom_series=None):
+        """
+        cpu_num: CPU thread shown by this graph
+        max_points: samples kept when the graph owns its history
+        history: shared HistoryRing to draw from (row selects the series);
+                 when omitted the graph keeps its own single-row ring
+        incremental: keep an offscreen surface and only draw new segments,
+                     re-rendering fully after a resize or invalidate()
+        zoom_series: downsample.ZoomSeries of this CPU for the zoomed views
+        """
         self.cpu_num = cpu_num
-        self.max_points = max_points
-        self.data_points = [0] * max_points
+        self.owns_history = history is None
+        self.history = HistoryRing(1, max_points) if history is None else history
+        self.row = 0 if history is None else row
+        self.max_points = self.history.capacity
+        
+        self.incremental = incremental
+        self._surface = None
+        self._back = None
+        self._surface_size = None
+        self._scroll_offset = 0.0
+        self._drawn_count = 0
+        self._drawn_revision = 0
+        
+        self.zoom_series = zoom_series
+        self.zoom = None    # index into downsample.ZOOM_SPANS, None: live samples
+    
+    @property
+    def data_points(self):
+        """Samples oldest to newest (zero-copy view into the history)"""
+        return self.history.row(self.row)
     
     def update(self, cpu_percent):
-        """Add new data point"""
-        self.data_points.append(cpu_percent)
-        if len(self.data_points) > self.max_points:
-            self.data_points.pop(0)
+        """Add new data point (only for graphs owning their history)"""
+        if self.owns_history:
+            self.history.push((cpu_percent,))
+    
+    def invalidate(self):
+        """Drop the cached surface (e.g. after a theme change)"""
+        self._surface = None
+    
+    def set_zoom(self, zoom):
+        """Show a ZOOM_SPANS window (index) or, with None, the live samples"""
+        self.zoom = zoom
+        self._surface = None
     
     def draw(self, widget, cr):
         """Draw the graph on Cairo context"""
         width = widget.get_allocated_width()
         height = widget.get_allocated_height()
         
+        if self.zoom is not None and self.zoom_series is not None:
+            # Long-range views are drawn from the per-column cache
+            end = time.time()
+            level = self.zoom_series.level(self.zoom, max(1, width))
+            render_history(cr, width, height, [(level.runs(end), ORANGE)],
+                           level.span, 100.0, end)
+        elif self.incremental:
+            self._draw_cached(cr, width, height)
+        else:
+            self._render(cr, width, height)
+    
+    def _draw_cached(self, cr, width, height):
+        """Scroll the offscreen surface for new samples, then blit it"""
+        count = self.history.count
+        revision = self.history.revision
+        new_samples = count - self._drawn_count
+        x_step = width / (self.max_points - 1)
+        
+        if (self._surface is None or self._surface_size != (width, height)
+                or new_samples < 0 or new_samples * x_step > width / 2):
+            # Resize, theme change or too far behind: full re-render
+            target = cr.get_target()
+            self._surface = target.create_similar(cairo.CONTENT_COLOR_ALPHA, width, height)
+            self._back = target.create_similar(cairo.CONTENT_COLOR_ALPHA, width, height)
+            self._surface_size = (width, height)
+            self._scroll_offset = 0.0
+            self._render(cairo.Context(self._surface), width, height)
+        elif new_samples or revision != self._drawn_revision:
+            # No new samples: the newest one was amended, redraw its segment
+            self._scroll(new_samples, width, height, x_step)
+        self._drawn_count = count
+        self._drawn_revision = revision
+        
+        cr.set_source_surface(self._surface, 0, 0)
+        cr.paint()
+    
+    def _scroll(self, new_samples, width, height, x_step):
+        """Shift the cached graph left and draw only the newest segments"""
+        # Shift by whole pixels to keep the copy sharp; the sub-pixel
+        # remainder is carried over and applied to the redrawn strip
+        self._scroll_offset += new_samples * x_step
+        shift = int(self._scroll_offset)
+        self._scroll_offset -= shift
+        
+        ctx = cairo.Context(self._back)
+        ctx.set_operator(cairo.OPERATOR_SOURCE)
+        ctx.set_source_surface(self._surface, -shift, 0)
+        ctx.paint()
+        
+        # Redraw from the last already-drawn point to the right edge,
+        # starting one point earlier so the line joins up seamlessly
+        last_old = self.max_points - 1 - new_samples
+        strip_x = int(last_old * x_step + self._scroll_offset) - 1
+        strip_x = max(0, min(strip_x, width - shift))
+        ctx.rectangle(strip_x, 0, width - strip_x, height)
+        ctx.clip()
+        ctx.set_source_rgba(0, 0, 0, 0)
+        ctx.paint()
+        ctx.set_operator(cairo.OPERATOR_OVER)
+        ctx.translate(self._scroll_offset, 0)
+        self._render(ctx, width, height, first=max(0, last_old - 1))
+        
+        self._surface, self._back = self._back, self._surface
+    
+    def _render(self, cr, width, height, first=0):
+        """Draw background, line and fill for samples from index first on"""
         # Background
         cr.set_source_rgba(0, 0, 0, 0.3)
         cr.rectangle(0, 0, width, height)
         cr.fill()
         
-        if len(self.data_points) < 2:
+        data_points = self.data_points
+        if len(data_points) < 2:
             return
         
         x_step = width / (self.max_points - 1)
@@ -36,10 +144,10 @@ class CPUGraph:
         # Draw line
         cr.set_source_rgb(1.0, 0.64, 0.0)  # Orange
         cr.set_line_width(1.0)
-        for i, value in enumerate(self.data_points):
+        for i in range(first, len(data_points)):
             x = i * x_step
-            y = height - (value / 100.0 * height)
-            if i == 0:
+            y = height - (data_points[i] / 100.0 * height)
+            if i == first:
                 cr.move_to(x, y)
             else:
                 cr.line_to(x, y)
@@ -47,10 +155,10 @@ class CPUGraph:
         
         # Fill under line
         cr.set_source_rgba(1.0, 0.64, 0.0, 0.2)
-        for i, value in enumerate(self.data_points):
+        for i in range(first, len(data_points)):
             x = i * x_step
-            y = height - (value / 100.0 * height)
-            if i == 0:
+            y = height - (data_points[i] / 100.0 * height)
+            if i == first:
                 cr.move_to(x, height)
                 cr.line_to(x, y)
             else:
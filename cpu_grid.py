@@ -2,18 +2,34 @@
 CPU Grid Section Component
 4x8 grid showing per-thread CPU usage
 """
+import os
+import time
+
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk
-import psutil
+from gi.repository import Gtk, Pango
 
 from cpu_graph import CPUGraph
+from history import HistoryRing, SLOT_SECONDS
+from downsample import ZoomSeries
 from cpu_arch import CPUArchitecture
+from sampler import Snapshot
+from tsdb import ARCHIVES
+from view_model import ViewModel
 
 class CPUGrid:
     """CPU thread monitoring grid (4x8)"""
     
-    def __init__(self):
+    # Threads the 8x4 grid can show; larger hosts should use CPUHeatmap
+    CAPACITY = 32
+    
+    def __init__(self, max_points=50, incremental=True):
+        """
+        max_points: columns of history kept per CPU (SLOT_SECONDS each)
+        incremental: scroll cached graph surfaces instead of full redraws
+        """
+        self.max_points = max_points
+        self.incremental = incremental
         self.grid = Gtk.Grid()
         self.grid.set_row_spacing(0)
         self.grid.set_column_spacing(0)
@@ -25,71 +41,154 @@ class CPUGrid:
         self.cpu_graphs = []
         self.drawing_areas = []
         self.cpu_labels = []
+        self._cpu_seq = None
+        self._generation = None     # topology generation the tiles were laid out for
+        self._store = None
+        self._zoom = None
+        self.history = None
+        self.view_model = ViewModel()
+        
+        # Small text for the overlay labels (attributes, not markup)
+        self._small = Pango.AttrList()
+        self._small.insert(Pango.attr_scale_new(Pango.SCALE_SMALL))
         
         self._build_grid()
     
     def _build_grid(self):
-        """Build the 4x8 CPU grid"""
-        num_cpus = psutil.cpu_count()
-        cpu_index = 0
+        """Build the 4x8 CPU grid, SMT siblings of a core side by side"""
+        topology = CPUArchitecture.topology()
+        self._generation = topology.generation
+        threads = topology.grouped_threads() or list(range(os.cpu_count() or 1))
+        threads = threads[:self.CAPACITY]
         
-        for row in range(8):
-            for col in range(4):
-                if cpu_index >= num_cpus:
-                    break
-                
-                frame = Gtk.Frame()
-                frame.set_shadow_type(Gtk.ShadowType.ETCHED_IN)
-                
-                drawing_area = Gtk.DrawingArea()
-                drawing_area.set_size_request(96, 54)  # 16:9 aspect ratio
-                
-                cpu_graph = CPUGraph(cpu_index)
-                self.cpu_graphs.append(cpu_graph)
-                self.drawing_areas.append(drawing_area)
-                
-                drawing_area.connect("draw", cpu_graph.draw)
-                
-                label = Gtk.Label(label=f"{cpu_index}")
-                label.set_halign(Gtk.Align.START)
-                label.set_valign(Gtk.Align.START)
-                label.set_margin_start(3)
-                label.set_margin_top(2)
-                self.cpu_labels.append((label, cpu_index))
-                
-                overlay = Gtk.Overlay()
-                overlay.add(drawing_area)
-                overlay.add_overlay(label)
-                frame.add(overlay)
-                
-                self.grid.attach(frame, col, row, 1, 1)
-                cpu_index += 1
+        # One history store shared by every graph, one column per SLOT_SECONDS;
+        # kept across rebuilds unless a hotplugged CPU needs more rows
+        num_rows = max(os.cpu_count() or 1, max(threads) + 1)
+        if self.history is None or self.history.rows < num_rows:
+            self.history = HistoryRing(num_rows, self.max_points, slot=SLOT_SECONDS)
+        
+        for position, cpu_index in enumerate(threads):
+            row, col = divmod(position, 4)
+            
+            frame = Gtk.Frame()
+            frame.set_shadow_type(Gtk.ShadowType.ETCHED_IN)
+            
+            drawing_area = Gtk.DrawingArea()
+            drawing_area.set_size_request(96, 54)  # 16:9 aspect ratio
+            
+            cpu_graph = CPUGraph(cpu_index, history=self.history, row=cpu_index,
+                                 incremental=self.incremental,
+                                 zoom_series=ZoomSeries(f'cpu_percents[{cpu_index}]'))
+            cpu_graph.zoom_series.store = self._store
+            cpu_graph.set_zoom(self._zoom)
+            self.cpu_graphs.append(cpu_graph)
+            self.drawing_areas.append(drawing_area)
+            
+            drawing_area.connect("draw", cpu_graph.draw)
+            drawing_area.connect("style-updated", lambda *_, g=cpu_graph: g.invalidate())
+            
+            label = Gtk.Label(label=self._label_name(cpu_index))
+            label.set_attributes(self._small)
+            label.set_halign(Gtk.Align.START)
+            label.set_valign(Gtk.Align.START)
+            label.set_margin_start(3)
+            label.set_margin_top(2)
+            self.cpu_labels.append((label, cpu_index))
+            self.view_model.bind(cpu_index, label.set_text, self._format_label)
+            
+            overlay = Gtk.Overlay()
+            overlay.add(drawing_area)
+            overlay.add_overlay(label)
+            frame.add(overlay)
+            
+            self.grid.attach(frame, col, row, 1, 1)
+    
+    def _rebuild(self):
+        """Lay the tiles out again for the current online CPUs (hotplug)"""
+        for child in self.grid.get_children():
+            self.grid.remove(child)
+            child.destroy()
+        self.cpu_graphs = []
+        self.drawing_areas = []
+        self.cpu_labels = []
+        self.view_model.fields.clear()
+        self._build_grid()
+        self.grid.show_all()
+    
+    @staticmethod
+    def _label_name(cpu_idx):
+        """Thread number, tagged P/E on hybrid CPUs"""
+        topology = CPUArchitecture.topology()
+        if topology.is_hybrid:
+            return f"{cpu_idx}{topology.core_type(cpu_idx)}"
+        return str(cpu_idx)
+    
+    @staticmethod
+    def _format_label(raw):
+        """(name, freq MHz or None, temp or None) -> label text"""
+        name, freq, temp = raw
+        parts = [name]
+        if freq is not None:
+            parts.append(f"{freq / 1000:.2f}GHz")
+        if temp is not None:
+            parts.append(f"{temp:.0f}°C")
+        return "\n".join(parts)
     
     def update(self, data):
         """Update CPU graphs and labels with new data"""
         cpu_percents = data.get('cpu_percents', [])
         cpu_freqs = data.get('cpu_freqs', [])
-        cpu_temps = data.get('cpu_temps', {})
+        cpu_temps = data.get('cpu_temps') or {}
         
-        # Update graphs
-        for i, cpu_graph in enumerate(self.cpu_graphs):
-            if i < len(cpu_percents):
-                cpu_graph.update(cpu_percents[i])
-                self.drawing_areas[i].queue_draw()
+        # Update graphs, once per new CPU sample (snapshots may repeat it)
+        seq = data.seq('cpu_percents') if isinstance(data, Snapshot) else None
+        if 'cpu_percents' in data and (seq is None or seq != self._cpu_seq):
+            self._cpu_seq = seq
+            if len(cpu_percents) != len(CPUArchitecture.topology().thread_core):
+                CPUArchitecture.refresh()
+            if CPUArchitecture.poll_hotplug() != self._generation:
+                # CPUs went on/offline: regroup the tiles
+                self._rebuild()
+            age = data.age('cpu_percents') if isinstance(data, Snapshot) else None
+            # Fixed wall-clock columns: burst or idle sampling keeps the time scale
+            self.history.push_at(time.monotonic() - (age or 0.0), cpu_percents)
+            now = time.time() - (age or 0.0)
+            for cpu_graph in self.cpu_graphs:
+                if cpu_graph.cpu_num < len(cpu_percents):
+                    cpu_graph.zoom_series.add(now, cpu_percents[cpu_graph.cpu_num])
+            for drawing_area in self.drawing_areas:
+                drawing_area.queue_draw()
         
-        # Update labels
+        # Update labels, touching only the ones whose text changed
+        self.view_model.begin_tick()
         for label, cpu_idx in self.cpu_labels:
-            parts = [str(cpu_idx)]
-            
-            if cpu_idx < len(cpu_freqs):
-                freq_ghz = cpu_freqs[cpu_idx] / 1000
-                parts.append(f"{freq_ghz:.2f}GHz")
-            
-            core_id = CPUArchitecture.thread_to_core(cpu_idx)
-            if core_id in cpu_temps:
-                parts.append(f"{cpu_temps[core_id]:.0f}°C")
-            
-            label.set_markup(f'<span size="small">{chr(10).join(parts)}</span>')
+            freq = cpu_freqs[cpu_idx] if cpu_idx < len(cpu_freqs) else None
+            temp = CPUArchitecture.core_temp(cpu_temps, cpu_idx)
+            self.view_model.set(cpu_idx, (self._label_name(cpu_idx), freq, temp))
+        self.view_model.end_tick()
+    
+    def set_zoom(self, zoom):
+        """Show a ZOOM_SPANS window (index) or, with None, the live samples"""
+        self._zoom = zoom
+        for cpu_graph, drawing_area in zip(self.cpu_graphs, self.drawing_areas):
+            cpu_graph.set_zoom(zoom)
+            drawing_area.queue_draw()
+    
+    def prefill(self, store):
+        """Load recorded history so the graphs start populated"""
+        # Zoomed views read their window from the store when first shown
+        self._store = store
+        for cpu_graph in self.cpu_graphs:
+            cpu_graph.zoom_series.store = store
+        names = [f'cpu_percents[{cpu}]' for cpu in range(self.history.rows)]
+        # The finest archive is coarser than a column: repeat each bucket
+        repeat = max(1, round(ARCHIVES[0][0] / SLOT_SECONDS))
+        for column in store.recent(names, self.max_points // repeat):
+            for _ in range(repeat):
+                self.history.push(column)
+        for cpu_graph, drawing_area in zip(self.cpu_graphs, self.drawing_areas):
+            cpu_graph.invalidate()
+            drawing_area.queue_draw()
     
     @property
     def widget(self):
@@ -0,0 +1,183 @@
+"""
+CPU Heatmap Section Component
+Every thread's load history in one drawing area (rows: CPUs, columns: time)
+"""
+import os
+import sys
+import time
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk
+import cairo
+
+from history import HistoryRing, SLOT_SECONDS
+from sampler import Snapshot
+from cpu_arch import CPUArchitecture
+from tsdb import ARCHIVES
+
+def _build_palette():
+    """Precompute ARGB32 pixels for 0..100% (black -> orange -> white)"""
+    palette = []
+    for percent in range(101):
+        t = percent / 100
+        if t < 0.6:
+            # Black to the graph orange (1.0, 0.64, 0.0)
+            k = t / 0.6
+            r, g, b = k, 0.64 * k, 0.0
+        else:
+            # Orange to white
+            k = (t - 0.6) / 0.4
+            r, g, b = 1.0, 0.64 + 0.36 * k, k
+        pixel = (255, int(r * 255), int(g * 255), int(b * 255))
+        # Cairo ARGB32 is a native-endian 32-bit word
+        if sys.byteorder == 'little':
+            pixel = pixel[::-1]
+        palette.append(bytes(pixel))
+    return palette
+
+PALETTE = _build_palette()
+
+class CPUHeatmap:
+    """Many-core CPU view drawn from a single pixel buffer
+    
+    One pixel per (thread, SLOT_SECONDS column) lives in an ARGB32 buffer
+    that backs a cairo ImageSurface. Each tick repaints only the columns
+    it added or amended behind the history cursor; drawing scales the
+    buffer to the allocation with a repeating pattern offset by the
+    cursor, so the widget count is constant and the cost follows pixels
+    rather than threads.
+    """
+    
+    def __init__(self, max_points=120, row_height=2):
+        """
+        max_points: columns of history (SLOT_SECONDS each)
+        row_height: minimum pixels per thread row
+        """
+        self.max_points = max_points
+        self.row_height = row_height
+        self.history = None
+        self._cpu_seq = None
+        self._stride = cairo.ImageSurface.format_stride_for_width(
+            cairo.FORMAT_ARGB32, max_points)
+        self._layout()
+        
+        self.drawing_area = Gtk.DrawingArea()
+        self.drawing_area.set_size_request(384, max(64, self.num_cpus * row_height))
+        self.drawing_area.connect("draw", self.draw)
+        self.drawing_area.set_has_tooltip(True)
+        self.drawing_area.connect("query-tooltip", self._on_query_tooltip)
+        
+        self.frame = Gtk.Frame()
+        self.frame.set_shadow_type(Gtk.ShadowType.ETCHED_IN)
+        self.frame.set_margin_start(10)
+        self.frame.set_margin_end(10)
+        self.frame.set_margin_top(10)
+        self.frame.set_margin_bottom(10)
+        self.frame.add(self.drawing_area)
+    
+    def _layout(self):
+        """Pixel rows for the online CPUs (again after hotplug)"""
+        topology = CPUArchitecture.topology()
+        self._generation = topology.generation
+        # Pixel rows follow topology order so SMT siblings sit together
+        self.row_threads = topology.grouped_threads() or list(range(os.cpu_count() or 1))
+        self.num_cpus = len(self.row_threads)
+        # History is indexed by CPU number, so it survives a regroup unless
+        # a hotplugged CPU needs more rows
+        rows = max(self.row_threads) + 1
+        if self.history is None or self.history.rows < rows:
+            self.history = HistoryRing(rows, self.max_points, slot=SLOT_SECONDS)
+        self._pixels = bytearray(self._stride * self.num_cpus)
+        self._surface = cairo.ImageSurface.create_for_data(
+            self._pixels, cairo.FORMAT_ARGB32, self.max_points, self.num_cpus, self._stride)
+        self._clear()
+    
+    def _relayout(self):
+        """Regroup the rows after CPUs went on/offline"""
+        self._layout()
+        self._paint(self.max_points)
+        self.drawing_area.set_size_request(384, max(64, self.num_cpus * self.row_height))
+    
+    def _clear(self):
+        """Fill the buffer with the 0% colour"""
+        idle = PALETTE[0] * self.max_points
+        for row in range(self.num_cpus):
+            start = row * self._stride
+            self._pixels[start:start + len(idle)] = idle
+    
+    def update(self, data):
+        """Write the newest sample of every thread as one pixel column"""
+        if 'cpu_percents' not in data:
+            return  # Not collected yet (startup)
+        seq = data.seq('cpu_percents') if isinstance(data, Snapshot) else None
+        if seq is not None and seq == self._cpu_seq:
+            return
+        self._cpu_seq = seq
+        if CPUArchitecture.poll_hotplug() != self._generation:
+            self._relayout()
+        
+        # Fixed wall-clock columns: burst or idle sampling keeps the time scale
+        age = data.age('cpu_percents') if isinstance(data, Snapshot) else None
+        added = self.history.push_at(time.monotonic() - (age or 0.0), data['cpu_percents'])
+        self._paint(max(1, added))
+        self.drawing_area.queue_draw()
+    
+    def prefill(self, store):
+        """Fill the map with recorded history so it starts populated"""
+        names = [f'cpu_percents[{cpu}]' for cpu in range(self.history.rows)]
+        # The finest archive is coarser than a column: repeat each bucket
+        repeat = max(1, round(ARCHIVES[0][0] / SLOT_SECONDS))
+        for column in store.recent(names, self.max_points // repeat):
+            for _ in range(repeat):
+                self.history.push(column)
+        self._paint(self.max_points)
+        self.drawing_area.queue_draw()
+    
+    def _paint(self, columns):
+        """Redraw the newest columns of every thread's pixel row"""
+        columns = min(columns, self.max_points)
+        first = self.max_points - columns
+        cursor = self.history.cursor
+        
+        self._surface.flush()
+        pixels = self._pixels
+        stride = self._stride
+        for row, cpu in enumerate(self.row_threads):
+            samples = self.history.row(cpu)
+            for i in range(first, self.max_points):
+                percent = samples[i]
+                index = 0 if percent <= 0 else 100 if percent >= 100 else int(percent)
+                # Sample i (oldest first) lives in ring column (cursor + i)
+                offset = row * stride + (cursor + i) % self.max_points * 4
+                pixels[offset:offset + 4] = PALETTE[index]
+        self._surface.mark_dirty()
+    
+    def draw(self, widget, cr):
+        """Scale the pixel buffer onto the widget, oldest column first"""
+        width = widget.get_allocated_width()
+        height = widget.get_allocated_height()
+        
+        cr.scale(width / self.max_points, height / self.num_cpus)
+        # The cursor column holds the oldest sample; repeat to wrap around
+        cr.set_source_surface(self._surface, -self.history.cursor, 0)
+        pattern = cr.get_source()
+        pattern.set_extend(cairo.EXTEND_REPEAT)
+        pattern.set_filter(cairo.FILTER_NEAREST)
+        cr.rectangle(0, 0, self.max_points, self.num_cpus)
+        cr.fill()
+    
+    def _on_query_tooltip(self, widget, x, y, keyboard_mode, tooltip):
+        """Show the thread under the pointer and its current load"""
+        height = widget.get_allocated_height()
+        if height <= 0:
+            return False
+        row = min(self.num_cpus - 1, int(y * self.num_cpus / height))
+        cpu = self.row_threads[row]
+        tooltip.set_text(f"CPU {cpu}: {self.history.latest(cpu):.0f}%")
+        return True
+    
+    @property
+    def widget(self):
+        """Get the GTK widget"""
+        return self.frame
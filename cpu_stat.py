@@ -0,0 +1,201 @@
+"""
+CPU Stat Collector
+Per-CPU usage from one bulk /proc/stat read, frequencies from cpufreq
+"""
+import os
+import re
+from array import array
+from itertools import repeat
+from operator import add, sub
+
+from cpu_topology import parse_cpu_list
+
+# /proc/cpuinfo fallback for hosts without cpufreq (e.g. most VMs)
+CPUINFO_MHZ = re.compile(rb'^cpu MHz\s*:\s*([\d.]+)', re.MULTILINE)
+CPUINFO_PROCESSOR = re.compile(rb'^processor\s*:\s*(\d+)', re.MULTILINE)
+
+def read_all(fd, size_hint=4096):
+    """Read a whole procfs/sysfs file through a kept-open fd"""
+    size = size_hint
+    while True:
+        data = os.pread(fd, size, 0)
+        if len(data) < size:
+            return data
+        size *= 2
+
+class CPUStatCollector:
+    """Per-CPU usage and frequency over kept-open procfs/sysfs files
+    
+    Usage comes from a single read of /proc/stat per tick; the busy and
+    total jiffies of every CPU live in flat arrays, so a tick is one
+    columnar parse plus one delta pass. Frequencies are pread() from the
+    scaling_cur_freq of every CPU listed in cpu/online instead of
+    rescanning /proc/cpuinfo, and the files are reopened when that list
+    changes.
+    """
+    
+    def __init__(self, proc_root='/proc', sysfs_root='/sys'):
+        """
+        proc_root / sysfs_root: tree roots (point at a fake tree for testing)
+        """
+        self.proc_root = proc_root
+        self.sysfs_root = sysfs_root
+        self._stat_fd = os.open(os.path.join(proc_root, 'stat'), os.O_RDONLY)
+        self._stat_size = 4096
+        self._prev_ids = array('i')
+        self._prev_busy = array('d')
+        self._prev_total = array('d')
+        self._cpu_root = os.path.join(sysfs_root, 'devices', 'system', 'cpu')
+        self._freq_fds = None   # CPU number -> fd of scaling_cur_freq
+        self._online_fd = None
+        self._online = None     # cpu/online text the fds were opened for
+    
+    def close(self):
+        """Close every kept-open file"""
+        self._close_freq_files()
+        try:
+            os.close(self._stat_fd)
+        except (OSError, TypeError):
+            pass
+        self._stat_fd = None
+    
+    def _close_freq_files(self):
+        """Close the cpufreq and cpu/online files"""
+        for fd in list((self._freq_fds or {}).values()) + [self._online_fd]:
+            try:
+                os.close(fd)
+            except (OSError, TypeError):
+                pass
+        self._freq_fds = None
+        self._online_fd = None
+    
+    def _read_jiffies(self):
+        """Parse /proc/stat into per-CPU (ids, busy, total) arrays
+        
+        The per-CPU lines are one block after the aggregate 'cpu' line,
+        all with the same number of fields, so the block is split once
+        and each counter is a strided slice of that one list: the work
+        per CPU is in int() and add(), not in per-line Python code.
+        """
+        data = read_all(self._stat_fd, self._stat_size)
+        self._stat_size = max(self._stat_size, len(data) + 1)
+        
+        # 'cpu0 ...' up to the last 'cpuN ...', without the aggregate 'cpu  ...'
+        start = data.find(b'\ncpu') + 1
+        if not start:
+            return array('i'), array('d'), array('d')
+        end = data.find(b'\n', data.rfind(b'\ncpu') + 1)
+        block = data[start:end] if end >= 0 else data[start:]
+        fields = block.split()
+        first = block.find(b'\n')
+        width = len(block[:first].split()) if first >= 0 else len(fields)
+        
+        ids = array('i', [int(name[3:]) for name in fields[0::width]])
+        # user nice system idle iowait irq softirq steal (guest is in user);
+        # kernels before 2.6.11 have no steal column
+        user, nice, system, idle, iowait, irq, softirq, steal = (
+            map(int, fields[k::width]) if k < width else repeat(0) for k in range(1, 9))
+        busy = array('d', map(add, map(add, map(add, user, nice), map(add, system, irq)),
+                              map(add, softirq, steal)))
+        total = array('d', map(add, busy, map(add, idle, iowait)))
+        return ids, busy, total
+    
+    def read_percents(self):
+        """Get per-CPU usage percentages since the previous call
+        
+        The list is indexed by CPU number; offline CPUs read as 0.
+        """
+        ids, busy, total = self._read_jiffies()
+        prev_ids = self._prev_ids
+        prev_busy, prev_total = self._prev_busy, self._prev_total
+        self._prev_ids, self._prev_busy, self._prev_total = ids, busy, total
+        
+        if ids != prev_ids:
+            # First call or CPU hotplug: no baseline yet
+            percents = [0.0] * len(ids)
+        else:
+            percents = [
+                min(100.0, max(0.0, 100.0 * b / t)) if t > 0 else 0.0
+                for b, t in zip(map(sub, busy, prev_busy), map(sub, total, prev_total))
+            ]
+        if ids and ids[-1] != len(ids) - 1:
+            # Holes from offline CPUs: spread values out to their CPU numbers
+            indexed = [0.0] * (max(ids) + 1)
+            for cpu, percent in zip(ids, percents):
+                indexed[cpu] = percent
+            return indexed
+        return percents
+    
+    def _read_online(self):
+        """Current cpu/online text (None if the file is missing)"""
+        if self._online_fd is None:
+            return None
+        try:
+            return os.pread(self._online_fd, 4096, 0)
+        except OSError:
+            return None
+    
+    def _open_freq_files(self):
+        """Open scaling_cur_freq for every online CPU that has cpufreq"""
+        self._close_freq_files()
+        self._freq_fds = {}
+        try:
+            self._online_fd = os.open(os.path.join(self._cpu_root, 'online'), os.O_RDONLY)
+        except OSError:
+            pass
+        self._online = self._read_online()
+        if self._online is not None:
+            cpus = parse_cpu_list(self._online.decode())
+        else:
+            try:
+                cpus = sorted(int(name[3:]) for name in os.listdir(self._cpu_root)
+                              if name.startswith('cpu') and name[3:].isdigit())
+            except OSError:
+                cpus = []
+        for cpu in cpus:
+            path = os.path.join(self._cpu_root, f'cpu{cpu}', 'cpufreq', 'scaling_cur_freq')
+            try:
+                self._freq_fds[cpu] = os.open(path, os.O_RDONLY)
+            except OSError:
+                pass
+    
+    def read_frequencies(self):
+        """Get per-CPU frequencies in MHz
+        
+        The list is indexed by CPU number; offline CPUs and CPUs without
+        cpufreq read as None.
+        """
+        if self._freq_fds is None or self._read_online() != self._online:
+            # First call or CPU hotplug
+            self._open_freq_files()
+        if not self._freq_fds:
+            return self._read_cpuinfo_frequencies()
+        
+        freqs = [None] * (max(self._freq_fds) + 1)
+        for cpu, fd in self._freq_fds.items():
+            try:
+                # scaling_cur_freq is in kHz
+                freqs[cpu] = int(os.pread(fd, 32, 0)) / 1000
+            except (OSError, ValueError):
+                pass
+        return freqs
+    
+    def _read_cpuinfo_frequencies(self):
+        """Fallback: pull every 'cpu MHz' value out of /proc/cpuinfo at once"""
+        try:
+            with open(os.path.join(self.proc_root, 'cpuinfo'), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return []
+        # Only online CPUs are listed: place each block by its processor number
+        freqs = []
+        for block in data.split(b'\n\n'):
+            cpu = CPUINFO_PROCESSOR.search(block)
+            mhz = CPUINFO_MHZ.search(block)
+            if cpu is None or mhz is None:
+                continue
+            cpu = int(cpu.group(1))
+            if cpu >= len(freqs):
+                freqs.extend([None] * (cpu + 1 - len(freqs)))
+            freqs[cpu] = float(mhz.group(1))
+        return freqs
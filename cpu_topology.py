@@ -0,0 +1,155 @@
+"""
+CPU Topology Discovery
+Read thread -> core/package/type lookups once from sysfs
+"""
+import os
+from array import array
+
+# Core type codes stored in CPUTopology.thread_type
+CORE_UNKNOWN = 0
+CORE_PERFORMANCE = 1
+CORE_EFFICIENCY = 2
+CORE_TYPE_NAMES = {CORE_UNKNOWN: '', CORE_PERFORMANCE: 'P', CORE_EFFICIENCY: 'E'}
+
+def parse_cpu_list(text):
+    """Parse a sysfs CPU list like '0-3,8,10-11' into a list of ints"""
+    cpus = []
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-')
+            cpus.extend(range(int(first), int(last) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+def _read(path):
+    """Read a small sysfs attribute, or None if it is missing"""
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+class CPUTopology:
+    """Precomputed CPU topology lookups
+    
+    thread_core, thread_package and thread_type are flat arrays indexed
+    by logical CPU number (-1 / CORE_UNKNOWN for offline CPUs), so hot
+    paths such as per-thread temperature lookups are a single index.
+    refresh() re-reads everything when the set of online CPUs changes
+    and bumps generation, so views can tell their layout is out of date.
+    """
+    
+    def __init__(self, sysfs_root='/sys'):
+        """
+        sysfs_root: sysfs tree root (point at a fixture tree for testing)
+        """
+        self.sysfs_root = sysfs_root
+        self.cpu_root = os.path.join(sysfs_root, 'devices', 'system', 'cpu')
+        self._online_text = None
+        self.generation = 0
+        self.refresh()
+    
+    def refresh(self):
+        """Re-read topology if CPUs went on/offline; returns True if changed"""
+        online_text = _read(os.path.join(self.cpu_root, 'online'))
+        if online_text is not None and online_text == self._online_text:
+            return False
+        self._online_text = online_text
+        self._discover(online_text)
+        self.generation += 1
+        return True
+    
+    def _discover(self, online_text):
+        """Fill the lookup arrays from cpu*/topology"""
+        if online_text is not None:
+            online = parse_cpu_list(online_text)
+        else:
+            online = sorted(int(name[3:]) for name in self._list_cpu_dirs())
+        size = (max(online) + 1) if online else 0
+        
+        self.online = online
+        self.thread_core = array('i', [-1]) * size
+        self.thread_package = array('i', [-1]) * size
+        self.thread_type = array('b', [CORE_UNKNOWN]) * size
+        self.siblings = [()] * size
+        
+        for cpu in online:
+            topology = os.path.join(self.cpu_root, f'cpu{cpu}', 'topology')
+            core = _read(os.path.join(topology, 'core_id'))
+            package = _read(os.path.join(topology, 'physical_package_id'))
+            siblings = (_read(os.path.join(topology, 'core_cpus_list'))
+                        or _read(os.path.join(topology, 'thread_siblings_list')))
+            self.thread_core[cpu] = int(core) if core is not None else cpu
+            self.thread_package[cpu] = int(package) if package is not None else 0
+            self.siblings[cpu] = tuple(parse_cpu_list(siblings)) if siblings else (cpu,)
+        
+        self._discover_core_types(online)
+    
+    def _list_cpu_dirs(self):
+        """cpuN directory names (fallback when 'online' is missing)"""
+        try:
+            return [name for name in os.listdir(self.cpu_root)
+                    if name.startswith('cpu') and name[3:].isdigit()]
+        except OSError:
+            return []
+    
+    def _discover_core_types(self, online):
+        """Classify P/E cores (Intel hybrid PMUs, else cpu_capacity)"""
+        devices = os.path.join(self.sysfs_root, 'devices')
+        p_cpus = _read(os.path.join(devices, 'cpu_core', 'cpus'))
+        e_cpus = _read(os.path.join(devices, 'cpu_atom', 'cpus'))
+        if p_cpus is not None or e_cpus is not None:
+            for kind, text in ((CORE_PERFORMANCE, p_cpus), (CORE_EFFICIENCY, e_cpus)):
+                for cpu in parse_cpu_list(text or ''):
+                    if cpu < len(self.thread_type):
+                        self.thread_type[cpu] = kind
+            return
+        
+        # Arm big.LITTLE and friends: the biggest capacity is a P-core
+        capacities = {}
+        for cpu in online:
+            capacity = _read(os.path.join(self.cpu_root, f'cpu{cpu}', 'cpu_capacity'))
+            if capacity is not None:
+                capacities[cpu] = int(capacity)
+        if len(set(capacities.values())) > 1:
+            biggest = max(capacities.values())
+            for cpu, capacity in capacities.items():
+                self.thread_type[cpu] = (CORE_PERFORMANCE if capacity == biggest
+                                         else CORE_EFFICIENCY)
+    
+    @property
+    def num_threads(self):
+        """Number of online logical CPUs"""
+        return len(self.online)
+    
+    @property
+    def is_hybrid(self):
+        """Whether the CPU mixes performance and efficiency cores"""
+        return CORE_EFFICIENCY in self.thread_type
+    
+    def core_of(self, thread_id):
+        """
+        (package id, core id) of a thread ((0, its own id) if unknown)
+        core_id is only unique within a package, so both are needed to
+        tell the cores of a multi-socket machine apart.
+        """
+        if 0 <= thread_id < len(self.thread_core) and self.thread_core[thread_id] >= 0:
+            return self.thread_package[thread_id], self.thread_core[thread_id]
+        return 0, thread_id
+    
+    def core_type(self, thread_id):
+        """'P', 'E' or '' for a thread"""
+        if 0 <= thread_id < len(self.thread_type):
+            return CORE_TYPE_NAMES[self.thread_type[thread_id]]
+        return ''
+    
+    def grouped_threads(self):
+        """Online threads ordered so SMT siblings of a core sit together"""
+        return sorted(self.online, key=lambda cpu: (
+            self.thread_package[cpu],
+            self.thread_type[cpu] == CORE_EFFICIENCY,
+            self.thread_core[cpu],
+            cpu))
@@ -0,0 +1,260 @@
+"""
+Downsampling
+Largest-Triangle-Three-Buckets and min/max-per-column reduction of long histories
+"""
+import time
+from array import array
+
+from tsdb import ARCHIVES
+
+# Zoomable time windows in seconds and their labels
+ZOOM_SPANS = (60, 3600, 86400)
+ZOOM_LABELS = ('1 min', '1 h', '24 h')
+
+# Samples further apart than this (twice the slowest sampling interval,
+# see SamplingPolicy.HIDDEN_INTERVAL) break the line
+MAX_SAMPLE_GAP = 60.0
+
+def _pick(ts, vs, start, end, ax, ay, cx, cy):
+    """Index in start..end-1 of the point spanning the largest triangle with a and c"""
+    best = start
+    best_area = -1.0
+    dx = ax - cx
+    dy = cy - ay
+    for i in range(start, end):
+        area = abs(dx * (vs[i] - ay) - (ax - ts[i]) * dy)
+        if area > best_area:
+            best_area = area
+            best = i
+    return best
+
+def lttb(ts, vs, threshold):
+    """
+    Largest-Triangle-Three-Buckets over a whole series
+    ts / vs: sample times and values, oldest first
+    Returns the indices of at most threshold points to draw (always the
+    first and last sample).
+    """
+    n = len(ts)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        # The next bucket's mean (the last point for the last bucket)
+        next_end = min(int((bucket + 2) * every) + 1, n)
+        count = next_end - end
+        cx = sum(ts[end:next_end]) / count
+        cy = sum(vs[end:next_end]) / count
+        a = _pick(ts, vs, start, end, ts[a], vs[a], cx, cy)
+        selected.append(a)
+    selected.append(n - 1)
+    return selected
+
+class ZoomLevel:
+    """One time window of one series reduced to a fixed number of columns
+    
+    Columns are wall-clock buckets of span / columns seconds stored in a
+    ring (column = bucket modulo columns, as in tsdb.Series), each with
+    the min, max and mean of its samples, so adding a sample is O(1) and
+    drawing only walks the columns, whatever the history length. A
+    column also keeps its LTTB point, picked once the following column
+    is complete (the pick needs that column's mean); only the newest two
+    columns hold their raw samples.
+    """
+    
+    def __init__(self, span, columns):
+        """
+        span: seconds shown
+        columns: buckets across the span (the graph's pixel width)
+        """
+        self.span = span
+        self.columns = columns
+        self.step = span / columns
+        self.last_time = None   # newest sample accepted
+        
+        self._bucket = array('q', [-1]) * columns
+        self._low = array('d', [0.0]) * columns
+        self._high = array('d', [0.0]) * columns
+        self._sum = array('d', [0.0]) * columns
+        self._count = array('L', [0]) * columns
+        self._pick_t = array('d', [0.0]) * columns
+        self._pick_v = array('d', [0.0]) * columns
+        self._picked = array('q', [-1]) * columns  # bucket whose pick is stored
+        
+        self._anchor = None     # last picked (t, value)
+        self._current = None    # bucket being filled
+        self._current_t = array('d')
+        self._current_v = array('d')
+        self._pending = None    # previous bucket, waiting for the current mean
+        self._pending_t = array('d')
+        self._pending_v = array('d')
+    
+    def add(self, t, value, low=None, high=None):
+        """
+        Fold one sample (wall-clock t) into its column
+        low / high: extremes when the sample is itself an aggregate
+        (e.g. a tsdb bucket). Samples not newer than the last one are
+        ignored; returns whether the sample was taken.
+        """
+        if self.last_time is not None and t <= self.last_time:
+            return False
+        self.last_time = t
+        bucket = int(t // self.step)
+        if bucket != self._current:
+            self._advance(bucket)
+        low = value if low is None else low
+        high = value if high is None else high
+        
+        slot = bucket % self.columns
+        if self._bucket[slot] == bucket:
+            if low < self._low[slot]:
+                self._low[slot] = low
+            if high > self._high[slot]:
+                self._high[slot] = high
+            self._sum[slot] += value
+            self._count[slot] += 1
+        else:
+            self._bucket[slot] = bucket
+            self._low[slot] = low
+            self._high[slot] = high
+            self._sum[slot] = value
+            self._count[slot] = 1
+        self._current_t.append(t)
+        self._current_v.append(value)
+        return True
+    
+    def _advance(self, bucket):
+        """The current bucket is complete: pick the pending one's point"""
+        if self._current is not None:
+            count = len(self._current_t)
+            if self._pending is not None:
+                self._finalize(sum(self._current_t) / count, sum(self._current_v) / count)
+            # The current bucket becomes pending; reuse the old arrays
+            self._pending, self._current = self._current, None
+            self._pending_t, self._current_t = self._current_t, self._pending_t
+            self._pending_v, self._current_v = self._current_v, self._pending_v
+            del self._current_t[:]
+            del self._current_v[:]
+        self._current = bucket
+    
+    def _finalize(self, cx, cy):
+        """Store the pending bucket's LTTB point against the mean (cx, cy) after it"""
+        ts, vs = self._pending_t, self._pending_v
+        if self._anchor is None:
+            index = 0   # LTTB keeps the first point
+        else:
+            index = _pick(ts, vs, 0, len(ts), self._anchor[0], self._anchor[1], cx, cy)
+        self._anchor = (ts[index], vs[index])
+        slot = self._pending % self.columns
+        if self._bucket[slot] == self._pending:
+            self._pick_t[slot] = ts[index]
+            self._pick_v[slot] = vs[index]
+            self._picked[slot] = self._pending
+    
+    def runs(self, end=None):
+        """
+        Columns covering end - span .. end, as runs without gaps
+        Empty columns only end a run when they span more than
+        MAX_SAMPLE_GAP, so sparse samples in narrow columns still join up.
+        Each column is (column centre, low, high, line t, line value):
+        the line follows the LTTB picks, the pending column's mean and
+        the newest sample.
+        """
+        end = self.last_time if end is None else end
+        if end is None:
+            return []
+        step = self.step
+        columns = self.columns
+        last = int(end // step)
+        max_gap = max(1, int(MAX_SAMPLE_GAP / step))
+        runs = []
+        run = None
+        previous = None
+        for bucket in range(last - columns + 1, last + 1):
+            slot = bucket % columns
+            if self._bucket[slot] != bucket:
+                continue
+            if previous is None or bucket - previous > max_gap:
+                run = None
+            previous = bucket
+            if bucket == self._current:
+                line_t, line_v = self._current_t[-1], self._current_v[-1]
+            elif self._picked[slot] == bucket:
+                line_t, line_v = self._pick_t[slot], self._pick_v[slot]
+            else:
+                line_t = (bucket + 0.5) * step
+                line_v = self._sum[slot] / self._count[slot]
+            if run is None:
+                run = []
+                runs.append(run)
+            run.append(((bucket + 0.5) * step, self._low[slot], self._high[slot],
+                        line_t, line_v))
+        return runs
+    
+    def resampled(self, columns):
+        """A copy of this level with a different number of columns"""
+        level = ZoomLevel(self.span, columns)
+        for run in self.runs():
+            for _, low, high, t, value in run:
+                level.add(t, value, low, high)
+        return level
+
+class ZoomSeries:
+    """One metric at every zoom level
+    
+    Every level is updated as samples arrive, so switching zoom is
+    immediate. With a time-series store attached, a level is refilled
+    from the store the first time it is drawn and whenever the width
+    changes, reading the coarsest archive that is still finer than one
+    column.
+    """
+    
+    def __init__(self, name, columns=96, spans=ZOOM_SPANS):
+        """
+        name: flattened metric name in the store (e.g. 'memory_stats.percent')
+        columns: initial width in pixels
+        """
+        self.name = name
+        self.store = None
+        self.levels = [ZoomLevel(span, columns) for span in spans]
+        self._filled = [False] * len(spans)
+    
+    def add(self, t, value):
+        """Add one sample (wall-clock time t) to every level"""
+        if value is None:
+            return
+        for level in self.levels:
+            level.add(t, value)
+    
+    def level(self, index, columns):
+        """The level for ZOOM_SPANS[index], columns wide"""
+        level = self.levels[index]
+        refill = self.store is not None and not self._filled[index]
+        if columns != level.columns or refill:
+            fresh = None
+            if self.store is not None:
+                self._filled[index] = True
+                fresh = ZoomLevel(level.span, columns)
+                if not self._fill(fresh):
+                    fresh = None    # Nothing recorded; keep the live samples
+            if fresh is None and columns != level.columns:
+                fresh = level.resampled(columns)
+            self.levels[index] = level = fresh or level
+        return level
+    
+    def _fill(self, level):
+        """Load level's window from the store; False if it has no data"""
+        steps = [step for step, _ in ARCHIVES]
+        step = max([s for s in steps if s <= level.step] or steps[:1])
+        _, points = self.store.read(self.name, time.time() - level.span, step=step)
+        found = False
+        for point in points:
+            if point is not None:
+                timestamp, low, mean, high = point
+                level.add(timestamp, mean, low, high)
+                found = True
+        return found
@@ -0,0 +1,272 @@
+"""
+Metrics Exporter
+Serve the newest snapshot over HTTP in OpenMetrics / Prometheus text format
+"""
+import gzip
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from instrumentation import Instrumentation
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 9179
+
+# Metric name prefix
+PREFIX = 'sysmon'
+
+OPENMETRICS_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+PROMETHEUS_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _format_value(value):
+    """Sample value as OpenMetrics text"""
+    if value is True or value is False:
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    value = float(value)
+    if math.isfinite(value):
+        return repr(value)
+    # OpenMetrics spells these NaN / +Inf / -Inf, not repr()'s 'nan' / 'inf'
+    return 'NaN' if math.isnan(value) else '+Inf' if value > 0 else '-Inf'
+
+def _escape(text):
+    """Escape a label value"""
+    return str(text).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class _Family:
+    """One metric family being serialized: name, help, unit and samples"""
+    
+    __slots__ = ('name', 'help', 'unit', 'samples')
+    
+    def __init__(self, name, help, unit=None):
+        self.name = f'{PREFIX}_{name}'
+        self.help = help
+        self.unit = unit
+        self.samples = []
+    
+    def add(self, value, **labels):
+        """Add a sample; None values (unknown) are left out"""
+        if value is None:
+            return
+        label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+        self.samples.append((f'{{{label_text}}}' if label_text else '', value))
+    
+    def render(self, lines):
+        """Append the family's metadata and sample lines"""
+        if not self.samples:
+            return
+        lines.append(f'# TYPE {self.name} gauge')
+        if self.unit:
+            lines.append(f'# UNIT {self.name} {self.unit}')
+        lines.append(f'# HELP {self.name} {self.help}')
+        for labels, value in self.samples:
+            lines.append(f'{self.name}{labels} {_format_value(value)}')
+
+def _families(data, now):
+    """Every metric family of one snapshot (or plain get_all() dict)"""
+    families = []
+    
+    def family(name, help, unit=None):
+        f = _Family(name, help, unit)
+        families.append(f)
+        return f
+    
+    # CPU
+    usage = family('cpu_usage_percent', 'Per-thread CPU usage', 'percent')
+    for cpu, value in enumerate(data.get('cpu_percents') or ()):
+        usage.add(value, cpu=cpu)
+    freq = family('cpu_frequency_megahertz', 'Per-thread CPU frequency', 'megahertz')
+    for cpu, value in enumerate(data.get('cpu_freqs') or ()):
+        freq.add(value, cpu=cpu)
+    temps = family('cpu_core_temperature_celsius', 'Per-core CPU temperature', 'celsius')
+    for package, cores in sorted((data.get('cpu_temps') or {}).items()):
+        for core, value in sorted((cores or {}).items()):
+            temps.add(value, package=package, core=core)
+    family('cpu_package_temperature_celsius', 'CPU package temperature',
+           'celsius').add(data.get('cpu_package_temp'))
+    
+    # GPU
+    gpu_temp = family('gpu_temperature_celsius', 'GPU temperature', 'celsius')
+    gpu_power = family('gpu_power_watts', 'GPU power draw', 'watts')
+    gpu_limit = family('gpu_power_limit_watts', 'GPU power limit', 'watts')
+    gpu_used = family('gpu_memory_used_bytes', 'GPU memory in use', 'bytes')
+    gpu_total = family('gpu_memory_total_bytes', 'GPU memory size', 'bytes')
+    for index, gpu in enumerate(data.get('gpus') or ()):
+        gpu_temp.add(gpu.get('temp'), gpu=index)
+        gpu_power.add(gpu.get('power_draw'), gpu=index)
+        gpu_limit.add(gpu.get('power_limit'), gpu=index)
+        if gpu.get('mem_used') is not None:
+            gpu_used.add(gpu['mem_used'] * 1024**2, gpu=index)
+        if gpu.get('mem_total') is not None:
+            gpu_total.add(gpu['mem_total'] * 1024**2, gpu=index)
+    family('cuda_available', 'Whether the CUDA runtime found a device').add(
+        data.get('cuda_available'))
+    
+    # Memory
+    mem = data.get('memory_stats') or {}
+    family('memory_total_bytes', 'Physical memory size', 'bytes').add(mem.get('total'))
+    family('memory_used_bytes', 'Physical memory in use', 'bytes').add(mem.get('used'))
+    family('memory_available_bytes', 'Memory available without swapping',
+           'bytes').add(mem.get('available'))
+    
+    # Disks
+    disks = (data.get('disk_io') or {}).get('devices') or {}
+    for field, name, help, unit in (
+            ('read_bytes', 'disk_read_bytes_per_second', 'Disk read throughput', None),
+            ('write_bytes', 'disk_write_bytes_per_second', 'Disk write throughput', None),
+            ('read_iops', 'disk_reads_per_second', 'Disk read operations', None),
+            ('write_iops', 'disk_writes_per_second', 'Disk write operations', None),
+            ('util', 'disk_busy_percent', 'Time the disk had I/O in flight', 'percent')):
+        f = family(name, help, unit)
+        for device, rates in sorted(disks.items()):
+            f.add(rates.get(field), device=device)
+    filesystem = data.get('disk_usage') or {}
+    family('filesystem_size_bytes', 'Size of the monitored filesystem',
+           'bytes').add(filesystem.get('total'), path='/home')
+    family('filesystem_used_bytes', 'Space used on the monitored filesystem',
+           'bytes').add(filesystem.get('used'), path='/home')
+    
+    # Network
+    nics = (data.get('network_stats') or {}).get('interfaces') or {}
+    for field, name, help, unit in (
+            ('rx_bytes', 'network_receive_bytes_per_second', 'Received throughput', None),
+            ('tx_bytes', 'network_transmit_bytes_per_second', 'Transmitted throughput', None),
+            ('rx_packets', 'network_receive_packets_per_second', 'Received packets', None),
+            ('tx_packets', 'network_transmit_packets_per_second', 'Transmitted packets', None),
+            ('util', 'network_link_utilization_percent',
+             'Throughput relative to link speed', 'percent')):
+        f = family(name, help, unit)
+        for interface, rates in sorted(nics.items()):
+            f.add(rates.get(field), interface=interface)
+    
+    family('processes', 'Number of processes').add(
+        (data.get('processes') or {}).get('count'))
+    
+    # Pressure stall information (avg10)
+    some = family('pressure_some_percent', 'Time some tasks stalled on the resource', 'percent')
+    full = family('pressure_full_percent', 'Time all tasks stalled on the resource', 'percent')
+    for resource, pressure in sorted((data.get('pressure') or {}).items()):
+        some.add(pressure.get('some'), resource=resource)
+        full.add(pressure.get('full'), resource=resource)
+    family('cgroups', 'Number of cgroups').add((data.get('cgroups') or {}).get('count'))
+    
+    # How fresh each collector's value was when the buffer was built
+    age = getattr(data, 'age', None)
+    if age is not None:
+        ages = family('sample_age_seconds', 'Age of each collector value', 'seconds')
+        for key in sorted(data):
+            ages.add(round(age(key, now), 3), collector=key)
+    return families
+
+def serialize(data, now=None):
+    """Snapshot -> OpenMetrics text (bytes), ending with '# EOF'"""
+    now = time.monotonic() if now is None else now
+    lines = []
+    for f in _families(data, now):
+        f.render(lines)
+    lines.append('# EOF\n')
+    return '\n'.join(lines).encode()
+
+class ScrapeBuffer:
+    """One serialized snapshot, shared by every scrape until the next tick"""
+    
+    __slots__ = ('body', '_gzipped')
+    
+    def __init__(self, body):
+        self.body = body
+        self._gzipped = None
+    
+    def gzipped(self):
+        """Compressed body, built by the first scraper that asks for it"""
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=1)
+        return self._gzipped
+
+class _Handler(BaseHTTPRequestHandler):
+    """GET /metrics from the current buffer; nothing is computed per scrape"""
+    
+    protocol_version = 'HTTP/1.1'   # keep-alive for scrapers that reuse connections
+    # Headers and body are separate writes; with Nagle on, each keep-alive
+    # response waits ~40 ms for the client's delayed ACK
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self._send(404, b'not found\n', 'text/plain; charset=utf-8')
+            return
+        exporter = self.server.exporter
+        exporter.scrapes += 1
+        buffer = exporter.buffer
+        accept = self.headers.get('Accept', '')
+        content_type = OPENMETRICS_TYPE if 'openmetrics' in accept else PROMETHEUS_TYPE
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            self._send(200, buffer.gzipped(), content_type, encoding='gzip')
+        else:
+            self._send(200, buffer.body, content_type)
+    
+    def _send(self, status, body, content_type, encoding=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        """No per-request logging"""
+
+class MetricsExporter:
+    """HTTP endpoint serving the newest snapshot in OpenMetrics text format
+    
+    publish() serializes each snapshot once, on the thread that produced
+    it, into an immutable ScrapeBuffer; request threads only swap in the
+    current buffer reference and write it out. Scrapes therefore never
+    trigger collection, concurrent scrapers share one buffer, and the
+    server runs on its own threads, away from the GTK main loop.
+    """
+    
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        host / port: address to listen on (port 0 picks a free port)
+        """
+        self.buffer = ScrapeBuffer(b'# EOF\n')
+        self.scrapes = 0
+        self.published = 0
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.exporter = self
+        self._thread = None
+    
+    @property
+    def address(self):
+        """(host, port) actually bound"""
+        return self._server.server_address[:2]
+    
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name='exporter', daemon=True)
+        self._thread.start()
+    
+    def publish(self, snapshot):
+        """Serialize snapshot into the buffer served from now on"""
+        started = time.perf_counter() if Instrumentation.enabled else None
+        self.buffer = ScrapeBuffer(serialize(snapshot))
+        self.published += 1
+        if started is not None:
+            Instrumentation.record('export', time.perf_counter() - started)
+    
+    def close(self):
+        """Stop serving"""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+def parse_address(text):
+    """'PORT' or 'HOST:PORT' -> (host, port)"""
+    host, _, port = text.rpartition(':')
+    return host or DEFAULT_HOST, int(port)
@@ -0,0 +1,244 @@
+"""
+GPU Telemetry Backends
+Persistent NVIDIA GPU readers: NVML over ctypes, or a streaming nvidia-smi
+"""
+import ctypes
+import shutil
+import subprocess
+import threading
+import time
+
+# Stats reported for every GPU, in nvidia-smi query order after the index
+GPU_FIELDS = ('temp', 'power_draw', 'power_limit', 'mem_used', 'mem_total')
+SMI_QUERY = 'index,temperature.gpu,power.draw,power.limit,memory.used,memory.total'
+
+# nvidia-smi restarts: first delay, doubling up to the max; after
+# SMI_MAX_FAILURES exits in a row without output the backend gives up
+SMI_RESTART_DELAY = 1.0
+SMI_MAX_RESTART_DELAY = 60.0
+SMI_MAX_FAILURES = 5
+
+# Seconds open_backend() waits for nvidia-smi's first line
+SMI_READY_TIMEOUT = 5.0
+
+def empty_stats():
+    """Stats dict for a GPU with nothing known yet"""
+    return {field: None for field in GPU_FIELDS}
+
+class GPUBackend:
+    """Base class: a long-lived source of per-GPU stats"""
+    
+    name = 'none'
+    available = True    # False once a backend has given up for good
+    
+    def read(self):
+        """Get a list of stats dicts, one per GPU in index order"""
+        return []
+    
+    def close(self):
+        """Release the backend's resources"""
+
+class NVMLBackend(GPUBackend):
+    """Query NVML directly through libnvidia-ml, loaded once"""
+    
+    name = 'nvml'
+    
+    class _Memory(ctypes.Structure):
+        _fields_ = [('total', ctypes.c_ulonglong),
+                    ('free', ctypes.c_ulonglong),
+                    ('used', ctypes.c_ulonglong)]
+    
+    def __init__(self, library='libnvidia-ml.so.1'):
+        """Load and initialise NVML; raises OSError if unavailable"""
+        self.lib = ctypes.CDLL(library)
+        if self.lib.nvmlInit_v2() != 0:
+            raise OSError('nvmlInit failed')
+        
+        count = ctypes.c_uint()
+        if self.lib.nvmlDeviceGetCount_v2(ctypes.byref(count)) != 0:
+            self.lib.nvmlShutdown()
+            raise OSError('nvmlDeviceGetCount failed')
+        
+        self.handles = []
+        for index in range(count.value):
+            handle = ctypes.c_void_p()
+            if self.lib.nvmlDeviceGetHandleByIndex_v2(index, ctypes.byref(handle)) == 0:
+                self.handles.append(handle)
+    
+    def _read_device(self, handle):
+        """Read one GPU; fields the driver refuses stay None"""
+        stats = empty_stats()
+        value = ctypes.c_uint()
+        
+        # NVML_TEMPERATURE_GPU = 0
+        if self.lib.nvmlDeviceGetTemperature(handle, 0, ctypes.byref(value)) == 0:
+            stats['temp'] = value.value
+        # Power is reported in milliwatts
+        if self.lib.nvmlDeviceGetPowerUsage(handle, ctypes.byref(value)) == 0:
+            stats['power_draw'] = value.value / 1000
+        if self.lib.nvmlDeviceGetEnforcedPowerLimit(handle, ctypes.byref(value)) == 0:
+            stats['power_limit'] = value.value / 1000
+        # Memory is reported in bytes; keep MiB like nvidia-smi
+        memory = self._Memory()
+        if self.lib.nvmlDeviceGetMemoryInfo(handle, ctypes.byref(memory)) == 0:
+            stats['mem_used'] = memory.used // (1024**2)
+            stats['mem_total'] = memory.total // (1024**2)
+        return stats
+    
+    def read(self):
+        return [self._read_device(handle) for handle in self.handles]
+    
+    def close(self):
+        if self.handles is not None:
+            self.lib.nvmlShutdown()
+            self.handles = None
+
+class SMIStreamBackend(GPUBackend):
+    """Keep one `nvidia-smi --loop-ms` running and parse its CSV stream
+    
+    A reader thread consumes the output as it arrives, so read() never
+    waits on the subprocess; it returns the newest complete sample (one
+    line per GPU), so GPUs that vanish drop out. When nvidia-smi exits
+    it is restarted with exponential backoff, and after
+    SMI_MAX_FAILURES exits in a row without a single parsed line (no
+    driver, driver/library mismatch) the backend stops retrying and
+    reports itself unavailable.
+    """
+    
+    name = 'nvidia-smi'
+    
+    def __init__(self, command='nvidia-smi', loop_ms=1000):
+        """
+        command: nvidia-smi binary (or a fake stand-in for testing)
+        loop_ms: sampling period passed to --loop-ms
+        """
+        self.command = command
+        self.loop_ms = loop_ms
+        self.available = True
+        self.failures = 0       # exits in a row without output
+        self.restarts = 0
+        self._stats = {}        # index -> stats of the newest sample
+        self._lock = threading.Lock()
+        self._restart_lock = threading.Lock()   # both GPU collectors call read()
+        self._ready = threading.Event()
+        self._process = None
+        self._lines = 0         # lines parsed from the current process
+        self._restart_at = 0.0
+        self._start()
+    
+    def _start(self):
+        """Launch nvidia-smi and the thread reading its output"""
+        self._lines = 0
+        self._process = subprocess.Popen(
+            [self.command, f'--query-gpu={SMI_QUERY}',
+             '--format=csv,noheader,nounits', f'--loop-ms={self.loop_ms}'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            stdin=subprocess.DEVNULL, text=True, bufsize=1)
+        threading.Thread(target=self._reader, args=(self._process,),
+                         name='nvidia-smi-reader', daemon=True).start()
+    
+    def _reader(self, process):
+        """Reader thread: parse lines until the process exits"""
+        complete = {}       # the last full sample
+        sample = {}         # lines of the sample being read
+        for line in process.stdout:
+            parsed = self.parse_line(line)
+            if parsed is None:
+                continue
+            index, stats = parsed
+            if index in sample:
+                # GPU indexes start over: the previous sample is complete
+                complete, sample = sample, {}
+            sample[index] = stats
+            with self._lock:
+                if process is self._process:
+                    self._stats = dict(complete)
+                    self._stats.update(sample)
+                    self._lines += 1
+            self._ready.set()
+        self._ready.set()
+    
+    def wait_ready(self, timeout=SMI_READY_TIMEOUT):
+        """Wait for the first parsed line; False if nvidia-smi exited or timed out"""
+        self._ready.wait(timeout)
+        with self._lock:
+            return self._lines > 0
+    
+    @staticmethod
+    def _parse_value(text, kind):
+        """Parse one CSV cell; '[N/A]' and '[Not Supported]' become None"""
+        try:
+            return kind(text.strip())
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def parse_line(line):
+        """Parse one CSV line into (index, stats), or None if malformed"""
+        parts = line.split(',')
+        if len(parts) != len(GPU_FIELDS) + 1:
+            return None
+        index = SMIStreamBackend._parse_value(parts[0], int)
+        if index is None:
+            return None
+        kinds = (int, float, float, int, int)
+        stats = {field: SMIStreamBackend._parse_value(text, kind)
+                 for field, text, kind in zip(GPU_FIELDS, parts[1:], kinds)}
+        return index, stats
+    
+    def _restart(self):
+        """nvidia-smi exited: restart it, backing off while it fails"""
+        now = time.monotonic()
+        if self._restart_at == 0.0:
+            with self._lock:
+                produced = self._lines > 0
+                self._stats = {}
+            # Output before exiting (e.g. a driver reload): retry at once
+            self.failures = 0 if produced else self.failures + 1
+            if self.failures >= SMI_MAX_FAILURES:
+                self.available = False
+                return
+            delay = 0.0 if produced else min(
+                SMI_MAX_RESTART_DELAY, SMI_RESTART_DELAY * 2 ** (self.failures - 1))
+            self._restart_at = now + delay
+        if now >= self._restart_at:
+            self._restart_at = 0.0
+            self.restarts += 1
+            try:
+                self._start()
+            except OSError:
+                self.available = False
+    
+    def read(self):
+        if self.available and self._process.poll() is not None:
+            with self._restart_lock:
+                if self.available and self._process.poll() is not None:
+                    self._restart()
+        with self._lock:
+            return [self._stats[index] for index in sorted(self._stats)]
+    
+    def close(self):
+        self.available = False
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+
+def open_backend(command='nvidia-smi', loop_ms=1000):
+    """Open the best available GPU backend: NVML, then nvidia-smi, then none"""
+    try:
+        return NVMLBackend()
+    except (OSError, AttributeError):
+        pass
+    if shutil.which(command):
+        try:
+            backend = SMIStreamBackend(command, loop_ms)
+        except OSError:
+            return GPUBackend()
+        # Installed is not enough: the driver has to answer at least once
+        if backend.wait_ready():
+            return backend
+        backend.close()
+    return GPUBackend()
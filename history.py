@@ -0,0 +1,103 @@
+"""
+History Ring Buffer
+Preallocated cores × samples history shared by all CPU graphs
+"""
+import math
+from array import array
+
+# Seconds per column of the live CPU views (the cpu_percents interval)
+SLOT_SECONDS = 0.5
+
+class HistoryRing:
+    """Fixed-size 2D ring buffer of float samples with one write cursor
+    
+    All rows advance together: push() writes one column (one value per
+    row) and moves the shared cursor. Each row is stored twice back to
+    back, so the window from oldest to newest sample is always one
+    contiguous slice and row() can hand out a zero-copy memoryview.
+    Nothing is allocated after construction.
+    
+    With a slot length, push_at() maps samples onto fixed wall-clock
+    columns instead, so the time per column stays the same whether the
+    sampler is bursting, idle or back to normal.
+    """
+    
+    def __init__(self, rows, capacity=50, fill=0.0, slot=None):
+        """
+        rows: number of series (e.g. CPU threads)
+        capacity: samples kept per series
+        fill: initial value of every sample
+        slot: seconds per column for push_at()
+        """
+        self.rows = rows
+        self.capacity = capacity
+        self.slot = slot
+        self.cursor = 0     # column the next push writes
+        self.count = 0      # total pushes so far
+        self.revision = 0   # bumped by every write, including push_at() amending a column
+        self._slot = None           # slot number of the newest column
+        self._slot_samples = 0      # samples averaged into it
+        self._stride = capacity * 2
+        self._data = array('f', [fill]) * (rows * self._stride)
+        self._view = memoryview(self._data)
+    
+    def push(self, values):
+        """Append one sample per row; rows without a value get 0"""
+        data = self._data
+        cursor = self.cursor
+        mirror = cursor + self.capacity
+        stride = self._stride
+        count = min(len(values), self.rows)
+        for row in range(count):
+            base = row * stride
+            data[base + cursor] = data[base + mirror] = values[row]
+        for row in range(count, self.rows):
+            base = row * stride
+            data[base + cursor] = data[base + mirror] = 0.0
+        self.cursor = (cursor + 1) % self.capacity
+        self.count += 1
+        self.revision += 1
+    
+    def push_at(self, timestamp, values):
+        """Add a sample taken at timestamp (seconds) to its slot's column
+        
+        Samples landing in the newest column are averaged into it; a
+        sample after a gap fills the skipped columns with its value, and
+        one older than the newest column is dropped. Returns how many
+        columns were added (0 when the newest one was amended).
+        """
+        slot = math.floor(timestamp / self.slot)
+        if self._slot is not None and slot <= self._slot:
+            if slot < self._slot:
+                return 0
+            self._slot_samples += 1
+            self._amend(values, 1.0 / self._slot_samples)
+            return 0
+        added = 1 if self._slot is None else min(slot - self._slot, self.capacity)
+        for _ in range(added):
+            self.push(values)
+        self._slot = slot
+        self._slot_samples = 1
+        return added
+    
+    def _amend(self, values, weight):
+        """Move the newest column towards values by weight (running mean)"""
+        data = self._data
+        newest = (self.cursor - 1) % self.capacity
+        mirror = newest + self.capacity
+        stride = self._stride
+        for row in range(self.rows):
+            base = row * stride
+            value = values[row] if row < len(values) else 0.0
+            data[base + newest] = data[base + mirror] = (
+                data[base + newest] + weight * (value - data[base + newest]))
+        self.revision += 1
+    
+    def row(self, row):
+        """Zero-copy view of one series, oldest sample first"""
+        start = row * self._stride + self.cursor
+        return self._view[start:start + self.capacity]
+    
+    def latest(self, row):
+        """Newest sample of one series"""
+        return self._data[row * self._stride + (self.cursor - 1) % self.capacity]
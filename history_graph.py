@@ -0,0 +1,86 @@
+"""
+History Graph Widget
+Zoomable long-range graph of one or more downsampled series
+"""
+import time
+
+from downsample import ZoomSeries
+
+ORANGE = (1.0, 0.64, 0.0)
+BLUE = (0.35, 0.65, 1.0)
+
+def render_history(cr, width, height, series, span, scale, end):
+    """
+    Draw background, then each series' min/max band and LTTB line
+    series: (ZoomLevel.runs(end), rgb) pairs
+    span: seconds across the width, ending at wall-clock time end
+    scale: value at the top edge
+    """
+    cr.set_source_rgba(0, 0, 0, 0.3)
+    cr.rectangle(0, 0, width, height)
+    cr.fill()
+    if scale <= 0:
+        return
+    
+    x_scale = width / span
+    start = end - span
+    y_scale = height / scale
+    
+    cr.set_line_width(1.0)
+    for runs, (r, g, b) in series:
+        for run in runs:
+            # Band between each column's min and max (spikes stay visible)
+            cr.set_source_rgba(r, g, b, 0.25)
+            cr.move_to((run[0][0] - start) * x_scale, height - run[0][2] * y_scale)
+            for centre, _, high, _, _ in run[1:]:
+                cr.line_to((centre - start) * x_scale, height - high * y_scale)
+            for centre, low, _, _, _ in reversed(run):
+                cr.line_to((centre - start) * x_scale, height - low * y_scale)
+            cr.close_path()
+            cr.fill()
+            
+            cr.set_source_rgb(r, g, b)
+            t, value = run[0][3], run[0][4]
+            cr.move_to((t - start) * x_scale, height - value * y_scale)
+            for _, _, _, t, value in run[1:]:
+                cr.line_to((t - start) * x_scale, height - value * y_scale)
+            cr.stroke()
+
+class HistoryGraph:
+    """Graph of one or more metrics at a selectable zoom level
+    
+    Series are ZoomSeries, so a draw costs one walk over the columns of
+    the current zoom level, whatever the history length. With no fixed
+    scale, the top edge follows the largest value in view.
+    """
+    
+    def __init__(self, names, colors=(ORANGE, BLUE), scale=None, columns=160):
+        """
+        names: flattened metric names (e.g. 'disk_io.read_bytes')
+        colors: rgb per series
+        scale: fixed value at the top edge (None: autoscale)
+        columns: initial width in pixels
+        """
+        self.series = [ZoomSeries(name, columns) for name in names]
+        self.colors = colors
+        self.scale = scale
+        self.zoom = 0   # index into downsample.ZOOM_SPANS
+    
+    def add(self, t, values):
+        """Add one sample per series at wall-clock time t"""
+        for series, value in zip(self.series, values):
+            series.add(t, value)
+    
+    def draw(self, widget, cr):
+        """Draw the graph on Cairo context"""
+        width = widget.get_allocated_width()
+        height = widget.get_allocated_height()
+        end = time.time()
+        levels = [series.level(self.zoom, max(1, width)) for series in self.series]
+        runs = [level.runs(end) for level in levels]
+        scale = self.scale
+        if scale is None:
+            scale = max((column[2] for series_runs in runs for run in series_runs
+                         for column in run), default=0.0) * 1.1 or 1.0
+        render_history(cr, width, height, list(zip(runs, self.colors)),
+                       levels[0].span, scale, end)
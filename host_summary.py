@@ -0,0 +1,101 @@
+"""
+Host Summary Section Component
+One compact line per aggregated host: CPU, memory, temperatures and I/O
+"""
+import time
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, Pango
+
+from view_model import ViewModel
+
+# Opacity for hosts that stopped reporting
+STALE_OPACITY = 0.5
+
+def _rate(bytes_per_second):
+    """Compact throughput, e.g. 512K, 1.2G (per second)"""
+    value = bytes_per_second / 1024
+    for unit in ('K', 'M', 'G'):
+        if value < 1000 or unit == 'G':
+            return f"{value:.1f}{unit}" if value < 10 else f"{value:.0f}{unit}"
+        value /= 1024
+
+def _cell(value, width, formatter=lambda v: f"{v:.0f}"):
+    """Right-aligned column, '-' when the agent did not report it"""
+    return f"{'-' if value is None else formatter(value):>{width}}"
+
+class HostSummary:
+    """Per-host table fed by an Aggregator
+    
+    Rows are added as hosts appear and are never removed, so a host that
+    drops off stays visible (dimmed) where it was. Each row is one label
+    behind a ViewModel, so a refresh only touches hosts whose line changed.
+    """
+    
+    def __init__(self, name_width=16):
+        """
+        name_width: characters of the host name shown
+        """
+        self.name_width = name_width
+        self.widget = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
+        self.widget.set_margin_start(10)
+        self.widget.set_margin_end(10)
+        self.widget.set_margin_top(10)
+        self.widget.set_margin_bottom(10)
+        
+        self._font = Pango.AttrList()
+        self._font.insert(Pango.attr_font_desc_new(
+            Pango.FontDescription.from_string("Ubuntu Mono 9")))
+        
+        self.view_model = ViewModel()
+        self._rows = 0
+        self.title = self._add_label()
+        self._add_label(f"{'HOST':<{name_width}} {'CPUS':>4} {'CPU%':>5} {'MAX%':>5} "
+                        f"{'MEM%':>5} {'CPU°':>5} {'GPU°':>5} {'DISK':>6} {'NET':>6}")
+    
+    def _add_label(self, text=""):
+        """Add one left-aligned monospace line"""
+        label = Gtk.Label(label=text)
+        label.set_attributes(self._font)
+        label.set_line_wrap(False)
+        label.set_selectable(False)
+        label.set_halign(Gtk.Align.START)
+        self.widget.pack_start(label, False, False, 0)
+        return label
+    
+    def _add_row(self):
+        """Bind one more host line"""
+        label = self._add_label()
+        label.show()
+        self.view_model.bind(
+            self._rows, label.set_text, self._format_row,
+            lambda stale, label=label: label.set_opacity(STALE_OPACITY if stale else 1.0))
+        self._rows += 1
+    
+    def _format_row(self, raw):
+        """(name, cpus, summary) -> table row"""
+        name, cpus, summary = raw
+        line = f"{name[:self.name_width]:<{self.name_width}} {_cell(cpus, 4)}"
+        if summary is None:
+            return line + "  waiting for first frame"
+        avg, busiest, mem, cpu_temp, gpu_temp, disk, net = summary
+        return (f"{line} {_cell(avg, 5)} {_cell(busiest, 5)} {_cell(mem, 5)} "
+                f"{_cell(cpu_temp, 5)} {_cell(gpu_temp, 5)} "
+                f"{_cell(disk, 6, _rate)} {_cell(net, 6, _rate)}")
+    
+    def update(self, hosts):
+        """Show the aggregator's hosts (HostState list, sorted)"""
+        now = time.monotonic()
+        while self._rows < len(hosts):
+            self._add_row()
+        
+        vm = self.view_model
+        vm.begin_tick()
+        live = 0
+        for row, host in enumerate(hosts):
+            stale = host.is_stale(now)
+            live += not stale
+            vm.set(row, (host.name, host.cpus, host.summary), stale)
+        vm.end_tick()
+        self.title.set_text(f"Hosts: {live} reporting / {len(hosts)}")
@@ -0,0 +1,131 @@
+"""
+Hwmon Temperature Reader
+Reads per-core CPU temperatures straight from /sys/class/hwmon
+"""
+import os
+import re
+
+# hwmon drivers that expose CPU temperatures
+CPU_DRIVERS = ('coretemp', 'k10temp', 'zenpower')
+
+# 'Core 3' (Intel coretemp) -> core 3
+CORE_LABEL = re.compile(r'Core\s*(\d+)$')
+# 'Package id 0' (Intel), 'Tctl'/'Tdie' (AMD) -> package temperature
+PACKAGE_LABEL = re.compile(r'(Package id (\d+)|Tctl|Tdie)$')
+
+class HwmonReader:
+    """Per-core temperature reader over kept-open hwmon input files
+    
+    Devices are discovered once; every read() is then a single pread()
+    per sensor, with no fork and no text parsing beyond an integer.
+    coretemp numbers cores per package and registers one device per
+    package, so cores are keyed by (package id, core id), the package
+    taken from the device's 'Package id N' sensor.
+    """
+    
+    def __init__(self, root='/sys/class/hwmon'):
+        """
+        root: hwmon class directory (point at a fake tree for testing)
+        """
+        self.root = root
+        self.core_fds = {}      # (package id, core id) -> fd of temp*_input
+        self.package_fds = []   # 'Package id N'/Tctl/Tdie inputs, for the package temperature
+        self._discover()
+    
+    @property
+    def available(self):
+        """Whether any per-core temperature sensor was found
+        
+        A package-only device (AMD Tctl without per-CCD sensors) has no
+        per-core readings, so it does not count.
+        """
+        return bool(self.core_fds)
+    
+    def _discover(self):
+        """Find CPU hwmon devices and open their temperature inputs"""
+        try:
+            devices = sorted(os.listdir(self.root))
+        except OSError:
+            return
+        
+        for index, device in enumerate(d for d in devices if self._is_cpu_device(d)):
+            path = os.path.join(self.root, device)
+            try:
+                entries = os.listdir(path)
+            except OSError:
+                continue
+            sensors = []
+            package = index     # devices without a 'Package id' label, in order
+            for entry in sorted(entries):
+                if not (entry.startswith('temp') and entry.endswith('_input')):
+                    continue
+                sensor = entry[:-len('_input')]
+                label = self._read_text(os.path.join(path, sensor + '_label')) or ''
+                match = PACKAGE_LABEL.match(label)
+                if match is not None and match.group(2) is not None:
+                    package = int(match.group(2))
+                sensors.append((entry, CORE_LABEL.match(label), match))
+            
+            for entry, core, package_match in sensors:
+                if core is None and package_match is None:
+                    continue
+                try:
+                    fd = os.open(os.path.join(path, entry), os.O_RDONLY)
+                except OSError:
+                    continue
+                if core is None:
+                    self.package_fds.append(fd)
+                    continue
+                key = (package, int(core.group(1)))
+                previous = self.core_fds.get(key)
+                if previous is not None:
+                    os.close(previous)
+                self.core_fds[key] = fd
+    
+    def _is_cpu_device(self, device):
+        """Whether a hwmon device is a CPU temperature driver"""
+        return self._read_text(os.path.join(self.root, device, 'name')) in CPU_DRIVERS
+    
+    @staticmethod
+    def _read_text(path):
+        """Read a small sysfs attribute, or None if it is missing"""
+        try:
+            with open(path, 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _read_temp(fd):
+        """Re-read a temp*_input file from the start (millidegrees -> °C)"""
+        return int(os.pread(fd, 32, 0)) / 1000
+    
+    def read(self):
+        """Get {package_id: {core_id: temp}} for every core sensor"""
+        temps = {}
+        for (package_id, core_id), fd in self.core_fds.items():
+            try:
+                temps.setdefault(package_id, {})[core_id] = self._read_temp(fd)
+            except (OSError, ValueError):
+                pass
+        return temps
+    
+    def read_package(self):
+        """Get the hottest package temperature, or None"""
+        temps = []
+        for fd in self.package_fds:
+            try:
+                temps.append(self._read_temp(fd))
+            except (OSError, ValueError):
+                pass
+        return max(temps) if temps else None
+    
+    def close(self):
+        """Close all kept-open sensor files"""
+        for fd in list(self.core_fds.values()) + self.package_fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.core_fds = {}
+        self.package_fds = []
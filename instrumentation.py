@@ -0,0 +1,195 @@
+"""
+Self-Instrumentation
+Record what the monitor itself costs: collector latency, errors, frame times
+"""
+import os
+import sys
+import threading
+import time
+
+# Histogram buckets are powers of two in microseconds: bucket n holds
+# durations below 2**n us, the last one (~36 min) everything longer
+BUCKETS = 32
+
+class LatencyHistogram:
+    """Log2 latency histogram with exact count, total and max"""
+    
+    __slots__ = ('counts', 'count', 'total', 'max')
+    
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def record(self, seconds):
+        """Add one duration"""
+        bucket = min(BUCKETS - 1, int(seconds * 1e6).bit_length())
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+    
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+    
+    def percentile(self, fraction):
+        """Upper bound (seconds) of the bucket holding the given fraction"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.max, (1 << bucket) / 1e6)
+        return self.max
+
+class ErrorCount:
+    """Occurrences of failures from one source and the latest message"""
+    
+    __slots__ = ('count', 'last', 'when')
+    
+    def __init__(self):
+        self.count = 0
+        self.last = None
+        self.when = None
+
+class Instrumentation:
+    """Process-wide instrumentation registry
+    
+    Errors and timeouts are always counted (they are rare). Timing is
+    only recorded while enabled; hot paths check the single `enabled`
+    attribute, and draw timing is only hooked up when it is on, so a
+    disabled monitor pays one attribute lookup per collector run.
+    """
+    
+    enabled = False
+    collectors = {}     # collector key -> LatencyHistogram
+    timings = {}        # 'update', 'draw:<widget>' -> LatencyHistogram
+    errors = {}         # source -> ErrorCount
+    timeouts = {}       # collector key -> count
+    milestones = {}     # startup milestone -> monotonic time it was first reached
+    _lock = threading.Lock()
+    # (monotonic, user + system CPU seconds) at the previous process_stats()
+    _cpu_sample = (time.monotonic(), os.times().user + os.times().system)
+    
+    @staticmethod
+    def enable(enabled=True):
+        """Turn timing collection on or off"""
+        Instrumentation.enabled = enabled
+    
+    @staticmethod
+    def _histogram(table, name):
+        histogram = table.get(name)
+        if histogram is None:
+            with Instrumentation._lock:
+                histogram = table.setdefault(name, LatencyHistogram())
+        return histogram
+    
+    @staticmethod
+    def record_collector(key, seconds):
+        """Latency of one collector run"""
+        Instrumentation._histogram(Instrumentation.collectors, key).record(seconds)
+    
+    @staticmethod
+    def record(name, seconds):
+        """Duration of a UI step (e.g. 'update', 'draw:cpu')"""
+        Instrumentation._histogram(Instrumentation.timings, name).record(seconds)
+    
+    @staticmethod
+    def report_error(source, error):
+        """Count a failure a collector recovered from"""
+        with Instrumentation._lock:
+            entry = Instrumentation.errors.get(source)
+            if entry is None:
+                entry = Instrumentation.errors[source] = ErrorCount()
+            entry.count += 1
+            entry.last = f"{type(error).__name__}: {error}"
+            entry.when = time.time()
+    
+    @staticmethod
+    def report_timeout(key):
+        """Count a collector run that overran its timeout"""
+        with Instrumentation._lock:
+            Instrumentation.timeouts[key] = Instrumentation.timeouts.get(key, 0) + 1
+    
+    @staticmethod
+    def milestone(name):
+        """Note that startup reached name (e.g. 'first_paint'); later calls are ignored"""
+        if name not in Instrumentation.milestones:
+            Instrumentation.milestones[name] = time.monotonic()
+    
+    @staticmethod
+    def time_draws(widget, name):
+        """Record how long widget (and its children) take to draw"""
+        if not Instrumentation.enabled:
+            return
+        started = []
+        
+        def before(*_):
+            started.append(time.perf_counter())
+        
+        def after(*_):
+            if started:
+                Instrumentation.record(f'draw:{name}', time.perf_counter() - started.pop())
+        
+        widget.connect('draw', before)
+        widget.connect_after('draw', after)
+    
+    @staticmethod
+    def process_stats():
+        """Own CPU% since the previous call and resident memory in bytes"""
+        now = time.monotonic()
+        times = os.times()
+        cpu = times.user + times.system
+        previous = Instrumentation._cpu_sample
+        Instrumentation._cpu_sample = (now, cpu)
+        percent = None
+        if now > previous[0]:
+            percent = (cpu - previous[1]) / (now - previous[0]) * 100
+        rss = None
+        try:
+            with open('/proc/self/statm', 'r') as f:
+                rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, IndexError):
+            pass
+        return percent, rss
+    
+    @staticmethod
+    def report():
+        """Plain-text summary of everything recorded"""
+        percent, rss = Instrumentation.process_stats()
+        lines = [f"monitor: cpu {percent:.1f}%" if percent is not None else "monitor: cpu -",
+                 f"         rss {rss / 1024**2:.1f} MiB" if rss is not None else "         rss -"]
+        
+        def rows(title, table):
+            if not table:
+                return
+            lines.append(f"{title:<24} {'n':>7} {'mean':>9} {'p50':>9} {'p95':>9} {'max':>9}")
+            for name, h in sorted(table.items()):
+                lines.append(f"{name:<24} {h.count:>7} " + ' '.join(
+                    f"{value * 1000:>7.2f}ms" for value in
+                    (h.mean, h.percentile(0.5), h.percentile(0.95), h.max)))
+        
+        start = Instrumentation.milestones.get('start')
+        if start is not None:
+            for name, when in sorted(Instrumentation.milestones.items(), key=lambda m: m[1]):
+                if name != 'start':
+                    lines.append(f"startup  {name}: +{(when - start) * 1000:.1f}ms")
+        rows('collector', Instrumentation.collectors)
+        rows('ui', Instrumentation.timings)
+        for key, count in sorted(Instrumentation.timeouts.items()):
+            lines.append(f"timeout  {key}: {count}")
+        for source, entry in sorted(Instrumentation.errors.items()):
+            lines.append(f"error    {source}: {entry.count} (last: {entry.last})")
+        return '\n'.join(lines)
+    
+    @staticmethod
+    def dump(stream=None):
+        """Write report() to stream (stderr by default)"""
+        stream = stream or sys.stderr
+        stream.write(Instrumentation.report() + '\n')
+        stream.flush()
@@ -0,0 +1,40 @@
+"""
+Instrumentation Section Component
+Optional overlay showing the monitor's own cost
+"""
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, Pango
+
+from instrumentation import Instrumentation
+from view_model import ViewModel
+
+class InstrumentationView:
+    """Own CPU%/RSS, collector latency, frame times, timeouts and errors"""
+    
+    def __init__(self):
+        self.label = Gtk.Label()
+        self.label.set_halign(Gtk.Align.START)
+        self.label.set_margin_start(10)
+        self.label.set_margin_bottom(10)
+        self.label.set_selectable(False)
+        
+        attrs = Pango.AttrList()
+        attrs.insert(Pango.attr_font_desc_new(
+            Pango.FontDescription.from_string("Ubuntu Mono 8")))
+        self.label.set_attributes(attrs)
+        
+        self.view_model = ViewModel()
+        self.view_model.bind('report', self.label.set_text)
+    
+    def refresh(self):
+        """Timer: re-render the report"""
+        self.view_model.begin_tick()
+        self.view_model.set('report', Instrumentation.report())
+        self.view_model.end_tick()
+        return True
+    
+    @property
+    def widget(self):
+        """Get the GTK widget"""
+        return self.label
@@ -7,96 +7,334 @@ Installation:
     sudo apt install python3-gi gir1.2-gtk-3.0 python3-psutil
 
 Usage:
-    /usr/bin/python3 main.py
+    /usr/bin/python3 main.py [--view auto|grid|heatmap] [--update-stats] [--fixed-rate]
+    /usr/bin/python3 main.py --headless [--feed PATH] [--history-dir PATH]
+    /usr/bin/python3 main.py --attach [--feed PATH]
+    /usr/bin/python3 main.py --dump [--feed PATH]
+    /usr/bin/python3 main.py --replay FILE [--speed 1|10|max]
+    /usr/bin/python3 main.py [--headless] --startup-report
+    /usr/bin/python3 main.py [--headless] --exporter [HOST:]PORT
+    /usr/bin/python3 main.py --agent HOST[:PORT] [--name NAME] [--token-file FILE]
+    /usr/bin/python3 main.py --aggregate [[HOST:]PORT] [--token-file FILE]
 """
+import argparse
+import json
+import signal
 import sys
+import threading
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-import gi
-gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk, Gdk, GLib
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Conky-style system monitor")
+    parser.add_argument('--view', choices=('auto', 'grid', 'heatmap'), default='auto',
+                        help="CPU section: per-thread graph grid or single-surface heatmap")
+    parser.add_argument('--update-stats', action='store_true',
+                        help="show widget updates pushed/skipped per refresh")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--headless', action='store_true',
+                      help="run the collectors without a window and publish to the feed")
+    mode.add_argument('--attach', action='store_true',
+                      help="show the feed of a headless collector instead of sampling")
+    mode.add_argument('--dump', action='store_true',
+                      help="print the feed's newest snapshot as JSON and exit")
+    mode.add_argument('--replay', metavar='FILE',
+                      help="show a recording made with --record instead of sampling")
+    mode.add_argument('--agent', metavar='HOST[:PORT]',
+                      help="run the collectors without a window and stream to an aggregator")
+    parser.add_argument('--name', help="host name an agent reports (default: hostname)")
+    parser.add_argument('--aggregate', metavar='[HOST:]PORT', nargs='?', const='',
+                        help="accept agents and list their hosts beside the local sections "
+                             "(default 127.0.0.1:9180)")
+    parser.add_argument('--token-file', metavar='FILE',
+                        help="shared secret (first line of FILE) agents send and the "
+                             "aggregator requires")
+    parser.add_argument('--feed', metavar='PATH',
+                        help="shared-memory feed file (default: /dev/shm/system-monitor-UID.feed)")
+    parser.add_argument('--no-history', action='store_true',
+                        help="do not record to or load from the time-series store")
+    parser.add_argument('--history-dir', metavar='PATH',
+                        help="time-series store (default: ~/.local/share/gtk-system-monitor/tsdb)")
+    parser.add_argument('--record', metavar='FILE',
+                        help="record every snapshot to FILE (compact binary log)")
+    parser.add_argument('--instrument', action='store_true',
+                        help="measure the monitor's own cost and show it in an overlay")
+    parser.add_argument('--instrument-dump', action='store_true',
+                        help="print the instrumentation report on exit "
+                             "(SIGUSR1 prints it any time)")
+    parser.add_argument('--speed', type=parse_speed, default=1.0,
+                        help="replay speed factor, or 'max' for as fast as possible")
+    parser.add_argument('--fixed-rate', action='store_true',
+                        help="always sample at the declared intervals (no back-off or bursts)")
+    parser.add_argument('--exporter', metavar='[HOST:]PORT',
+                        help="serve metrics in OpenMetrics format at http://HOST:PORT/metrics "
+                             "(host defaults to 127.0.0.1)")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="print startup milestones and exit once every collector reported")
+    args = parser.parse_args()
+    if args.record and (args.attach or args.dump or args.replay):
+        parser.error("--record needs live sampling (window or --headless)")
+    if args.startup_report and (args.attach or args.dump):
+        parser.error("--startup-report needs a window or --headless")
+    if args.exporter and (args.attach or args.dump):
+        parser.error("--exporter needs live sampling or --replay (run it in the --headless daemon)")
+    if args.aggregate is not None and (args.headless or args.dump or args.agent):
+        parser.error("--aggregate needs a window")
+    if args.agent and (args.record or args.startup_report):
+        parser.error("--agent cannot be combined with --record or --startup-report")
+    if args.name and not args.agent:
+        parser.error("--name is only used with --agent")
+    if args.token_file and not (args.agent or args.aggregate is not None):
+        parser.error("--token-file is only used with --agent or --aggregate")
+    return args
 
-from system_data import SystemData
-from cpu_grid import CPUGrid
-from system_info import SystemInfo
+def read_token(path):
+    """First line of a token file; None (and a message) on failure"""
+    try:
+        with open(path) as f:
+            token = f.readline().strip()
+    except OSError as e:
+        print(f"cannot read token: {e}", file=sys.stderr)
+        return None
+    if not token:
+        print(f"{path} holds no token", file=sys.stderr)
+        return None
+    return token
 
-class SystemMonitor(Gtk.Window):
-    """Main monitoring window"""
+def parse_speed(text):
+    """'max' -> None (no pacing), otherwise a positive factor"""
+    if text == 'max':
+        return None
+    speed = float(text)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+def print_milestones(stream=None):
+    """Write 'startup <milestone> <monotonic seconds>' lines, in order reached"""
+    from instrumentation import Instrumentation
+    stream = stream or sys.stderr
+    for name, when in sorted(Instrumentation.milestones.items(), key=lambda m: m[1]):
+        stream.write(f"startup {name} {when:.6f}\n")
+    stream.flush()
+
+def open_exporter(address):
+    """Start the metrics endpoint for '[HOST:]PORT'; None (and a message) on failure"""
+    from exporter import MetricsExporter, parse_address
+    try:
+        exporter = MetricsExporter(*parse_address(address))
+    except (OSError, ValueError) as e:
+        print(f"cannot serve metrics on {address}: {e}", file=sys.stderr)
+        return None
+    exporter.start()
+    host, port = exporter.address
+    print(f"serving metrics at http://{host}:{port}/metrics", file=sys.stderr)
+    return exporter
+
+def run_headless(feed_path, history_dir=None, history=True, record=None,
+                 instrument=False, adaptive=True, startup_report=False, exporter=None):
+    """Collect in the background, publish every snapshot to the feed and record it"""
+    from system_data import SystemData
+    from sampler import Sampler
+    from sampling_policy import SamplingPolicy
+    from shm_feed import FeedWriter
+    from tsdb import TimeSeriesStore
+    from snapshot_codec import SnapshotRecorder
+    from instrumentation import Instrumentation
+    
+    try:
+        writer = FeedWriter(feed_path)
+    except (RuntimeError, OSError) as e:
+        print(f"cannot publish feed: {e}", file=sys.stderr)
+        return 1
+    store = TimeSeriesStore(history_dir) if history else None
+    recorder = SnapshotRecorder(record) if record else None
+    
+    def on_snapshot(snapshot):
+        writer.publish(snapshot)
+        if exporter is not None:
+            exporter.publish(snapshot)
+        if store is not None:
+            store.write(snapshot)
+        if recorder is not None:
+            recorder.write(snapshot)
+        if len(snapshot):
+            Instrumentation.milestone('first_snapshot')
+            if snapshot.warm:
+                Instrumentation.milestone('full_snapshot')
+                if startup_report:
+                    done.set()
+    
+    # No window to hide: the policy only backs off when idle and bursts on spikes
+    policy = SamplingPolicy() if adaptive else None
+    sampler = Sampler(SystemData.collectors(), on_snapshot=on_snapshot, policy=policy)
+    done = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: done.set())
+    signal.signal(signal.SIGINT, lambda *_: done.set())
+    # SIGHUP re-probes hardware sources after GPU/NIC hotplug
+    signal.signal(signal.SIGHUP, lambda *_: SystemData.reprobe())
+    # SIGUSR1 dumps the instrumentation report to stderr
+    signal.signal(signal.SIGUSR1, lambda *_: Instrumentation.dump())
+    Instrumentation.enable(instrument)
+    
+    print(f"publishing to {writer.path}", file=sys.stderr)
+    sampler.start()
+    try:
+        while not done.wait(1.0):
+            pass
+    finally:
+        sampler.stop()
+        SystemData.shutdown()
+        writer.close()
+        if exporter is not None:
+            exporter.close()
+        if store is not None:
+            store.close()
+        if recorder is not None:
+            recorder.close()
+        if instrument:
+            Instrumentation.dump()
+        if startup_report:
+            print_milestones()
+    return 0
+
+def run_agent(address, name=None, adaptive=True, exporter=None, token=None):
+    """Collect in the background and stream every snapshot to an aggregator"""
+    from system_data import SystemData
+    from sampler import Sampler
+    from sampling_policy import SamplingPolicy
+    from agent import AgentClient, EXCLUDED_KEYS, parse_address
     
-    def __init__(self):
-        super().__init__(title="System Monitor")
-        self.set_default_size(400, 800)
-        self._setup_transparency()
-        
-        # Main container
-        self.main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
-        
-        # Initialize sections
-        self.cpu_grid = CPUGrid()
-        self.metrics = SystemInfo()  # Tree-style metrics
-        
-        # Pack into UI
-        self.main_box.pack_start(self.cpu_grid.widget, False, False, 0)
-        self.main_box.pack_start(self.metrics.widget, False, False, 0)
-        
-        self.add(self.main_box)
-        self.apply_css()
-        
-        # Start update loop
-        GLib.timeout_add_seconds(1, self._update)
+    host, port = parse_address(address)
+    if not host:
+        print(f"--agent needs the aggregator's host, e.g. buildbox:{port}", file=sys.stderr)
+        return 1
+    client = AgentClient(host, port, name, token=token)
     
-    def _setup_transparency(self):
-        """Enable window transparency"""
-        screen = self.get_screen()
-        visual = screen.get_rgba_visual()
-        if visual and screen.is_composited():
-            self.set_visual(visual)
-        self.set_app_paintable(True)
+    def on_snapshot(snapshot):
+        client.publish(snapshot)
+        if exporter is not None:
+            exporter.publish(snapshot)
     
-    def _update(self):
-        """Collect data and update all sections"""
-        data = SystemData.get_all()
-        
-        self.cpu_grid.update(data)
-        self.metrics.update(data)
-        
-        return True
+    collectors = [c for c in SystemData.collectors() if c.key not in EXCLUDED_KEYS]
+    policy = SamplingPolicy() if adaptive else None
+    sampler = Sampler(collectors, on_snapshot=on_snapshot, policy=policy)
+    done = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: done.set())
+    signal.signal(signal.SIGINT, lambda *_: done.set())
+    signal.signal(signal.SIGHUP, lambda *_: SystemData.reprobe())
     
-    def apply_css(self):
-        """Apply global styling"""
-        css_provider = Gtk.CssProvider()
-        css = b"""
-        window {
-            background-color: rgba(0, 0, 0, 0.7);
-        }
-        frame {
-            border: .5px solid #FFFFFF;
-            background-color: transparent;
-        }
-        box {
-            background-color: transparent;
-        }
-        label {
-            color: white;
-            font-family: monospace;
-            font-size: 12px;
-        }
-        """
-        css_provider.load_from_data(css)
-        Gtk.StyleContext.add_provider_for_screen(
-            Gdk.Screen.get_default(),
-            css_provider,
-            Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
-        )
+    print(f"streaming {client.name} to {host}:{port}", file=sys.stderr)
+    client.start()
+    sampler.start()
+    try:
+        while not done.wait(1.0):
+            pass
+    finally:
+        sampler.stop()
+        client.close()
+        SystemData.shutdown()
+        if exporter is not None:
+            exporter.close()
+    return 0
+
+def open_aggregator(address, token=None):
+    """Start accepting agents on '[HOST:]PORT'; None (and a message) on failure"""
+    import ipaddress
+    from aggregator import Aggregator
+    from agent import parse_address
+    try:
+        aggregator = Aggregator(*parse_address(address), token=token)
+    except (OSError, ValueError) as e:
+        print(f"cannot accept agents on {address}: {e}", file=sys.stderr)
+        return None
+    aggregator.start()
+    host, port = aggregator.address
+    print(f"accepting agents on {host}:{port}", file=sys.stderr)
+    if token is None and not ipaddress.ip_address(host).is_loopback:
+        print("warning: any machine that can reach this port can add hosts; "
+              "use --token-file", file=sys.stderr)
+    return aggregator
+
+def dump_feed(feed_path):
+    """Print the newest published snapshot; returns an exit status"""
+    from shm_feed import FeedReader
+    
+    reader = FeedReader(feed_path)
+    snapshot = reader.read()
+    reader.close()
+    if snapshot is None:
+        print(reader.refused or f"no snapshot published at {reader.path}", file=sys.stderr)
+        return 1
+    data = {key: {'value': snapshot[key],
+                  'age': round(snapshot.age(key), 3),
+                  'stale': snapshot.is_stale(key)}
+            for key in snapshot}
+    json.dump(data, sys.stdout, indent=2, default=str)
+    print()
+    return 0
 
 def main():
-    win = SystemMonitor()
+    from instrumentation import Instrumentation
+    Instrumentation.milestone('start')
+    
+    args = parse_args()
+    token = None
+    if args.token_file:
+        token = read_token(args.token_file)
+        if token is None:
+            sys.exit(1)
+    exporter = None
+    if args.exporter:
+        exporter = open_exporter(args.exporter)
+        if exporter is None:
+            sys.exit(1)
+    if args.headless:
+        sys.exit(run_headless(args.feed, args.history_dir, not args.no_history,
+                              args.record, args.instrument or args.instrument_dump,
+                              not args.fixed_rate, args.startup_report, exporter))
+    if args.agent:
+        sys.exit(run_agent(args.agent, args.name, not args.fixed_rate, exporter, token))
+    if args.dump:
+        sys.exit(dump_feed(args.feed))
+    aggregator = None
+    if args.aggregate is not None:
+        aggregator = open_aggregator(args.aggregate, token)
+        if aggregator is None:
+            sys.exit(1)
+    
+    # GTK is only needed (and only imported) when a window is shown
+    import gi
+    gi.require_version('Gtk', '3.0')
+    from gi.repository import Gtk
+    from window import SystemMonitor
+    Instrumentation.milestone('imports')
+    
+    # Enabled before the window is built so draw timing gets hooked up
+    Instrumentation.enable(args.instrument or args.instrument_dump)
+    
+    win = SystemMonitor(view=args.view, update_stats=args.update_stats,
+                        attach=args.attach, feed_path=args.feed,
+                        history=not args.no_history, history_dir=args.history_dir,
+                        record=args.record, replay=args.replay, speed=args.speed,
+                        instrument=args.instrument, adaptive=not args.fixed_rate,
+                        exit_when_ready=args.startup_report, exporter=exporter,
+                        aggregator=aggregator)
     win.connect("destroy", Gtk.main_quit)
     win.show_all()
+    Instrumentation.milestone('window_built')
     Gtk.main()
+    if exporter is not None:
+        exporter.close()
+    if aggregator is not None:
+        aggregator.close()
+    if args.instrument_dump:
+        Instrumentation.dump()
+    if args.startup_report:
+        print_milestones()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,87 @@
+"""
+Metric Naming
+Flatten snapshot values into named numeric series and back
+"""
+import re
+
+# One path element: .key or [index]
+_PART = re.compile(r'\.([^.\[\]]+)|\[(\d+)\]')
+
+def flatten(key, value, out=None, numeric=True):
+    """
+    Numeric leaves of value as {name: float}
+    
+    Names join the snapshot key with the path to each leaf, e.g.
+    'cpu_percents[3]', 'cpu_temps.0.4', 'gpu_stats.temp', 'gpus[1].power_draw'.
+    Strings and None are skipped; booleans become 0/1. With numeric=False
+    every leaf is kept as-is instead, and empty dicts and lists are kept
+    as leaves of their own so unflatten() restores them.
+    """
+    if out is None:
+        out = {}
+    if isinstance(value, dict):
+        if not value and not numeric:
+            out[key] = {}
+        for child, item in value.items():
+            flatten(f"{key}.{child}", item, out, numeric)
+    elif isinstance(value, (list, tuple)):
+        if not value and not numeric:
+            out[key] = []
+        for index, item in enumerate(value):
+            flatten(f"{key}[{index}]", item, out, numeric)
+    elif not numeric:
+        out[key] = value
+    elif isinstance(value, bool):
+        out[key] = 1.0 if value else 0.0
+    elif isinstance(value, (int, float)):
+        out[key] = float(value)
+    return out
+
+def flatten_snapshot(data, keys=None, numeric=True):
+    """Flatten every key of a snapshot (or only keys) into {name: float}"""
+    out = {}
+    for key in (data if keys is None else keys):
+        if key in data:
+            flatten(key, data[key], out, numeric)
+    return out
+
+def split(name):
+    """
+    'gpus[1].temp' -> [('gpus', False), (1, True), ('temp', False)]
+    
+    The flag marks list indices; numeric dict keys ('cpu_temps.0.4')
+    come back as ints with the flag unset.
+    """
+    head = re.match(r'[^.\[\]]+', name)
+    if head is None:
+        return []
+    parts = [(head.group(0), False)]
+    for key, index in _PART.findall(name[head.end():]):
+        if index:
+            parts.append((int(index), True))
+        else:
+            parts.append((int(key) if key.isdigit() else key, False))
+    return parts
+
+def unflatten(values):
+    """Inverse of flatten_snapshot: {name: float} -> nested snapshot-like dict"""
+    root = {}
+    for name, value in values.items():
+        parts = split(name)
+        node = root
+        for (part, _), (_, child_is_index) in zip(parts, parts[1:]):
+            node = _child(node, part, [] if child_is_index else {})
+        if parts:
+            _child(node, parts[-1][0], None)
+            node[parts[-1][0]] = value
+    return root
+
+def _child(node, part, default):
+    """Get or create node[part], growing lists as needed"""
+    if isinstance(node, list):
+        while len(node) <= part:
+            node.append(None)
+        if node[part] is None:
+            node[part] = default
+        return node[part]
+    return node.setdefault(part, default)
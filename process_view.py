@@ -0,0 +1,109 @@
+"""
+Process Section Component
+Top processes by CPU, memory and disk I/O in monospace tables
+"""
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, Pango
+
+from sampler import Snapshot
+from view_model import ViewModel
+
+# Opacity for rows whose collector has fallen behind
+STALE_OPACITY = 0.5
+
+# (scan list, table title, value column header)
+TABLES = (
+    ('cpu', 'cpu', 'CPU%'),
+    ('rss', 'memory', 'RSS'),
+    ('io', 'disk i/o', 'R+W/s'),
+)
+
+def _size(num_bytes):
+    """Compact byte count, e.g. 512K, 1.2G"""
+    for unit in ('K', 'M', 'G', 'T'):
+        num_bytes /= 1024
+        if num_bytes < 1000:
+            return f"{num_bytes:.1f}{unit}" if num_bytes < 10 else f"{num_bytes:.0f}{unit}"
+    return f"{num_bytes:.0f}P"
+
+class ProcessView:
+    """Top-N process tables
+    
+    Every row is its own label fed through a ViewModel, so a tick only
+    re-renders the rows whose process or value changed.
+    """
+    
+    def __init__(self, rows=5, command_width=24):
+        """
+        rows: processes shown per table
+        command_width: characters of the command line shown
+        """
+        self.rows = rows
+        self.command_width = command_width
+        self.widget = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
+        self.widget.set_margin_start(10)
+        self.widget.set_margin_end(10)
+        self.widget.set_margin_bottom(10)
+        
+        self._font = Pango.AttrList()
+        self._font.insert(Pango.attr_font_desc_new(
+            Pango.FontDescription.from_string("Ubuntu Mono 9")))
+        
+        self.view_model = ViewModel()
+        for key, title, column in TABLES:
+            self._add_label(f"{'PID':>7} {'USER':<8} {column:>6}  {title}")
+            for row in range(rows):
+                label = self._add_label()
+                self.view_model.bind(
+                    (key, row), label.set_text,
+                    lambda raw, key=key: self._format_row(key, raw),
+                    lambda stale, label=label: label.set_opacity(
+                        STALE_OPACITY if stale else 1.0))
+        count = self._add_label()
+        self.view_model.bind('count', count.set_text,
+                             lambda n: f"{n} processes" if n else "")
+    
+    def _add_label(self, text=""):
+        """Add one left-aligned monospace line"""
+        label = Gtk.Label(label=text)
+        label.set_attributes(self._font)
+        label.set_line_wrap(False)
+        label.set_selectable(False)
+        label.set_halign(Gtk.Align.START)
+        self.widget.pack_start(label, False, False, 0)
+        return label
+    
+    def _format_row(self, key, raw):
+        """(pid, user, cmdline, cpu, rss, io rate) or None -> table row"""
+        if raw is None:
+            return ""
+        pid, user, cmdline, cpu, rss, io = raw
+        value = f"{cpu:.1f}" if key == 'cpu' else _size(rss if key == 'rss' else io)
+        # Drop the executable's directory, keep the arguments
+        command, _, args = cmdline.partition(' ')
+        command = command.rsplit('/', 1)[-1]
+        if args:
+            command = f"{command} {args}"
+        return f"{pid:>7} {user[:8]:<8} {value:>6}  {command[:self.command_width]}"
+    
+    def update(self, data):
+        """Push changed rows into the tables"""
+        if 'processes' not in data:
+            return  # Not collected yet (startup)
+        processes = data['processes'] or {}
+        stale = isinstance(data, Snapshot) and data.is_stale('processes')
+        
+        vm = self.view_model
+        vm.begin_tick()
+        for key, _, _ in TABLES:
+            entries = processes.get(key) or []
+            for row in range(self.rows):
+                raw = None
+                if row < len(entries):
+                    p = entries[row]
+                    raw = (p['pid'], p['user'], p['cmdline'], p['cpu'], p['rss'],
+                           p['read_rate'] + p['write_rate'])
+                vm.set((key, row), raw, stale)
+        vm.set('count', processes.get('count'))
+        vm.end_tick()
@@ -0,0 +1,331 @@
+"""
+Process Scanner
+Top-N processes by CPU, RSS and I/O from incremental /proc/[pid] reads
+"""
+import heapq
+import os
+import pwd
+import time
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+# List /proc at least every this many scans even if no PID was created
+RESCAN_EVERY = 30
+
+# ...and at most every this many scans while PIDs are being created
+LIST_EVERY = 3
+
+class ProcessInfo:
+    """Cached state of one PID between scans"""
+    
+    __slots__ = ('pid', 'stat_path', 'name', 'start', 'jiffies', 'stat_time', 'cpu', 'rss',
+                 'io_bytes', 'io_time', 'read_rate', 'write_rate', 'io_rate', 'io_denied',
+                 'cmdline', 'user')
+    
+    def __init__(self, pid, proc_root):
+        self.pid = pid
+        self.stat_path = f'{proc_root}/{pid}/stat'
+        self.name = None
+        self.start = None       # starttime; a change means the PID was reused
+        self.jiffies = None
+        self.stat_time = None
+        self.cpu = 0.0          # percent of one CPU
+        self.rss = 0            # bytes
+        self.io_bytes = None    # (read_bytes, write_bytes)
+        self.io_time = None
+        self.read_rate = 0.0    # bytes/s
+        self.write_rate = 0.0
+        self.io_rate = 0.0      # read + write
+        self.io_denied = False
+        self.cmdline = None     # static data, loaded when first shown
+        self.user = None
+
+def _read(path, size=4096):
+    """Read a small procfs file (None if the process is gone)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        return os.read(fd, size)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+class TopN:
+    """Top n of a changing population, re-ranking only what changed
+    
+    Keeps a reserve of the best `reserve` entries and a floor that no
+    entry outside the reserve exceeds. Each update ranks only the
+    reserve plus the entries whose values changed; if that cannot prove
+    the top n exact (an outside entry could still beat the n-th), it
+    falls back to a full heapq.nlargest pass.
+    """
+    
+    def __init__(self, key, n, reserve=None):
+        self.key = key
+        self.n = n
+        self.reserve_size = reserve or 4 * n
+        self.reserve = []
+        self.floor = None       # None: no valid reserve yet
+        self.full_passes = 0
+    
+    def update(self, changed, population):
+        """
+        changed: entries whose key may have changed since the last update
+        population: mapping pid -> entry of everything still alive
+        Returns the top n entries, largest first.
+        """
+        key = self.key
+        if self.floor is not None:
+            candidates = {p.pid: p for p in self.reserve if population.get(p.pid) is p}
+            candidates.update((p.pid, p) for p in changed)
+            ranked = heapq.nlargest(self.reserve_size, candidates.values(), key=key)
+            floor = self.floor
+            if len(ranked) == self.reserve_size:
+                floor = max(floor, key(ranked[-1]))
+            if len(ranked) >= self.n and key(ranked[self.n - 1]) >= floor:
+                self.reserve = ranked
+                self.floor = floor
+                return ranked[:self.n]
+        
+        self.full_passes += 1
+        ranked = heapq.nlargest(self.reserve_size, population.values(), key=key)
+        self.reserve = ranked
+        self.floor = key(ranked[-1]) if len(ranked) == self.reserve_size else float('-inf')
+        return ranked[:self.n]
+
+class ProcessScanner:
+    """Incremental top-N scanner over /proc
+    
+    /proc is only listed when /proc/loadavg reports a newly created PID,
+    at most every LIST_EVERY scans (and at least every RESCAN_EVERY);
+    exited PIDs are dropped when their stat file disappears.
+    /proc/[pid]/stat (CPU time, RSS) is read for every known PID each
+    scan so the CPU ranking is never behind, and only processes whose
+    values changed are re-ranked. /proc/[pid]/io is capped at io_budget
+    reads per scan: the PIDs currently shown are read every scan, the
+    rest round-robin, so every process is revisited within
+    ceil(processes / budget) scans and its rates are averaged over its
+    own read interval. Static data (cmdline, user) is only read for
+    processes that make the top lists and is cached until the PID goes
+    away or is reused.
+    """
+    
+    def __init__(self, proc_root='/proc', top_n=5, io_budget=64):
+        """
+        proc_root: procfs root (point at a fake tree for testing)
+        top_n: processes per list
+        io_budget: /proc/[pid]/io reads per scan
+        """
+        self.proc_root = proc_root
+        self.top_n = top_n
+        self.io_budget = io_budget
+        self.stat_reads = 0     # reads done by the last scan
+        self.io_reads = 0
+        self.listings = 0       # scans that listed /proc
+        
+        self._procs = {}        # pid -> ProcessInfo
+        self._order = []        # round-robin order of known pids
+        self._order_stale = False
+        self._io_cursor = 0
+        self._shown = ()        # pids in the last top lists
+        self._users = {}        # uid -> user name
+        self._names = set()     # /proc entries at the last listing
+        self._last_pid = None
+        self._since_listing = RESCAN_EVERY
+        
+        self._top_cpu = TopN(lambda p: p.cpu, top_n)
+        self._top_rss = TopN(lambda p: p.rss, top_n)
+        self._top_io = TopN(lambda p: p.io_rate, top_n)
+    
+    def _read_last_pid(self):
+        """Most recently created PID from /proc/loadavg (None if unknown)"""
+        data = _read(f'{self.proc_root}/loadavg', 128)
+        try:
+            return int(data.split()[4])
+        except (AttributeError, IndexError, ValueError):
+            return None
+    
+    def _sync_pids(self):
+        """Pick up PIDs created since the last scan"""
+        self._since_listing += 1
+        if self._since_listing < RESCAN_EVERY:
+            if self._since_listing < LIST_EVERY:
+                return
+            last_pid = self._read_last_pid()
+            if last_pid is not None and last_pid == self._last_pid:
+                return
+        self._last_pid = self._read_last_pid()
+        self._since_listing = 0
+        self.listings += 1
+        try:
+            names = set(os.listdir(self.proc_root))
+        except OSError:
+            return
+        
+        # Only the difference to the previous listing needs work
+        procs = self._procs
+        for name in names - self._names:
+            if name.isdigit():
+                pid = int(name)
+                if pid not in procs:
+                    procs[pid] = ProcessInfo(pid, self.proc_root)
+                    self._order_stale = True
+        for name in self._names - names:
+            if name.isdigit():
+                self._forget(int(name))
+        self._names = names
+    
+    def _forget(self, pid):
+        """Drop an exited process"""
+        if self._procs.pop(pid, None) is not None:
+            self._order_stale = True
+        # A reused PID must look new at the next listing
+        self._names.discard(str(pid))
+    
+    def _read_stat(self, proc, now):
+        """Refresh CPU% and RSS of one process; False if it is gone"""
+        data = _read(proc.stat_path, 1024)
+        if not data:
+            return False
+        # comm may contain spaces and parentheses; fields follow the last ')'
+        close = data.rfind(b')')
+        fields = data[close + 2:].split(None, 22)
+        try:
+            jiffies = int(fields[11]) + int(fields[12])
+            start = int(fields[19])
+            rss = int(fields[21]) * PAGE_SIZE
+        except (IndexError, ValueError):
+            return True     # Short or malformed line: keep the last values
+        if start != proc.start:
+            # New process (or PID reuse): drop what was cached for the old one
+            proc.start = start
+            proc.name = data[data.find(b'(') + 1:close].decode('utf-8', 'replace')
+            proc.cmdline = proc.user = None
+            proc.jiffies = None
+            proc.io_bytes = None
+            proc.cpu = 0.0
+        elif proc.jiffies is not None and now > proc.stat_time:
+            proc.cpu = (jiffies - proc.jiffies) / CLOCK_TICKS / (now - proc.stat_time) * 100
+        proc.jiffies = jiffies
+        proc.stat_time = now
+        proc.rss = rss
+        return True
+    
+    def _read_io(self, proc, now):
+        """Refresh read/write rates of one process"""
+        if proc.io_denied:
+            return
+        data = _read(f'{self.proc_root}/{proc.pid}/io', 512)
+        if data is None:
+            # Other users' processes need CAP_SYS_PTRACE; don't retry
+            proc.io_denied = True
+            return
+        read_bytes = write_bytes = 0
+        for line in data.split(b'\n'):
+            if line.startswith(b'read_bytes:'):
+                read_bytes = int(line[11:])
+            elif line.startswith(b'write_bytes:'):
+                write_bytes = int(line[12:])
+        if proc.io_bytes is not None and now > proc.io_time:
+            elapsed = now - proc.io_time
+            proc.read_rate = max(0, read_bytes - proc.io_bytes[0]) / elapsed
+            proc.write_rate = max(0, write_bytes - proc.io_bytes[1]) / elapsed
+            proc.io_rate = proc.read_rate + proc.write_rate
+        proc.io_bytes = (read_bytes, write_bytes)
+        proc.io_time = now
+    
+    def _batch(self, cursor, budget):
+        """Up to budget pids from the round-robin order; returns (pids, cursor)"""
+        if self._order_stale:
+            self._order = list(self._procs)
+            self._order_stale = False
+        order = self._order
+        if not order or budget <= 0:
+            return [], cursor
+        cursor %= len(order)
+        pids = order[cursor:cursor + budget]
+        if len(pids) < budget:
+            pids += order[:min(cursor, budget - len(pids))]
+        return pids, (cursor + len(pids)) % len(order)
+    
+    def _describe(self, proc):
+        """Load static data of a process about to be shown"""
+        if proc.cmdline is None:
+            data = _read(f'{self.proc_root}/{proc.pid}/cmdline', 4096) or b''
+            cmdline = data.replace(b'\0', b' ').strip().decode('utf-8', 'replace')
+            proc.cmdline = cmdline or f'[{proc.name}]'
+            try:
+                uid = os.stat(f'{self.proc_root}/{proc.pid}').st_uid
+            except OSError:
+                uid = None
+            proc.user = self._user(uid)
+        return {
+            'pid': proc.pid,
+            'name': proc.name,
+            'cmdline': proc.cmdline,
+            'user': proc.user,
+            'cpu': proc.cpu,
+            'rss': proc.rss,
+            'read_rate': proc.read_rate,
+            'write_rate': proc.write_rate,
+        }
+    
+    def _user(self, uid):
+        """User name for uid (cached)"""
+        if uid is None:
+            return '?'
+        user = self._users.get(uid)
+        if user is None:
+            try:
+                user = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                user = str(uid)
+            self._users[uid] = user
+        return user
+    
+    def scan(self, now=None):
+        """
+        Read CPU and RSS of every process and a budgeted share of I/O, then rank
+        Returns {'cpu': [...], 'rss': [...], 'io': [...], 'count': n} with
+        one dict per process (pid, name, cmdline, user, cpu, rss,
+        read_rate, write_rate) in each list.
+        """
+        now = time.monotonic() if now is None else now
+        self._sync_pids()
+        procs = self._procs
+        
+        changed = []
+        self.stat_reads = len(procs)
+        for proc in list(procs.values()):
+            cpu, rss = proc.cpu, proc.rss
+            if not self._read_stat(proc, now):
+                self._forget(proc.pid)
+            elif proc.cpu != cpu or proc.rss != rss:
+                changed.append(proc)
+        
+        io_pids = {pid for pid in self._shown if pid in procs}
+        batch, self._io_cursor = self._batch(self._io_cursor, self.io_budget - len(io_pids))
+        io_pids.update(batch)
+        io_changed = []
+        for pid in io_pids:
+            proc = procs.get(pid)
+            if proc is not None:
+                self._read_io(proc, now)
+                io_changed.append(proc)
+        self.io_reads = len(io_pids)
+        
+        top_cpu = self._top_cpu.update(changed, procs)
+        top_rss = self._top_rss.update(changed, procs)
+        top_io = self._top_io.update(io_changed, procs)
+        self._shown = tuple({p.pid for p in top_cpu + top_rss + top_io})
+        
+        return {
+            'cpu': [self._describe(p) for p in top_cpu],
+            'rss': [self._describe(p) for p in top_rss],
+            'io': [self._describe(p) for p in top_io],
+            'count': len(procs),
+        }
@@ -0,0 +1,95 @@
+"""
+Snapshot Replay
+Drive the UI from a recording instead of live collectors
+"""
+import threading
+import time
+
+from sampler import Sample, Snapshot
+from snapshot_codec import read_recording
+
+class ReplaySampler:
+    """Stand-in for Sampler that publishes recorded snapshots
+    
+    Frames are replayed at their recorded spacing divided by speed, or
+    back to back when speed is None. Sample times are rebased onto this
+    process's monotonic clock (scaled by speed), so age and staleness
+    behave as they did while recording.
+    """
+    
+    def __init__(self, path, speed=1.0, on_snapshot=None, loop=False):
+        """
+        path: recording made by SnapshotRecorder
+        speed: playback speed factor, or None for as fast as possible
+        on_snapshot: called from the replay thread with each Snapshot
+        loop: start over at the end of the recording
+        """
+        self.path = path
+        self.speed = speed
+        self.on_snapshot = on_snapshot
+        self.loop = loop
+        self.frames = 0
+        self.finished = threading.Event()
+        self._latest = Snapshot({})
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def snapshots(self):
+        """Recorded snapshots with sample times on this process's clock"""
+        header, frames = read_recording(self.path)
+        intervals = {key: interval for key, interval in header.get('intervals', {}).items()
+                     if interval is not None}
+        if self.speed:
+            intervals = {key: interval / self.speed for key, interval in intervals.items()}
+        
+        samples = {}
+        seq = 0
+        started = time.monotonic()
+        for offset, data, updated in frames:
+            now = started + offset / self.speed if self.speed else time.monotonic()
+            for key in updated:
+                seq += 1
+                samples[key] = Sample(data.get(key), now, seq)
+            for key in list(samples):
+                if key not in data:
+                    del samples[key]
+                elif key not in updated:
+                    samples[key] = Sample(data[key], samples[key].timestamp, samples[key].seq)
+            yield now, Snapshot(samples, intervals, now)
+    
+    def start(self):
+        """Start replaying in the background"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self.finished.clear()
+        self._thread = threading.Thread(target=self._run, name='replay', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop replaying"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+    
+    def latest(self):
+        """Get the newest replayed Snapshot"""
+        return self._latest
+    
+    def _run(self):
+        """Replay loop: wait for each frame's time, then publish it"""
+        while not self._stop.is_set():
+            for due, snapshot in self.snapshots():
+                delay = due - time.monotonic()
+                if delay > 0 and self._stop.wait(delay):
+                    return
+                self._latest = snapshot
+                self.frames += 1
+                if self.on_snapshot is not None:
+                    self.on_snapshot(snapshot)
+                if self._stop.is_set():
+                    return
+            if not self.loop:
+                break
+        self.finished.set()
@@ -0,0 +1,326 @@
+"""
+Background Sampler
+Schedules the data collectors off the GTK main loop and publishes snapshots
+"""
+import heapq
+import math
+import threading
+import time
+from collections.abc import Mapping
+
+from instrumentation import Instrumentation
+
+# Relative collector costs; cheaper collectors are dispatched first
+COST_CHEAP = 1
+COST_MODERATE = 10
+COST_EXPENSIVE = 100
+
+# Result of a run whose collector turned out to be disabled
+SKIPPED = object()
+
+def align(now, interval):
+    """Next multiple of interval on the monotonic clock after now
+    
+    Runs land on the same phase of the clock whatever the interval, so
+    samples stay evenly spaced instead of drifting by the scheduling
+    latency of each run.
+    """
+    return (math.floor(now / interval + 1e-9) + 1) * interval
+
+class Collector:
+    """Declaration of a data source and the cadence it runs at"""
+    
+    def __init__(self, key, func, interval=1.0, timeout=2.0, cost=COST_CHEAP,
+                 enabled=None):
+        """
+        key: snapshot key the result is published under
+        func: zero-argument callable returning the value
+        interval: seconds between runs
+        timeout: seconds after which a run is considered stuck
+        cost: relative cost (COST_CHEAP / COST_MODERATE / COST_EXPENSIVE)
+        enabled: optional callable; the collector is skipped while it is false
+        """
+        self.key = key
+        self.func = func
+        self.interval = interval
+        self.timeout = timeout
+        self.cost = cost
+        self.enabled = enabled
+    
+    def is_enabled(self):
+        """Whether the collector's source is present"""
+        return self.enabled is None or self.enabled()
+    
+    def __repr__(self):
+        return f"Collector({self.key!r}, interval={self.interval}, cost={self.cost})"
+
+class Sample:
+    """One collected value with the monotonic time it was taken"""
+    
+    __slots__ = ('value', 'timestamp', 'seq')
+    
+    def __init__(self, value, timestamp, seq):
+        self.value = value
+        self.timestamp = timestamp
+        self.seq = seq
+
+class Snapshot(Mapping):
+    """Immutable view of the newest sample of every collector
+    
+    Behaves like the dict returned by SystemData.get_all(), and also
+    exposes how old each value is so views can flag stale data. `warm`
+    is false while some collectors have not reported for the first time.
+    """
+    
+    def __init__(self, samples, intervals=None, timestamp=None, warm=True):
+        self._samples = dict(samples)
+        self._intervals = dict(intervals or {})
+        self.timestamp = time.monotonic() if timestamp is None else timestamp
+        self.warm = warm
+    
+    def __getitem__(self, key):
+        return self._samples[key].value
+    
+    def __iter__(self):
+        return iter(self._samples)
+    
+    def __len__(self):
+        return len(self._samples)
+    
+    def age(self, key, now=None):
+        """Seconds since the value for key was sampled (None if missing)"""
+        sample = self._samples.get(key)
+        if sample is None:
+            return None
+        return (time.monotonic() if now is None else now) - sample.timestamp
+    
+    def seq(self, key):
+        """Sample counter for key; changes whenever a new value arrives"""
+        sample = self._samples.get(key)
+        return sample.seq if sample is not None else None
+    
+    def interval(self, key):
+        """Scheduled refresh interval of key's collector (None if unknown)"""
+        return self._intervals.get(key)
+    
+    def is_stale(self, key, now=None):
+        """Whether key missed at least two of its scheduled refreshes"""
+        age = self.age(key, now)
+        if age is None:
+            return False
+        interval = self._intervals.get(key)
+        return interval is not None and age > 2 * interval + 0.5
+
+class Sampler:
+    """Run collectors on their own cadence and publish immutable snapshots
+    
+    Each collector is rescheduled on its own interval and runs on its own
+    worker, so a slow or stuck source (e.g. nvidia-smi hitting its
+    timeout) never delays the others, and cheap sources can run well
+    below a second without dragging the expensive ones along. A snapshot
+    carrying the newest value of each collector is published once every
+    dispatched collector has reported or timed out, or at the latest
+    when the next collector falls due.
+    
+    Runs are aligned to multiples of their interval on the monotonic
+    clock. An optional SamplingPolicy changes the intervals at runtime;
+    collectors whose interval shrinks run at once, then realign.
+    
+    Until every collector has reported once, each result is published
+    as it arrives so views fill in section by section; `warm` turns
+    true with the first snapshot that has heard from all of them.
+    """
+    
+    def __init__(self, collectors, on_snapshot=None, policy=None):
+        """
+        collectors: iterable of Collector
+        on_snapshot: called from the sampler thread with each new Snapshot
+        policy: optional SamplingPolicy adapting the intervals
+        """
+        self.collectors = {c.key: c for c in collectors}
+        self.on_snapshot = on_snapshot
+        self.policy = policy
+        self.timeouts = {key: 0 for key in self.collectors}
+        self.intervals = {key: c.interval for key, c in self.collectors.items()}
+        
+        self._samples = {}
+        self._seq = 0
+        self._running = {}      # key -> (future, started)
+        self._outstanding = set()
+        self._dirty = False
+        self._reschedule = False
+        self._first_round = set(self.collectors)
+        self._publish_early = False
+        self.warm = False
+        self._latest = Snapshot({}, warm=False)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+        if policy is not None:
+            policy.on_change = self.reschedule
+    
+    def start(self):
+        """Start sampling in the background"""
+        if self._thread is not None:
+            return
+        # Imported here: concurrent.futures pulls in logging (~10 ms)
+        from concurrent.futures import ThreadPoolExecutor
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, len(self.collectors)),
+            thread_name_prefix='collector')
+        self._thread = threading.Thread(target=self._run, name='sampler', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop sampling; collectors still running are abandoned"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def latest(self):
+        """Get the newest published Snapshot"""
+        return self._latest
+    
+    def reschedule(self):
+        """Re-read the policy's intervals (safe from any thread)"""
+        self._reschedule = True
+        self._wake.set()
+    
+    def _interval(self, collector):
+        """Current interval of collector under the policy"""
+        if self.policy is None:
+            return collector.interval
+        return self.policy.interval(collector)
+    
+    def _apply_policy(self, schedule, now):
+        """Rebuild the schedule after the policy changed intervals"""
+        self._reschedule = False
+        rebuilt = []
+        for due, cost, key in schedule:
+            interval = self._interval(self.collectors[key])
+            if interval < self.intervals[key]:
+                due = now
+            elif interval > self.intervals[key]:
+                due = align(now, interval)
+            self.intervals[key] = interval
+            rebuilt.append((due, cost, key))
+        heapq.heapify(rebuilt)
+        return rebuilt
+    
+    def _run(self):
+        """Scheduler loop: dispatch due collectors, publish finished rounds"""
+        now = time.monotonic()
+        # Heap of (due time, cost, key); equal due times run cheapest first
+        schedule = [(now, c.cost, c.key) for c in self.collectors.values()]
+        heapq.heapify(schedule)
+        self._reschedule = self.policy is not None
+        
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if self._reschedule:
+                schedule = self._apply_policy(schedule, now)
+            self._expire(now)
+            due_now = bool(schedule) and schedule[0][0] <= now
+            if self._dirty and (due_now or not self._outstanding or self._publish_early):
+                self._publish()
+            
+            while schedule and schedule[0][0] <= now:
+                due, cost, key = heapq.heappop(schedule)
+                self._dispatch(key, now)
+                # Next slot on the interval's grid; missed slots are skipped
+                heapq.heappush(schedule, (align(now, self.intervals[key]), cost, key))
+            
+            deadline = schedule[0][0] if schedule else now + 1.0
+            with self._lock:
+                for key in self._outstanding:
+                    started = self._running[key][1]
+                    deadline = min(deadline, started + self.collectors[key].timeout)
+            self._wake.wait(max(0.0, deadline - time.monotonic()))
+            self._wake.clear()
+    
+    def _dispatch(self, key, now):
+        """Start a collector unless its previous run is still in flight"""
+        running = self._running.get(key)
+        if running is not None and not running[0].done():
+            return
+        future = self._executor.submit(self._collect, self.collectors[key])
+        with self._lock:
+            self._running[key] = (future, now)
+            self._outstanding.add(key)
+        future.add_done_callback(lambda f, key=key: self._store(key, f))
+    
+    @staticmethod
+    def _collect(collector):
+        """Worker thread: run collector, or return SKIPPED while it is disabled
+        
+        The enabled check runs here rather than in the scheduler because
+        it may probe hardware (load a library, start nvidia-smi) on first
+        use, which must not stall the other collectors.
+        Disabled collectors stay scheduled so a reprobe can revive them.
+        """
+        if not collector.is_enabled():
+            return SKIPPED
+        return collector.func()
+    
+    def _first_report(self, key):
+        """Lock held: key reported for the first time; publish without waiting"""
+        if key in self._first_round:
+            self._first_round.discard(key)
+            self._publish_early = True
+            if not self._first_round:
+                self._dirty = True
+    
+    def _expire(self, now):
+        """Stop waiting for collectors that overran their timeout"""
+        with self._lock:
+            for key in list(self._outstanding):
+                future, started = self._running[key]
+                if now - started > self.collectors[key].timeout:
+                    self._outstanding.discard(key)
+                    self.timeouts[key] += 1
+                    self._dirty = True
+                    self._first_report(key)
+                    Instrumentation.report_timeout(key)
+    
+    def _store(self, key, future):
+        """Worker thread: keep a finished collector's result"""
+        ok = not future.cancelled() and future.exception() is None
+        if not ok and not future.cancelled():
+            Instrumentation.report_error(key, future.exception())
+        skipped = ok and future.result() is SKIPPED
+        with self._lock:
+            if ok and not skipped:
+                self._seq += 1
+                self._samples[key] = Sample(future.result(), time.monotonic(), self._seq)
+                self._dirty = True
+            self._first_report(key)
+            self._outstanding.discard(key)
+            running = self._running.get(key)
+            if running is not None and running[0] is future:
+                del self._running[key]
+                if Instrumentation.enabled and not skipped:
+                    Instrumentation.record_collector(key, time.monotonic() - running[1])
+            wake = self._publish_early or not self._outstanding
+        if wake:
+            self._wake.set()
+    
+    def _publish(self):
+        """Freeze the current samples into a Snapshot and hand it out"""
+        with self._lock:
+            self._dirty = False
+            self._publish_early = False
+            self.warm = not self._first_round
+            snapshot = Snapshot(self._samples, self.intervals, warm=self.warm)
+        self._latest = snapshot
+        if self.policy is not None:
+            self.policy.observe(snapshot)
+        if self.on_snapshot is not None:
+            self.on_snapshot(snapshot)
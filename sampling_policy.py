@@ -0,0 +1,135 @@
+"""
+Sampling Policy
+Adaptive collector intervals: back off while hidden or idle, burst on load spikes
+"""
+import math
+import threading
+import time
+
+from sampler import COST_CHEAP
+
+# Policy states, slowest first
+HIDDEN = 'hidden'
+IDLE = 'idle'
+NORMAL = 'normal'
+BURST = 'burst'
+
+class SamplingPolicy:
+    """Pick collector intervals from window visibility and recent load
+    
+    - hidden: collectors only the window reads slow to at least
+      HIDDEN_INTERVAL; those in `recorded` (history store, recorder,
+      exporter) keep the interval the load would give them
+    - idle: CPU and disk load stayed within FLAT_THRESHOLD of their
+      moving average for IDLE_AFTER seconds; intervals grow IDLE_FACTOR x
+    - burst: CPU or disk load jumped more than BURST_THRESHOLD away from
+      its moving average; cheap sub-second collectors run every
+      BURST_INTERVAL until BURST_HOLD seconds after the last jump
+    - normal: every collector at its declared interval
+    
+    The sampler registers on_change and reschedules when the state flips.
+    """
+    
+    HIDDEN_INTERVAL = 30.0
+    IDLE_FACTOR = 2.0
+    IDLE_AFTER = 30.0
+    BURST_INTERVAL = 0.25
+    BURST_HOLD = 10.0
+    
+    # Percentage points away from the moving average
+    FLAT_THRESHOLD = 2.0
+    BURST_THRESHOLD = 15.0
+    
+    # Time constant of the moving averages, seconds
+    AVERAGE_SECONDS = 5.0
+    
+    def __init__(self):
+        self.visible = True
+        self.state = NORMAL
+        self.load_state = NORMAL    # state from load alone, ignoring visibility
+        self.recorded = frozenset()
+        self.on_change = None
+        self._averages = {}      # signal -> (moving average, monotonic time)
+        self._seqs = {}
+        self._last_change = time.monotonic()
+        self._last_spike = None
+        self._lock = threading.Lock()
+    
+    def interval(self, collector):
+        """Seconds between runs of collector in the current state"""
+        base = collector.interval
+        state = self.state
+        if state == HIDDEN and collector.key in self.recorded:
+            state = self.load_state
+        if state == BURST:
+            if collector.cost == COST_CHEAP and base <= 1.0:
+                return min(base, self.BURST_INTERVAL)
+            return base
+        if state == IDLE:
+            return base * self.IDLE_FACTOR
+        if state == HIDDEN:
+            return max(base, self.HIDDEN_INTERVAL)
+        return base
+    
+    def set_recorded(self, keys):
+        """Collector keys that something besides the window consumes
+        
+        Their samples feed the history store, a recording or the
+        exporter, which would get holes if hiding the window throttled them.
+        """
+        with self._lock:
+            self.recorded = frozenset(keys)
+            if self.state == HIDDEN and self.on_change is not None:
+                self.on_change()
+    
+    def set_visible(self, visible):
+        """Window mapped and not minimized or fully covered"""
+        with self._lock:
+            self.visible = visible
+            self._update(time.monotonic())
+    
+    def observe(self, snapshot):
+        """Sampler thread: feed a published snapshot into the load detector"""
+        cpu = snapshot.get('cpu_percents')
+        disk = snapshot.get('disk_io') or {}
+        now = time.monotonic()
+        with self._lock:
+            if cpu and snapshot.seq('cpu_percents') != self._seqs.get('cpu'):
+                self._seqs['cpu'] = snapshot.seq('cpu_percents')
+                self._track('cpu', sum(cpu) / len(cpu), now)
+            if disk.get('util') is not None and snapshot.seq('disk_io') != self._seqs.get('disk'):
+                self._seqs['disk'] = snapshot.seq('disk_io')
+                self._track('disk', disk['util'], now)
+            self._update(now)
+    
+    def _track(self, signal, value, now):
+        """Update the moving average of signal and classify the new value"""
+        previous = self._averages.get(signal)
+        if previous is None:
+            self._averages[signal] = (value, now)
+            return
+        average, then = previous
+        deviation = abs(value - average)
+        alpha = 1.0 - math.exp(-(now - then) / self.AVERAGE_SECONDS)
+        self._averages[signal] = (average + alpha * (value - average), now)
+        if deviation > self.BURST_THRESHOLD:
+            self._last_spike = now
+        if deviation > self.FLAT_THRESHOLD:
+            self._last_change = now
+    
+    def _update(self, now):
+        """Recompute the state; notify on_change when it flips"""
+        if self._last_spike is not None and now - self._last_spike < self.BURST_HOLD:
+            load_state = BURST
+        elif now - self._last_change >= self.IDLE_AFTER:
+            load_state = IDLE
+        else:
+            load_state = NORMAL
+        state = load_state if self.visible else HIDDEN
+        # While hidden, recorded collectors still follow load_state
+        changed = state != self.state or (
+            state == HIDDEN and self.recorded and load_state != self.load_state)
+        self.state = state
+        self.load_state = load_state
+        if changed and self.on_change is not None:
+            self.on_change()
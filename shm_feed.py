@@ -0,0 +1,246 @@
+"""
+Shared-Memory Snapshot Feed
+Publish sampler snapshots to a memory-mapped region guarded by a seqlock
+"""
+import fcntl
+import marshal
+import mmap
+import os
+import stat
+import struct
+import tempfile
+
+from sampler import Sample, Snapshot
+
+MAGIC = b'SYSMON\x00\x01'
+VERSION = 1
+
+# magic, version, marshal format, capacity, seq, published (monotonic),
+# payload length, writer pid
+HEADER = struct.Struct('<8sIIQQdII')
+SEQ_OFFSET = 24
+HEADER_SIZE = 64
+
+# Region size; tmpfs only backs the pages actually written
+DEFAULT_SIZE = 4 * 1024 * 1024
+
+# Torn reads retried before giving up on this poll
+READ_RETRIES = 100
+
+def default_path():
+    """Per-user feed path, in /dev/shm when available"""
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, f'system-monitor-{os.getuid()}.feed')
+
+def _check_owner(fd, path):
+    """Refuse a feed that is not a regular file owned by this user and private to it
+    
+    The feed lives at a predictable path in a world-writable directory
+    and its payload is unmarshalled, so a file another user could have
+    created or written must never be used.
+    """
+    info = os.fstat(fd)
+    if not stat.S_ISREG(info.st_mode):
+        raise PermissionError(f"{path} is not a regular file")
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by uid {info.st_uid}, not {os.getuid()}")
+    if info.st_mode & 0o077:
+        raise PermissionError(f"{path} is accessible to other users "
+                              f"(mode {stat.S_IMODE(info.st_mode):o})")
+
+def encode(snapshot):
+    """Snapshot -> payload bytes"""
+    now = snapshot.timestamp
+    return marshal.dumps({
+        key: (snapshot[key], now - snapshot.age(key, now),
+              snapshot.seq(key), snapshot.interval(key))
+        for key in snapshot
+    })
+
+def decode(payload, published):
+    """Payload bytes -> Snapshot"""
+    samples = {}
+    intervals = {}
+    for key, (value, timestamp, seq, interval) in marshal.loads(payload).items():
+        samples[key] = Sample(value, timestamp, seq)
+        if interval is not None:
+            intervals[key] = interval
+    return Snapshot(samples, intervals, published)
+
+class FeedWriter:
+    """Single writer of the snapshot feed (the headless daemon)
+    
+    The region is a fixed header followed by one payload slot. The seq
+    field is a seqlock: it is odd while a snapshot is being written and
+    bumped to the next even value once the payload is complete, so
+    readers never take a lock and never make a syscall. An exclusive
+    flock keeps a second daemon from writing the same feed.
+    """
+    
+    def __init__(self, path=None, size=DEFAULT_SIZE):
+        """
+        path: feed file (default: default_path())
+        size: total region size in bytes
+        """
+        self.path = path or default_path()
+        self.size = size
+        self.capacity = size - HEADER_SIZE
+        self.published = 0
+        self.overflows = 0
+        
+        self._fd = self._open(self.path)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(self._fd)
+            raise RuntimeError(f"another collector is already writing {self.path}")
+        
+        # Continue from the previous daemon's seq so attached readers see a change
+        seq = 0
+        if os.fstat(self._fd).st_size >= HEADER_SIZE:
+            header = HEADER.unpack(os.pread(self._fd, HEADER.size, 0))
+            if header[0] == MAGIC:
+                seq = header[4]
+        os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        self._seq = (seq + 2) & ~1
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, marshal.version,
+                         self.capacity, self._seq, 0.0, 0, os.getpid())
+    
+    @staticmethod
+    def _open(path):
+        """Create the feed private to this user, or reopen this user's feed
+        
+        Never follows a symlink; an existing file must pass _check_owner.
+        """
+        try:
+            return os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600)
+        except FileExistsError:
+            pass
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_NOFOLLOW)
+        except OSError as e:
+            raise RuntimeError(f"cannot open feed {path}: {e}")
+        try:
+            info = os.fstat(fd)
+            if stat.S_ISREG(info.st_mode) and info.st_uid == os.getuid():
+                # A feed left by an older version may still be 0644
+                os.fchmod(fd, 0o600)
+            _check_owner(fd, path)
+        except OSError as e:
+            os.close(fd)
+            raise RuntimeError(f"refusing feed {path}: {e}")
+        return fd
+    
+    def publish(self, snapshot):
+        """Write snapshot into the region (call from a single thread)"""
+        payload = encode(snapshot)
+        if len(payload) > self.capacity:
+            self.overflows += 1
+            return False
+        
+        struct.pack_into('<Q', self._map, SEQ_OFFSET, self._seq + 1)
+        self._map[HEADER_SIZE:HEADER_SIZE + len(payload)] = payload
+        self._seq += 2
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, marshal.version,
+                         self.capacity, self._seq - 1, snapshot.timestamp,
+                         len(payload), os.getpid())
+        struct.pack_into('<Q', self._map, SEQ_OFFSET, self._seq)
+        self.published += 1
+        return True
+    
+    def close(self):
+        """Unmap the region; the file stays for the next daemon"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            os.close(self._fd)
+
+class FeedReader:
+    """Lock-free reader of the snapshot feed
+    
+    Attaches lazily, so a viewer can start before the daemon, and only
+    to a feed owned by this user and private to it. Polling an unchanged
+    feed is a single header read from the mapping; a new snapshot costs
+    one copy of the payload plus decoding.
+    """
+    
+    def __init__(self, path=None):
+        """
+        path: feed file (default: default_path())
+        """
+        self.path = path or default_path()
+        self.torn_reads = 0
+        self.refused = None     # why an existing feed file was not trusted
+        self._map = None
+        self._seq = None
+        self._snapshot = None
+    
+    @property
+    def seq(self):
+        """Seqlock value of the last snapshot read (None before the first)"""
+        return self._seq
+    
+    @property
+    def attached(self):
+        """Whether the feed region is mapped"""
+        return self._map is not None
+    
+    def _attach(self):
+        """Map the feed if a daemon has created it"""
+        try:
+            fd = os.open(self.path, os.O_RDONLY | os.O_NOFOLLOW)
+        except OSError:
+            return False
+        try:
+            try:
+                _check_owner(fd, self.path)
+            except PermissionError as e:
+                self.refused = str(e)
+                return False
+            self.refused = None
+            size = os.fstat(fd).st_size
+            if size < HEADER_SIZE:
+                return False
+            self._map = mmap.mmap(fd, size, prot=mmap.PROT_READ)
+        finally:
+            os.close(fd)
+        magic, version, marshal_version = HEADER.unpack_from(self._map, 0)[:3]
+        if magic != MAGIC or version != VERSION or marshal_version != marshal.version:
+            self.close()
+            return False
+        return True
+    
+    def read(self):
+        """Get the newest Snapshot, or None if nothing was published yet"""
+        if self._map is None and not self._attach():
+            return None
+        
+        for _ in range(READ_RETRIES):
+            seq = struct.unpack_from('<Q', self._map, SEQ_OFFSET)[0]
+            if seq == self._seq:
+                return self._snapshot
+            if seq & 1:
+                self.torn_reads += 1
+                continue
+            header = HEADER.unpack_from(self._map, 0)
+            published, length = header[5], header[6]
+            payload = self._map[HEADER_SIZE:HEADER_SIZE + length]
+            if struct.unpack_from('<Q', self._map, SEQ_OFFSET)[0] != seq:
+                self.torn_reads += 1
+                continue
+            if length == 0:
+                return None
+            self._seq = seq
+            self._snapshot = decode(payload, published)
+            return self._snapshot
+        
+        # Writer kept overwriting the slot; keep showing the last good one
+        return self._snapshot
+    
+    def close(self):
+        """Unmap the region"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._seq = None
@@ -0,0 +1,333 @@
+"""
+Snapshot Codec
+Compact delta-encoded binary log of sampler snapshots
+
+A recording is a header followed by length-prefixed frames. Every
+snapshot is flattened into named leaves (see metrics.flatten) and a
+frame only carries the leaves that changed since the previous frame,
+with numbers stored as zigzag varint deltas. Leaf names are sent once
+and referred to by number afterwards. Every KEYFRAME_INTERVAL frames a
+keyframe repeats every leaf so a damaged tail only loses its own frames.
+
+Floats are stored to 1/FLOAT_SCALE of their unit: 0.001 percentage
+points for CPU/memory/disk usage and pressure, 0.001 °C, MHz, W or MiB
+for sensors and GPUs, 0.001 bytes/s or packets/s for rates, 0.001 s
+for ages. Integers (byte counters, PIDs) are exact. NaN, ±inf and empty
+dicts and lists have tags of their own.
+"""
+import json
+import math
+import time
+
+from metrics import flatten, unflatten
+
+MAGIC = b'SYSMREC\x01'
+
+# Floats are stored as integer multiples of 1/FLOAT_SCALE
+FLOAT_SCALE = 1000
+
+KEYFRAME_INTERVAL = 60
+
+FLAG_KEYFRAME = 1
+
+# Leaf value tags
+TAG_REMOVED = 0
+TAG_INT = 1
+TAG_FLOAT = 2
+TAG_TEXT = 3
+TAG_NONE = 4
+TAG_TRUE = 5
+TAG_FALSE = 6
+TAG_EMPTY_DICT = 7
+TAG_EMPTY_LIST = 8
+TAG_NAN = 9
+TAG_INF = 10
+TAG_NEG_INF = 11
+
+# Tags whose value is fixed (no payload in the frame)
+_CONSTANTS = {
+    TAG_NONE: None, TAG_TRUE: True, TAG_FALSE: False,
+    TAG_NAN: math.nan, TAG_INF: math.inf, TAG_NEG_INF: -math.inf,
+}
+
+def write_varint(out, value):
+    """Append an unsigned LEB128 varint to bytearray out"""
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, pos):
+    """Decode an unsigned varint at pos; returns (value, new pos)"""
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+def zigzag(value):
+    """Signed -> unsigned so small negatives stay short"""
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+def unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+def _write_text(out, text):
+    raw = text.encode('utf-8')
+    write_varint(out, len(raw))
+    out += raw
+
+def _read_text(data, pos):
+    length, pos = read_varint(data, pos)
+    return bytes(data[pos:pos + length]).decode('utf-8'), pos + length
+
+def _classify(value):
+    """Leaf -> (tag, integer or text payload)"""
+    if value is None:
+        return TAG_NONE, None
+    if value is True:
+        return TAG_TRUE, None
+    if value is False:
+        return TAG_FALSE, None
+    if isinstance(value, int):
+        return TAG_INT, value
+    if isinstance(value, float):
+        if math.isnan(value):
+            return TAG_NAN, None
+        if math.isinf(value):
+            return (TAG_INF if value > 0 else TAG_NEG_INF), None
+        return TAG_FLOAT, round(value * FLOAT_SCALE)
+    if isinstance(value, dict):
+        return TAG_EMPTY_DICT, None     # flatten() only leaves empty containers
+    if isinstance(value, list):
+        return TAG_EMPTY_LIST, None
+    return TAG_TEXT, str(value)
+
+def _value(tag, payload):
+    """(tag, payload) -> leaf value"""
+    if tag == TAG_FLOAT:
+        return payload / FLOAT_SCALE
+    if tag == TAG_EMPTY_DICT:
+        return {}
+    if tag == TAG_EMPTY_LIST:
+        return []
+    if tag in _CONSTANTS:
+        return _CONSTANTS[tag]
+    return payload
+
+class SnapshotEncoder:
+    """Turn successive snapshots into frames"""
+    
+    def __init__(self):
+        self.names = {}     # leaf name -> id
+        self.state = {}     # leaf id -> (tag, payload) last sent
+        self.seqs = {}      # snapshot key -> last recorded seq
+        self.frames = 0
+        self._last_time = None
+    
+    def encode(self, snapshot, timestamp):
+        """
+        Frame for snapshot taken at monotonic timestamp
+        Only keys whose seq changed are re-flattened; the others keep
+        their previous leaves.
+        """
+        keyframe = self.frames % KEYFRAME_INTERVAL == 0
+        updated = []
+        leaves = {}
+        for key in snapshot:
+            seq = snapshot.seq(key) if hasattr(snapshot, 'seq') else None
+            if seq is None or seq != self.seqs.get(key):
+                self.seqs[key] = seq
+                updated.append(key)
+            flatten(key, snapshot[key], leaves, numeric=False)
+        
+        new_names = []
+        for name in list(leaves) + updated:
+            if name not in self.names:
+                self.names[name] = len(self.names)
+                new_names.append(name)
+        
+        entries = bytearray()
+        count = 0
+        current = {}
+        for name, value in leaves.items():
+            leaf = self.names[name]
+            tag, payload = _classify(value)
+            current[leaf] = (tag, payload)
+            previous = None if keyframe else self.state.get(leaf)
+            if previous == (tag, payload):
+                continue
+            write_varint(entries, leaf)
+            entries.append(tag)
+            if tag in (TAG_INT, TAG_FLOAT):
+                base = previous[1] if previous is not None and previous[0] == tag else 0
+                write_varint(entries, zigzag(payload - base))
+            elif tag == TAG_TEXT:
+                _write_text(entries, payload)
+            count += 1
+        if not keyframe:
+            for leaf in self.state.keys() - current.keys():
+                write_varint(entries, leaf)
+                entries.append(TAG_REMOVED)
+                count += 1
+        self.state = current
+        
+        elapsed = 0 if self._last_time is None else timestamp - self._last_time
+        self._last_time = timestamp
+        
+        frame = bytearray()
+        frame.append(FLAG_KEYFRAME if keyframe else 0)
+        write_varint(frame, max(0, round(elapsed * 1000)))
+        write_varint(frame, len(new_names))
+        for name in new_names:
+            _write_text(frame, name)
+        write_varint(frame, len(updated))
+        for key in updated:
+            write_varint(frame, self.names[key])
+        write_varint(frame, count)
+        frame += entries
+        self.frames += 1
+        return bytes(frame)
+
+class SnapshotDecoder:
+    """Rebuild snapshot values from successive frames"""
+    
+    def __init__(self):
+        self.names = []
+        self.state = {}     # leaf id -> (tag, payload)
+        self.time = 0.0     # seconds since the first frame
+    
+    def decode(self, frame):
+        """Apply frame; returns (seconds since first frame, data, updated keys)"""
+        elapsed, updated = self.apply(frame)
+        return elapsed, self.data(), updated
+    
+    def apply(self, frame):
+        """
+        Update the leaf state from frame without rebuilding the values
+        Returns (seconds since first frame, updated keys).
+        """
+        pos = 1
+        if frame[0] & FLAG_KEYFRAME:
+            self.state = {}
+        elapsed_ms, pos = read_varint(frame, pos)
+        self.time += elapsed_ms / 1000
+        
+        count, pos = read_varint(frame, pos)
+        for _ in range(count):
+            name, pos = _read_text(frame, pos)
+            self.names.append(name)
+        
+        count, pos = read_varint(frame, pos)
+        updated = []
+        for _ in range(count):
+            key, pos = read_varint(frame, pos)
+            updated.append(self.names[key])
+        
+        count, pos = read_varint(frame, pos)
+        state = self.state
+        for _ in range(count):
+            leaf, pos = read_varint(frame, pos)
+            tag = frame[pos]
+            pos += 1
+            if tag == TAG_REMOVED:
+                state.pop(leaf, None)
+            elif tag in (TAG_INT, TAG_FLOAT):
+                delta, pos = read_varint(frame, pos)
+                previous = state.get(leaf)
+                base = previous[1] if previous is not None and previous[0] == tag else 0
+                state[leaf] = (tag, base + unzigzag(delta))
+            elif tag == TAG_TEXT:
+                text, pos = _read_text(frame, pos)
+                state[leaf] = (tag, text)
+            else:
+                state[leaf] = (tag, None)
+        
+        return self.time, updated
+    
+    def data(self):
+        """Current values, shaped like the recorded snapshot"""
+        return unflatten(self._values())
+    
+    def leaf(self, leaf):
+        """Current value of one leaf by id (index into names), None if absent"""
+        entry = self.state.get(leaf)
+        return None if entry is None else _value(*entry)
+    
+    def _values(self):
+        """Current leaves as {name: value}"""
+        names = self.names
+        return {names[leaf]: _value(tag, payload) for leaf, (tag, payload) in self.state.items()}
+
+class SnapshotRecorder:
+    """Append snapshots to a recording file"""
+    
+    def __init__(self, path):
+        """
+        path: recording file (truncated)
+        """
+        self.path = path
+        self.frames = 0
+        self.bytes = 0
+        self._file = open(path, 'wb')
+        self._encoder = SnapshotEncoder()
+        self._header_written = False
+    
+    def write(self, snapshot):
+        """Record one snapshot"""
+        if not self._header_written:
+            intervals = {key: snapshot.interval(key) for key in snapshot
+                         if hasattr(snapshot, 'interval')}
+            header = json.dumps({'started': time.time(), 'intervals': intervals}).encode()
+            out = bytearray(MAGIC)
+            write_varint(out, len(header))
+            out += header
+            self._file.write(out)
+            self._header_written = True
+        
+        timestamp = getattr(snapshot, 'timestamp', None) or time.monotonic()
+        frame = self._encoder.encode(snapshot, timestamp)
+        out = bytearray()
+        write_varint(out, len(frame))
+        out += frame
+        self._file.write(out)
+        self.frames += 1
+        self.bytes += len(out)
+    
+    def close(self):
+        """Flush and close the file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def read_recording(path):
+    """
+    Read a recording
+    Returns (header dict, iterator of (seconds, data, updated keys)).
+    A truncated final frame (e.g. the recorder was killed) is ignored.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path}: not a snapshot recording")
+    length, pos = read_varint(data, len(MAGIC))
+    header = json.loads(data[pos:pos + length])
+    pos += length
+    
+    def frames(pos=pos):
+        view = memoryview(data)
+        decoder = SnapshotDecoder()
+        while pos < len(data):
+            try:
+                length, start = read_varint(data, pos)
+            except IndexError:
+                return
+            if start + length > len(data):
+                return
+            yield decoder.decode(view[start:start + length])
+            pos = start + length
+    
+    return header, frames()
@@ -2,124 +2,224 @@
 System Data Collector
 Centralized data fetching for all system stats
 """
-import psutil
+import os
+import re
 import subprocess
+import shutil
+import threading
+import time
+
+from hwmon import HwmonReader
+from cpu_stat import CPUStatCollector
+from processes import ProcessScanner
+from cgroups import PressureReader, CgroupScanner
+from throughput import DiskStats, NetStats
+from capabilities import Capabilities, Capability
+from instrumentation import Instrumentation
+
+from sampler import Collector, COST_CHEAP, COST_MODERATE, COST_EXPENSIVE
 
 class SystemData:
-    """Static methods for collecting system data"""
+    """Static methods for collecting system data
+    
+    psutil, ctypes and the GPU backend are imported on first use, from
+    the collector threads, so importing this module stays cheap.
+    """
+    
+    # Roots of the procfs and sysfs trees (point at fake trees for testing)
+    proc_root = '/proc'
+    sysfs_root = '/sys'
+    
+    # nvidia-smi binary for the streaming GPU backend
+    nvidia_smi = 'nvidia-smi'
     
-    # Store previous network counters for speed calculation
-    _prev_net_counters = None
-    _prev_net_time = None
+    # gpu_stats and gpus fall due on the same tick: the second one reuses
+    # a backend read younger than this many seconds (well under the
+    # 0.25 s burst interval)
+    gpu_reuse = 0.1
+    _gpu_lock = threading.Lock()
+    _gpu_read = (None, 0.0, [])     # (backend, monotonic time, gpus)
+    
+    @staticmethod
+    def collectors():
+        """Declare every collector with its interval, timeout and cost"""
+        return [
+            Collector('cpu_percents', SystemData.get_cpu_percents, interval=0.5),
+            Collector('cpu_freqs', SystemData.get_cpu_frequencies, interval=1.0),
+            Collector('cpu_temps', SystemData.get_cpu_temperatures, interval=1.0,
+                      cost=COST_MODERATE, enabled=SystemData._has_temperatures),
+            Collector('cpu_package_temp', SystemData.get_cpu_package_temp, interval=1.0,
+                      enabled=SystemData._has_package_temp),
+            Collector('gpu_stats', SystemData.get_gpu_stats, interval=1.0,
+                      enabled=lambda: Capabilities.available('gpu')),
+            Collector('gpus', SystemData.get_gpus, interval=1.0,
+                      enabled=lambda: Capabilities.available('gpu')),
+            Collector('cuda_available', SystemData.get_cuda_status, interval=60.0),
+            Collector('memory_stats', SystemData.get_memory_stats, interval=1.0),
+            Collector('disk_io', SystemData.get_disk_io, interval=1.0,
+                      enabled=lambda: Capabilities.available('diskstats')),
+            Collector('disk_usage', lambda: SystemData.get_disk_usage('/home'),
+                      interval=30.0, cost=COST_MODERATE),
+            Collector('network_stats', SystemData.get_network_stats, interval=1.0,
+                      enabled=lambda: Capabilities.available('network')),
+            Collector('processes', SystemData.get_processes, interval=1.0,
+                      cost=COST_MODERATE, enabled=lambda: Capabilities.available('processes')),
+            Collector('pressure', SystemData.get_pressure, interval=1.0,
+                      enabled=lambda: Capabilities.available('pressure')),
+            Collector('cgroups', SystemData.get_cgroups, interval=2.0,
+                      cost=COST_MODERATE, enabled=lambda: Capabilities.available('cgroups'))
+        ]
     
     @staticmethod
     def get_all():
         """Collect all system data at once"""
-        return {
-            'cpu_percents': SystemData.get_cpu_percents(),
-            'cpu_freqs': SystemData.get_cpu_frequencies(),
-            'cpu_temps': SystemData.get_cpu_temperatures(),
-            'cpu_package_temp': SystemData.get_cpu_package_temp(),
-            'gpu_stats': SystemData.get_gpu_stats(),
-            'cuda_available': SystemData.get_cuda_status(),
-            'memory_stats': SystemData.get_memory_stats(),
-            'disk_io': SystemData.get_disk_io(),
-            'disk_usage': SystemData.get_disk_usage('/home'),
-            'network_stats': SystemData.get_network_stats('eno1')
-        }
+        return {c.key: c.func() for c in SystemData.collectors() if c.is_enabled()}
+    
+    @staticmethod
+    def reprobe():
+        """Rediscover hardware sources (e.g. after GPU or NIC hotplug)"""
+        Capabilities.reprobe()
+    
+    @staticmethod
+    def shutdown():
+        """Release long-lived collector resources (GPU backend, sensor files)"""
+        Capabilities.close_all()
+        SystemData._gpu_read = (None, 0.0, [])
+    
+    @staticmethod
+    def _has_temperatures():
+        """Whether any per-core temperature source exists"""
+        return Capabilities.available('hwmon') or Capabilities.available('sensors')
+    
+    @staticmethod
+    def _has_package_temp():
+        """Whether a hwmon package sensor or a thermal zone exists"""
+        with Capabilities.use('hwmon') as hwmon:
+            if hwmon.handle is not None and hwmon.handle.package_fds:
+                return True
+        return Capabilities.available('thermal_zone')
     
     @staticmethod
     def get_cpu_percents():
-        """Get per-CPU usage percentages"""
-        return psutil.cpu_percent(percpu=True, interval=None)
+        """Get per-CPU usage percentages from /proc/stat"""
+        with Capabilities.use('cpu_stat') as cpu:
+            if cpu.handle is None:
+                import psutil
+                return psutil.cpu_percent(percpu=True, interval=None)
+            return cpu.handle.read_percents()
     
     @staticmethod
     def get_cpu_frequencies():
-        """Get CPU frequencies from /proc/cpuinfo"""
-        freqs = []
-        try:
-            with open('/proc/cpuinfo', 'r') as f:
-                for line in f:
-                    if 'cpu MHz' in line:
-                        freqs.append(float(line.split(':')[1].strip()))
-        except:
-            pass
-        return freqs
+        """Get CPU frequencies from cpufreq (or /proc/cpuinfo)"""
+        with Capabilities.use('cpu_stat') as cpu:
+            if cpu.handle is None:
+                return []
+            try:
+                return cpu.handle.read_frequencies()
+            except Exception as e:
+                Instrumentation.report_error('cpu_freqs', e)
+                return []
     
     @staticmethod
     def get_cpu_temperatures():
-        """Get per-core temperatures from sensors"""
+        """Get per-core temperatures from hwmon (falls back to sensors)"""
+        with Capabilities.use('hwmon') as hwmon:
+            if hwmon.handle is not None:
+                return hwmon.handle.read()
+        return SystemData.get_sensors_temperatures()
+    
+    @staticmethod
+    def get_sensors_temperatures():
+        """Get {package: {core: temp}} by parsing `sensors` output"""
         temps = {}
+        if not Capabilities.available('sensors'):
+            return temps
         try:
-            result = subprocess.run(['sensors'], capture_output=True, text=True, timeout=2)
+            result = subprocess.run(['sensors'], capture_output=True, text=True,
+                                    errors='replace', timeout=2)
+            package = -1
             for line in result.stdout.split('\n'):
-                if 'Core' in line and 'Â°C' in line:
-                    parts = line.split(':')
-                    core_num = int(parts[0].replace('Core', '').strip())
-                    temp_str = parts[1].split('Â°C')[0].strip().replace('+', '')
-                    temps[int(core_num)] = float(temp_str)
-        except:
-            pass
+                # One adapter per package; 'Package id N:' names it when present
+                if line.startswith('coretemp-'):
+                    package += 1
+                    continue
+                match = re.match(r'Package id (\d+):', line)
+                if match:
+                    package = int(match.group(1))
+                    continue
+                # 'Core 0:   +45.0°C  (high = ...)'; ignore the degree sign encoding
+                match = re.match(r'\s*Core\s*(\d+):\s*\+?(-?\d+(?:\.\d+)?)', line)
+                if match:
+                    cores = temps.setdefault(max(package, 0), {})
+                    cores[int(match.group(1))] = float(match.group(2))
+        except Exception as e:
+            Instrumentation.report_error('sensors', e)
         return temps
     
     @staticmethod
     def get_cpu_package_temp():
-        """Get overall CPU package temperature"""
-        try:
-            with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-                return int(f.read().strip()) / 1000
-        except:
-            return None
+        """Get overall CPU package temperature (hwmon package sensor, else thermal zone)"""
+        with Capabilities.use('hwmon') as hwmon:
+            if hwmon.handle is not None:
+                temp = hwmon.handle.read_package()
+                if temp is not None:
+                    return temp
+        with Capabilities.use('thermal_zone') as zone:
+            if zone.handle is None:
+                return None
+            try:
+                return int(os.pread(zone.handle.fileno(), 32, 0)) / 1000
+            except Exception as e:
+                Instrumentation.report_error('cpu_package_temp', e)
+                return None
+    
+    @staticmethod
+    def get_gpus():
+        """Get temperature, power, and memory stats for every GPU"""
+        with Capabilities.use('gpu') as gpu:
+            backend = gpu.handle
+            if backend is None:
+                return []
+            if not backend.available:
+                # The backend gave up (e.g. nvidia-smi keeps exiting): stop collecting
+                gpu.available = False
+                gpu.error = f'{gpu.paths.get("backend")} stopped responding'
+                return []
+            try:
+                return SystemData._read_gpus(backend)
+            except Exception as e:
+                Instrumentation.report_error('gpus', e)
+                return []
+    
+    @staticmethod
+    def _read_gpus(backend):
+        """backend.read(), shared by the GPU collectors of one tick"""
+        with SystemData._gpu_lock:
+            cached, when, gpus = SystemData._gpu_read
+            now = time.monotonic()
+            if cached is not backend or now - when >= SystemData.gpu_reuse:
+                gpus = backend.read()
+                SystemData._gpu_read = (backend, now, gpus)
+            return gpus
     
     @staticmethod
     def get_gpu_stats():
-        """Get GPU temperature, power, and memory from nvidia-smi"""
-        stats = {'temp': None, 'power_draw': None, 'power_limit': None, 
-                 'mem_used': None, 'mem_total': None}
-        try:
-            # Temperature
-            result = subprocess.run(['nvidia-smi', '--query-gpu=temperature.gpu', 
-                                   '--format=csv,noheader,nounits'], 
-                                  capture_output=True, text=True, timeout=2)
-            if result.returncode == 0:
-                stats['temp'] = int(result.stdout.strip())
-            
-            # Power
-            result = subprocess.run(['nvidia-smi', '--query-gpu=power.draw,power.limit', 
-                                   '--format=csv,noheader,nounits'], 
-                                  capture_output=True, text=True, timeout=2)
-            if result.returncode == 0:
-                parts = result.stdout.strip().split(',')
-                stats['power_draw'] = float(parts[0].strip())
-                stats['power_limit'] = float(parts[1].strip())
-            
-            # Memory
-            result = subprocess.run(['nvidia-smi', '--query-gpu=memory.used,memory.total', 
-                                   '--format=csv,noheader,nounits'], 
-                                  capture_output=True, text=True, timeout=2)
-            if result.returncode == 0:
-                parts = result.stdout.strip().split(',')
-                stats['mem_used'] = int(parts[0].strip())
-                stats['mem_total'] = int(parts[1].strip())
-        except:
-            pass
-        return stats
+        """Get GPU temperature, power, and memory for the first GPU"""
+        gpus = SystemData.get_gpus()
+        if gpus:
+            return gpus[0]
+        from gpu import empty_stats
+        return empty_stats()
     
     @staticmethod
     def get_cuda_status():
-        """Check if CUDA is available"""
-        try:
-            import ctypes
-            cudart = ctypes.CDLL('libcudart.so')
-            count = ctypes.c_int()
-            result = cudart.cudaGetDeviceCount(ctypes.byref(count))
-            return result == 0 and count.value > 0
-        except:
-            return False
+        """Check if CUDA is available (probed once, see reprobe())"""
+        return Capabilities.available('cuda')
     
     @staticmethod
     def get_memory_stats():
         """Get memory usage statistics"""
+        import psutil
         try:
             mem = psutil.virtual_memory()
             return {
@@ -128,25 +228,26 @@ class SystemData:
                 'available': mem.available,
                 'percent': mem.percent
             }
-        except:
+        except Exception as e:
+            Instrumentation.report_error('memory_stats', e)
             return {}
     
     @staticmethod
     def get_disk_io():
-        """Get disk I/O statistics"""
-        try:
-            disk_io = psutil.disk_io_counters()
-            # Convert to MB/s (psutil gives bytes)
-            return {
-                'read_mb': disk_io.read_bytes / (1024**2),
-                'write_mb': disk_io.write_bytes / (1024**2)
-            }
-        except:
-            return {}
+        """Get read/write bytes/s, IOPS and utilization per physical disk"""
+        with Capabilities.use('diskstats') as disks:
+            if disks.handle is None:
+                return {}
+            try:
+                return disks.handle.read()
+            except Exception as e:
+                Instrumentation.report_error('disk_io', e)
+                return {}
     
     @staticmethod
     def get_disk_usage(path='/home'):
         """Get disk usage for a path"""
+        import psutil
         try:
             usage = psutil.disk_usage(path)
             return {
@@ -155,56 +256,167 @@ class SystemData:
                 'free': usage.free,
                 'percent': usage.percent
             }
-        except:
+        except Exception as e:
+            Instrumentation.report_error('disk_usage', e)
             return {}
     
     @staticmethod
-    def get_network_stats(interface='eno1'):
-        """Get network speed statistics"""
-        import time
-        
-        try:
-            # Get current counters
-            net_io = psutil.net_io_counters(pernic=True)
-            if interface not in net_io:
-                # Try to find first active interface
-                for iface in net_io.keys():
-                    if iface != 'lo':  # Skip loopback
-                        interface = iface
-                        break
-            
-            if interface not in net_io:
+    def get_processes():
+        """Get the top processes by CPU, RSS and I/O"""
+        with Capabilities.use('processes') as processes:
+            if processes.handle is None:
                 return {}
-            
-            current = net_io[interface]
-            current_time = time.time()
-            
-            # Calculate speed if we have previous data
-            if SystemData._prev_net_counters and SystemData._prev_net_time:
-                time_delta = current_time - SystemData._prev_net_time
-                
-                if time_delta > 0:
-                    bytes_sent_delta = current.bytes_sent - SystemData._prev_net_counters.bytes_sent
-                    bytes_recv_delta = current.bytes_recv - SystemData._prev_net_counters.bytes_recv
-                    
-                    # Convert to KB/s
-                    upload_kbs = (bytes_sent_delta / time_delta) / 1024
-                    download_kbs = (bytes_recv_delta / time_delta) / 1024
-                    
-                    # Store current for next calculation
-                    SystemData._prev_net_counters = current
-                    SystemData._prev_net_time = current_time
-                    
-                    return {
-                        'upload_kbs': upload_kbs,
-                        'download_kbs': download_kbs,
-                        'interface': interface
-                    }
-            
-            # First run - store counters
-            SystemData._prev_net_counters = current
-            SystemData._prev_net_time = current_time
-            return {'upload_kbs': 0, 'download_kbs': 0, 'interface': interface}
-            
-        except:
-            return {}
+            try:
+                return processes.handle.scan()
+            except Exception as e:
+                Instrumentation.report_error('processes', e)
+                return {}
+    
+    @staticmethod
+    def get_pressure():
+        """Get system-wide CPU, memory and I/O pressure (PSI avg10)"""
+        with Capabilities.use('pressure') as pressure:
+            if pressure.handle is None:
+                return {}
+            try:
+                return pressure.handle.read()
+            except Exception as e:
+                Instrumentation.report_error('pressure', e)
+                return {}
+    
+    @staticmethod
+    def get_cgroups():
+        """Get the top cgroups by CPU, memory and I/O"""
+        with Capabilities.use('cgroups') as cgroups:
+            if cgroups.handle is None:
+                return {}
+            try:
+                return cgroups.handle.scan()
+            except Exception as e:
+                Instrumentation.report_error('cgroups', e)
+                return {}
+    
+    @staticmethod
+    def get_network_stats():
+        """Get receive/transmit bytes/s, packets/s and utilization per physical NIC"""
+        with Capabilities.use('network') as network:
+            if network.handle is None:
+                return {}
+            try:
+                return network.handle.read()
+            except Exception as e:
+                Instrumentation.report_error('network_stats', e)
+                return {}
+
+
+# One-time probes for the hardware sources above
+
+@Capabilities.register('cpu_stat')
+def _probe_cpu_stat():
+    """Open /proc/stat for the per-CPU usage collector"""
+    collector = CPUStatCollector(SystemData.proc_root, SystemData.sysfs_root)
+    return Capability('cpu_stat', True, paths={'stat': os.path.join(SystemData.proc_root, 'stat')},
+                      handle=collector)
+
+@Capabilities.register('hwmon')
+def _probe_hwmon():
+    """Find coretemp/k10temp hwmon devices and open their inputs"""
+    root = os.path.join(SystemData.sysfs_root, 'class', 'hwmon')
+    reader = HwmonReader(root)
+    if not reader.available:
+        reader.close()
+        return Capability('hwmon', False, error=f'no CPU sensors under {root}')
+    return Capability('hwmon', True, paths={'root': root}, handle=reader)
+
+@Capabilities.register('sensors')
+def _probe_sensors():
+    """Look for the lm-sensors `sensors` binary"""
+    path = shutil.which('sensors')
+    if path is None:
+        return Capability('sensors', False, error='sensors not installed')
+    return Capability('sensors', True, paths={'binary': path})
+
+@Capabilities.register('thermal_zone')
+def _probe_thermal_zone():
+    """Pick the package thermal zone (x86_pkg_temp, else thermal_zone0)"""
+    root = os.path.join(SystemData.sysfs_root, 'class', 'thermal')
+    try:
+        zones = sorted(z for z in os.listdir(root) if z.startswith('thermal_zone'))
+    except OSError:
+        zones = []
+    if not zones:
+        return Capability('thermal_zone', False, error=f'no thermal zones under {root}')
+    
+    chosen = zones[0] if 'thermal_zone0' not in zones else 'thermal_zone0'
+    for zone in zones:
+        try:
+            with open(os.path.join(root, zone, 'type'), 'r') as f:
+                if f.read().strip() == 'x86_pkg_temp':
+                    chosen = zone
+                    break
+        except OSError:
+            pass
+    
+    path = os.path.join(root, chosen, 'temp')
+    handle = open(path, 'rb', buffering=0)
+    return Capability('thermal_zone', True, paths={'temp': path}, handle=handle)
+
+@Capabilities.register('gpu')
+def _probe_gpu():
+    """Open NVML or a streaming nvidia-smi for GPU telemetry"""
+    from gpu import open_backend
+    backend = open_backend(SystemData.nvidia_smi)
+    if backend.name == 'none':
+        return Capability('gpu', False, error='neither NVML nor nvidia-smi found')
+    return Capability('gpu', True, paths={'backend': backend.name}, handle=backend)
+
+@Capabilities.register('cuda')
+def _probe_cuda():
+    """Load the CUDA runtime once and count devices"""
+    import ctypes
+    cudart = ctypes.CDLL('libcudart.so')
+    count = ctypes.c_int()
+    result = cudart.cudaGetDeviceCount(ctypes.byref(count))
+    if result != 0 or count.value == 0:
+        return Capability('cuda', False, error=f'cudaGetDeviceCount returned {result}')
+    return Capability('cuda', True, paths={'devices': count.value}, handle=cudart)
+
+@Capabilities.register('processes')
+def _probe_processes():
+    """Set up the incremental /proc/[pid] scanner"""
+    if not os.path.isfile(os.path.join(SystemData.proc_root, 'self', 'stat')):
+        return Capability('processes', False,
+                          error=f'no per-process files in {SystemData.proc_root}')
+    return Capability('processes', True, paths={'root': SystemData.proc_root},
+                      handle=ProcessScanner(SystemData.proc_root))
+
+@Capabilities.register('diskstats')
+def _probe_diskstats():
+    """Open /proc/diskstats for the per-disk rate collector"""
+    disks = DiskStats(SystemData.proc_root, SystemData.sysfs_root)
+    path = os.path.join(SystemData.proc_root, 'diskstats')
+    return Capability('diskstats', True, paths={'stats': path}, handle=disks)
+
+@Capabilities.register('network')
+def _probe_network():
+    """Open /proc/net/dev for the per-NIC rate collector"""
+    network = NetStats(SystemData.proc_root, SystemData.sysfs_root)
+    path = os.path.join(SystemData.proc_root, 'net', 'dev')
+    return Capability('network', True, paths={'stats': path}, handle=network)
+
+@Capabilities.register('pressure')
+def _probe_pressure():
+    """Open /proc/pressure/{cpu,memory,io} (kernels with PSI enabled)"""
+    reader = PressureReader(SystemData.proc_root)
+    if not reader.available:
+        return Capability('pressure', False, error='no /proc/pressure (kernel without PSI)')
+    path = os.path.join(SystemData.proc_root, 'pressure')
+    return Capability('pressure', True, paths={'root': path}, handle=reader)
+
+@Capabilities.register('cgroups')
+def _probe_cgroups():
+    """Open the cgroup v2 hierarchy for the per-cgroup scanner"""
+    root = os.path.join(SystemData.sysfs_root, 'fs', 'cgroup')
+    if not os.path.isfile(os.path.join(root, 'cgroup.controllers')):
+        return Capability('cgroups', False, error=f'no cgroup v2 hierarchy at {root}')
+    return Capability('cgroups', True, paths={'root': root}, handle=CgroupScanner(root))
@@ -0,0 +1,119 @@
+"""
+System Graphs Section Component
+Memory, disk and network history graphs beside each other
+"""
+import time
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, Pango
+
+from history_graph import HistoryGraph
+from sampler import Snapshot
+from view_model import ViewModel
+
+# (snapshot key, label, fields of the snapshot value, fixed scale or None)
+GRAPHS = (
+    ('memory_stats', 'mem', ('percent',), 100.0),
+    ('disk_io', 'disk', ('read_bytes', 'write_bytes'), None),
+    ('network_stats', 'net', ('rx_bytes', 'tx_bytes'), None),
+)
+
+def _rate(bytes_per_second):
+    """Compact throughput, e.g. 512K, 1.2G (per second)"""
+    value = bytes_per_second / 1024
+    for unit in ('K', 'M', 'G'):
+        if value < 1000 or unit == 'G':
+            return f"{value:.1f}{unit}" if value < 10 else f"{value:.0f}{unit}"
+        value /= 1024
+
+class SystemGraphs:
+    """History graphs of the values SystemInfo shows as text
+    
+    Each graph keeps its own downsampled series per zoom level (see
+    HistoryGraph), fed once per new sample of its collector; the live
+    view is the 1 minute window.
+    """
+    
+    def __init__(self, width=160, height=54):
+        """
+        width / height: requested size of each graph
+        """
+        self.widget = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=0)
+        self.widget.set_margin_start(10)
+        self.widget.set_margin_end(10)
+        self.widget.set_margin_bottom(10)
+        
+        self._small = Pango.AttrList()
+        self._small.insert(Pango.attr_scale_new(Pango.SCALE_SMALL))
+        
+        self.view_model = ViewModel()
+        self.graphs = {}        # key -> (HistoryGraph, drawing area)
+        self._seqs = {}
+        for key, title, fields, scale in GRAPHS:
+            names = [f'{key}.{field}' for field in fields]
+            graph = HistoryGraph(names, scale=scale, columns=width)
+            
+            drawing_area = Gtk.DrawingArea()
+            drawing_area.set_size_request(width, height)
+            drawing_area.connect("draw", graph.draw)
+            
+            label = Gtk.Label(label=title)
+            label.set_attributes(self._small)
+            label.set_halign(Gtk.Align.START)
+            label.set_valign(Gtk.Align.START)
+            label.set_margin_start(3)
+            label.set_margin_top(2)
+            self.view_model.bind(
+                key, label.set_text,
+                lambda values, title=title, scale=scale: self._format_label(title, scale, values))
+            
+            overlay = Gtk.Overlay()
+            overlay.add(drawing_area)
+            overlay.add_overlay(label)
+            frame = Gtk.Frame()
+            frame.set_shadow_type(Gtk.ShadowType.ETCHED_IN)
+            frame.add(overlay)
+            self.widget.pack_start(frame, True, True, 0)
+            self.graphs[key] = (graph, drawing_area)
+    
+    @staticmethod
+    def _format_label(title, scale, values):
+        """Title and newest values, e.g. 'net 1.2M/56K'"""
+        if not values or values[0] is None:
+            return title
+        if scale is not None:
+            return f"{title} {values[0]:.0f}%"
+        return f"{title} " + "/".join(_rate(v or 0) for v in values)
+    
+    def set_zoom(self, zoom):
+        """Show a ZOOM_SPANS window (index); None is the live (1 min) view"""
+        for graph, drawing_area in self.graphs.values():
+            graph.zoom = zoom or 0
+            drawing_area.queue_draw()
+    
+    def prefill(self, store):
+        """Read each zoom window from the store when it is first drawn"""
+        for graph, drawing_area in self.graphs.values():
+            for series in graph.series:
+                series.store = store
+            drawing_area.queue_draw()
+    
+    def update(self, data):
+        """Add new samples to the graphs and refresh the labels"""
+        self.view_model.begin_tick()
+        for key, _, fields, _ in GRAPHS:
+            if key not in data:
+                continue
+            value = data[key] or {}
+            values = tuple(value.get(field) for field in fields)
+            self.view_model.set(key, values)
+            seq = data.seq(key) if isinstance(data, Snapshot) else None
+            if seq is not None and seq == self._seqs.get(key):
+                continue
+            self._seqs[key] = seq
+            age = data.age(key) if isinstance(data, Snapshot) else None
+            graph, drawing_area = self.graphs[key]
+            graph.add(time.time() - (age or 0.0), values)
+            drawing_area.queue_draw()
+        self.view_model.end_tick()
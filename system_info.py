@@ -4,10 +4,31 @@ Displays system stats in tree-style ASCII layout (Conky-inspired)
 """
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk
+from gi.repository import Gtk, Pango
+
+from sampler import Snapshot
+from view_model import ViewModel
+
+# Opacity for values whose collector has fallen behind
+STALE_OPACITY = 0.5
+
+def _rate(bytes_per_second):
+    """Throughput with a readable unit, e.g. '12.3 MB/s'"""
+    if bytes_per_second is None:
+        return "N/A"
+    value = bytes_per_second / 1024
+    for unit in ('KB/s', 'MB/s', 'GB/s'):
+        if value < 1000 or unit == 'GB/s':
+            return f"{value:.1f} {unit}"
+        value /= 1024
 
 class SystemInfo:
-    """System-wide stats in tree format"""
+    """System-wide stats in tree format
+    
+    The tree skeleton (headers, labels and branch characters) is built
+    once as static labels; each value has its own label fed through a
+    ViewModel, so a tick only re-renders the values that changed.
+    """
     
     def __init__(self):
         # Create box directly (no frame for borderless look)
@@ -17,111 +38,175 @@ class SystemInfo:
         self.widget.set_margin_top(5)
         self.widget.set_margin_bottom(10)
         
-        # Single label with monospace font for tree structure
-        self.tree_label = Gtk.Label()
-        self.tree_label.set_halign(Gtk.Align.END)  # Right-align
-        self.tree_label.set_justify(Gtk.Justification.RIGHT)
-        self.tree_label.set_line_wrap(False)
-        self.tree_label.set_selectable(False)
+        # Monospace font shared by every label of the tree
+        self._font = Pango.AttrList()
+        self._font.insert(Pango.attr_font_desc_new(
+            Pango.FontDescription.from_string("Ubuntu Mono 10")))
         
-        self.widget.pack_start(self.tree_label, False, False, 0)
+        self.view_model = ViewModel()
+        self._build_tree()
+    
+    def _label(self, text=""):
+        """Create a monospace tree label"""
+        label = Gtk.Label(label=text)
+        label.set_attributes(self._font)
+        label.set_line_wrap(False)
+        label.set_selectable(False)
+        return label
+    
+    def _add_static(self, text):
+        """Add a skeleton-only line (set once, never updated)"""
+        label = self._label(text)
+        label.set_halign(Gtk.Align.END)  # Right-align
+        self.widget.pack_start(label, False, False, 0)
+    
+    def _add_value(self, name, tail, formatter, width=12):
+        """Add a line with a dynamic value followed by a static tail
+        name: view model field name
+        tail: static label and branch characters after the value
+        formatter: raw value -> display text
+        width: right-aligned width of the value
+        """
+        row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=0)
+        row.set_halign(Gtk.Align.END)  # Right-align
+        value_label = self._label()
+        row.pack_start(value_label, False, False, 0)
+        row.pack_start(self._label(tail), False, False, 0)
+        self.widget.pack_start(row, False, False, 0)
+        
+        self.view_model.bind(
+            name, value_label.set_text,
+            lambda raw: f"{formatter(raw):>{width}}",
+            lambda stale: value_label.set_opacity(STALE_OPACITY if stale else 1.0))
     
-    def _format_line(self, value, label, branch):
-        """Format a line with proper alignment
-        value: right-aligned value (e.g., '67°C', '45.2%')
+    @staticmethod
+    def _tail(label, branch):
+        """Static part of a line
         label: the label (e.g., 'cpu', 'used')
         branch: the tree branch characters (e.g., '─┤   │   │')
         """
-        return f"{value:>12}  {label:<3} {branch}"
+        return f"  {label:<3} {branch}"
     
-    def update(self, data):
-        """Update system info with tree structure"""
-        cpu_temp = data.get('cpu_package_temp')
-        gpu = data.get('gpu_stats', {})
-        cuda = data.get('cuda_available', False)
-        mem = data.get('memory_stats', {})
-        disk_io = data.get('disk_io', {})
-        disk_usage = data.get('disk_usage', {})
-        net = data.get('network_stats', {})
-        
-        # Build tree structure
-        lines = []
+    def _build_tree(self):
+        """Build the static tree skeleton and the value labels"""
+        tail = self._tail
         
         # Header
-        lines.append("                  ───────────┐")
-        lines.append("                             │")
-        lines.append("                    system ──┤")
+        self._add_static("                  ───────────┐")
+        self._add_static("                             │")
+        self._add_static("                    system ──┤")
         
         # Temperatures
-        lines.append("               Temperatures ─┤   │")
+        self._add_static("               Temperatures ─┤   │")
+        self._add_value('cpu_temp', tail("cpu", "─┤   │   │"),
+                        lambda t: f"{t:.0f}°C " if t else "N/A")
+        self._add_value('gpu_temp', tail("gpu", "─┘   │   │"),
+                        lambda t: f"{t}°C " if t else "N/A")
+        self._add_value('cuda', tail("cuda", "─┤   │   │"),
+                        lambda cuda: "yes" if cuda else "no")
         
-        cpu_temp_str = f"{cpu_temp:.0f}°C " if cpu_temp else "N/A"
-        lines.append(self._format_line(cpu_temp_str, "cpu", "─┤   │   │"))
+        # GPU Power
+        self._add_value('gpu_power', " power ─┘   │   │",
+                        lambda p: f"{p[0]:.0f}W/{p[1]:.0f}W" if p[0] and p[1] else "N/A",
+                        width=8)
         
-        gpu_temp_str = f"{gpu.get('temp', 'N/A')}°C " if gpu.get('temp') else "N/A"
-        lines.append(self._format_line(gpu_temp_str, "gpu", "─┘   │   │"))
+        # GPU Memory
+        self._add_value('gpu_mem', tail("vram", "─┤   │   │"),
+                        lambda m: f"{m[0]}M/{m[1]}M" if m[0] and m[1] else "N/A")
         
-        cuda_str = "yes" if cuda else "no"
-        lines.append(self._format_line(cuda_str, "cuda", "─┤   │   │"))
+        self._add_static(" │   │   │")
+        self._add_static("     │   │")
         
-        # GPU Power
-        if gpu.get('power_draw') and gpu.get('power_limit'):
-            power_str = f"{gpu['power_draw']:.0f}W/{gpu['power_limit']:.0f}W"
-        else:
-            power_str = "N/A"
-        lines.append(f"{power_str:>8} power ─┘   │   │")
+        # Memory
+        self._add_static("                    Memory ──┤   │")
+        self._add_value('mem_percent', tail("used", "─┤   │   │"),
+                        lambda p: f"{p:.1f}%" if p is not None else "N/A")
+        self._add_value('mem_used', tail("", "─┘   │   │"),
+                        lambda m: f"{m[0] / (1024**3):.1f}G/{m[1] / (1024**3):.1f}G "
+                        if m[1] else "N/A")
         
-        # GPU Memory
-        if gpu.get('mem_used') and gpu.get('mem_total'):
-            gpu_mem_str = f"{gpu['mem_used']}M/{gpu['mem_total']}M"
-        else:
-            gpu_mem_str = "N/A"
-        lines.append(self._format_line(gpu_mem_str, "vram", "─┤   │   │"))
+        self._add_static("                             │   │")
         
-        lines.append(" │   │   │")
-        lines.append("     │   │")
+        # Disk
+        self._add_static("                Disk Usage ──┘   │")
+        self._add_value('disk_read', tail(" read", "─┤       │"), _rate)
+        self._add_value('disk_write', tail("write", "─┤       │"), _rate)
+        self._add_value('disk_util', tail(" busy", "─┤       │"),
+                        lambda p: f"{p:.0f}%" if p is not None else "N/A")
+        self._add_value('disk_used', tail("/home", "─┤       │"),
+                        lambda u: f"{u[0] / (1024**3):.0f}G/{u[1] / (1024**3):.0f}G"
+                        if u[1] else "N/A")
+        self._add_value('disk_percent', tail("", "─┘       │"),
+                        lambda p: f"{p:.1f}%  " if p is not None else "N/A")
+        
+        self._add_static("                             │")
+        
+        # Network
+        self._add_static("                   Network ──┘")
+        self._add_value('net_down', tail("download", "─┤    "), _rate)
+        self._add_value('net_up', tail("upload", "─┘    "),
+                        lambda bps: f"{_rate(bps)}  " if bps is not None else "N/A")
+    
+    @staticmethod
+    def _is_stale(data, key):
+        """Whether the snapshot value for key is older than its cadence"""
+        return isinstance(data, Snapshot) and data.is_stale(key)
+    
+    @staticmethod
+    def _ready(data, key):
+        """Whether to show key: it was collected, or startup is over
+        
+        While the first collection round is in flight (Snapshot.warm is
+        false) missing values keep their blank label; afterwards a
+        missing value means the source is unavailable and shows N/A.
+        """
+        return key in data or getattr(data, 'warm', True)
+    
+    def update(self, data):
+        """Push changed values into the tree"""
+        stale = {key: self._is_stale(data, key) for key in data}
+        ready = self._ready
+        
+        vm = self.view_model
+        vm.begin_tick()
+        
+        # Temperatures
+        if ready(data, 'cpu_package_temp'):
+            vm.set('cpu_temp', data.get('cpu_package_temp'),
+                   stale.get('cpu_package_temp', False))
+        if ready(data, 'gpu_stats'):
+            gpu = data.get('gpu_stats') or {}
+            vm.set('gpu_temp', gpu.get('temp'), stale.get('gpu_stats', False))
+            vm.set('gpu_power', (gpu.get('power_draw'), gpu.get('power_limit')),
+                   stale.get('gpu_stats', False))
+            vm.set('gpu_mem', (gpu.get('mem_used'), gpu.get('mem_total')),
+                   stale.get('gpu_stats', False))
+        if ready(data, 'cuda_available'):
+            vm.set('cuda', data.get('cuda_available', False))
         
         # Memory
-        lines.append("                    Memory ──┤   │")
-        if mem:
-            mem_percent = mem.get('percent', 0)
-            lines.append(self._format_line(f"{mem_percent:.1f}%", "used", "─┤   │   │"))
-            
-            mem_used_gb = mem.get('used', 0) / (1024**3)
-            mem_total_gb = mem.get('total', 0) / (1024**3)
-            lines.append(self._format_line(f"{mem_used_gb:.1f}G/{mem_total_gb:.1f}G ", "", "─┘   │   │"))
-        else:
-            lines.append(self._format_line("N/A", "", "─┘   │   │"))
-        
-        lines.append("                             │   │")
+        if ready(data, 'memory_stats'):
+            mem = data.get('memory_stats') or {}
+            vm.set('mem_percent', mem.get('percent'), stale.get('memory_stats', False))
+            vm.set('mem_used', (mem.get('used', 0), mem.get('total', 0)),
+                   stale.get('memory_stats', False))
         
         # Disk
-        lines.append("                Disk Usage ──┘   │")
-        if disk_io:
-            read_mb = disk_io.get('read_mb', 0)
-            write_mb = disk_io.get('write_mb', 0)
-            lines.append(self._format_line(f"{read_mb:.1f}M", " read", "─┤       │"))
-            lines.append(self._format_line(f"{write_mb:.1f}M", "write", "─┤       │"))
-        
-        if disk_usage:
-            used_gb = disk_usage.get('used', 0) / (1024**3)
-            total_gb = disk_usage.get('total', 0) / (1024**3)
-            percent = disk_usage.get('percent', 0)
-            lines.append(self._format_line(f"{used_gb:.0f}G/{total_gb:.0f}G", "/home", "─┤       │"))
-            lines.append(self._format_line(f"{percent:.1f}%  ", "", "─┘       │"))
-        
-        lines.append("                             │")
+        if ready(data, 'disk_io'):
+            disk_io = data.get('disk_io') or {}
+            vm.set('disk_read', disk_io.get('read_bytes'), stale.get('disk_io', False))
+            vm.set('disk_write', disk_io.get('write_bytes'), stale.get('disk_io', False))
+            vm.set('disk_util', disk_io.get('util'), stale.get('disk_io', False))
+        if ready(data, 'disk_usage'):
+            disk_usage = data.get('disk_usage') or {}
+            vm.set('disk_used', (disk_usage.get('used', 0), disk_usage.get('total', 0)),
+                   stale.get('disk_usage', False))
+            vm.set('disk_percent', disk_usage.get('percent'), stale.get('disk_usage', False))
         
         # Network
-        lines.append("                   Network ──┘")
-        if net:
-            down_kbs = net.get('download_kbs', 0)
-            up_kbs = net.get('upload_kbs', 0)
-            lines.append(self._format_line(f"{down_kbs:.1f} KB/s", "download", "─┤    "))
-            lines.append(self._format_line(f"{up_kbs:.1f} KB/s  ", "upload", "─┘    "))
-        else:
-            lines.append(self._format_line("N/A", "", "─┘"))
-        
-        # Set the text with monospace markup (large size for readability)
-        tree_text = '\n'.join(lines)
-        self.tree_label.set_markup(f'<span font_desc="Ubuntu Mono 10">{tree_text}</span>')
\ No newline at end of file
+        if ready(data, 'network_stats'):
+            net = data.get('network_stats') or {}
+            vm.set('net_down', net.get('rx_bytes'), stale.get('network_stats', False))
+            vm.set('net_up', net.get('tx_bytes'), stale.get('network_stats', False))
+        
+        vm.end_tick()
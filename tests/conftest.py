@@ -0,0 +1,29 @@
+"""
+Test Configuration
+Make the repository modules and the tools/ fixture generators importable
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'tools'))
+
+@pytest.fixture
+def fake_host(tmp_path, monkeypatch):
+    """SystemData pointed at a generated 8-thread host; yields (proc_root, sysfs_root)"""
+    import psutil
+    from fakefs import make_tree
+    from system_data import SystemData
+    
+    proc_root, sysfs_root = make_tree(str(tmp_path), 8)
+    SystemData.shutdown()
+    monkeypatch.setattr(SystemData, 'proc_root', proc_root)
+    monkeypatch.setattr(SystemData, 'sysfs_root', sysfs_root)
+    monkeypatch.setattr(SystemData, 'nvidia_smi', os.path.join(str(tmp_path), 'no-nvidia-smi'))
+    monkeypatch.setattr(psutil, 'PROCFS_PATH', proc_root)
+    yield proc_root, sysfs_root
+    SystemData.shutdown()
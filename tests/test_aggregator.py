@@ -0,0 +1,151 @@
+"""
+Aggregator Tests
+Agent hello, loopback default, shared token and the host / metric name limits
+"""
+import json
+import socket
+import time
+
+import pytest
+
+import aggregator as aggregator_module
+from agent import MAGIC, AgentClient, frame, hello
+from aggregator import Aggregator
+from sampler import Sample, Snapshot
+from snapshot_codec import SnapshotEncoder, read_varint
+
+def _wait(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def _send(address, name, data, token=None):
+    """Connect as an agent and send one keyframe; returns the open socket"""
+    sock = socket.create_connection(address)
+    snapshot = Snapshot({key: Sample(value, 0.0, 1) for key, value in data.items()})
+    payload = SnapshotEncoder().encode(snapshot, 0.0)
+    sock.sendall(hello(name, cpus=2, token=token) + frame(payload))
+    return sock
+
+@pytest.fixture
+def serve():
+    started = []
+    
+    def start(**kwargs):
+        server = Aggregator('127.0.0.1', 0, **kwargs)
+        server.start()
+        started.append(server)
+        return server
+    yield start
+    for server in started:
+        server.close()
+
+def test_default_bind_is_loopback():
+    server = Aggregator(port=0)
+    try:
+        assert server.address[0] == '127.0.0.1'
+    finally:
+        server.close()
+
+def test_frames_update_summary(serve):
+    server = serve()
+    sock = _send(server.address, 'a', {'cpu_percents': [10.0, 30.0]})
+    try:
+        assert _wait(lambda: server.frames == 1)
+        assert server.hosts['a'].summary[:2] == (20.0, 30.0)
+    finally:
+        sock.close()
+
+def test_token_required(serve):
+    server = serve(token='s3cret')
+    bad = _send(server.address, 'bad', {'cpu_percents': [1.0]}, token='guess')
+    missing = _send(server.address, 'missing', {'cpu_percents': [1.0]})
+    good = _send(server.address, 'good', {'cpu_percents': [1.0]}, token='s3cret')
+    try:
+        assert _wait(lambda: server.frames == 1 and server.refused == 2)
+        assert list(server.hosts) == ['good']
+    finally:
+        for sock in (bad, missing, good):
+            sock.close()
+
+def test_host_cap_evicts_disconnected(serve, monkeypatch):
+    monkeypatch.setattr(aggregator_module, 'MAX_HOSTS', 2)
+    server = serve()
+    first = _send(server.address, 'first', {'cpu_percents': [1.0]})
+    second = _send(server.address, 'second', {'cpu_percents': [1.0]})
+    assert _wait(lambda: server.frames == 2)
+    # Both connected: no room for a third
+    third = _send(server.address, 'third', {'cpu_percents': [1.0]})
+    assert _wait(lambda: server.refused == 1)
+    assert sorted(server.hosts) == ['first', 'second']
+    # Once one leaves, a new host takes its place
+    first.close()
+    assert _wait(lambda: not server.hosts['first'].connected)
+    fourth = _send(server.address, 'fourth', {'cpu_percents': [1.0]})
+    try:
+        assert _wait(lambda: 'fourth' in server.hosts)
+        assert sorted(server.hosts) == ['fourth', 'second']
+    finally:
+        for sock in (second, third, fourth):
+            sock.close()
+
+def test_too_many_leaves_drops_agent(serve, monkeypatch):
+    monkeypatch.setattr(aggregator_module, 'MAX_LEAVES', 10)
+    server = serve()
+    sock = _send(server.address, 'wide', {'cpu_percents': [1.0] * 64})
+    try:
+        assert _wait(lambda: server.errors == 1)
+        assert not server.hosts['wide'].connected
+        assert server.frames == 0
+    finally:
+        sock.close()
+
+def _header(data):
+    assert data.startswith(MAGIC)
+    length, pos = read_varint(data, len(MAGIC))
+    assert len(data) == pos + length
+    return json.loads(data[pos:])
+
+def test_hello_header():
+    assert _header(hello('a', {'cpu_percents': 0.5}, 8)) == \
+        {'host': 'a', 'intervals': {'cpu_percents': 0.5}, 'cpus': 8}
+    assert _header(hello('a', token='s3cret'))['token'] == 's3cret'
+
+def test_agent_client_streams_with_token(serve):
+    server = serve(token='s3cret')
+    client = AgentClient(*server.address, name='agent-1', send_interval=0.05, token='s3cret')
+    client.start()
+    try:
+        client.publish(Snapshot({'cpu_percents': Sample([50.0, 70.0], 0.0, 1)},
+                                {'cpu_percents': 0.5}))
+        assert _wait(lambda: server.frames >= 1)
+        host = server.hosts['agent-1']
+        assert host.summary[:2] == (60.0, 70.0)
+        assert server.refused == 0
+    finally:
+        client.close()
+
+def test_long_names_truncated(serve):
+    server = serve()
+    sock = _send(server.address, 'x' * 1000, {'cpu_percents': [1.0]})
+    try:
+        assert _wait(lambda: server.frames == 1)
+        assert [len(name) for name in server.hosts] == [aggregator_module.MAX_NAME]
+    finally:
+        sock.close()
+
+def test_silent_connection_dropped(serve, monkeypatch):
+    monkeypatch.setattr(aggregator_module, 'HELLO_TIMEOUT', 0.2)
+    server = serve()
+    sock = socket.create_connection(server.address)
+    try:
+        assert _wait(lambda: server.errors == 1)
+        assert not server.hosts
+        # The aggregator closed its end
+        sock.settimeout(2.0)
+        assert sock.recv(1) == b''
+    finally:
+        sock.close()
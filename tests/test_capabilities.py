@@ -0,0 +1,110 @@
+"""
+Capability Registry Tests
+Probes cached until reprobed, reprobing while collectors read, disabled sources in get_all()
+"""
+import os
+import shutil
+
+from capabilities import Capabilities, Capability
+from instrumentation import Instrumentation
+from system_data import SystemData
+
+class Handle:
+    def __init__(self):
+        self.closed = False
+    
+    def close(self):
+        self.closed = True
+
+def test_reprobe_waits_for_readers():
+    handles = []
+    
+    @Capabilities.register('test_source')
+    def probe():
+        handles.append(Handle())
+        return Capability('test_source', True, handle=handles[-1])
+    
+    try:
+        with Capabilities.use('test_source') as capability:
+            Capabilities.reprobe('test_source')
+            assert not capability.handle.closed
+            # New readers get a fresh probe while the old handle is held
+            with Capabilities.use('test_source') as fresh:
+                assert fresh is not capability
+        assert handles[0].closed
+        assert not handles[1].closed
+        
+        Capabilities.reprobe('test_source')
+        assert handles[1].closed
+    finally:
+        Capabilities.reprobe('test_source')
+        del Capabilities._probes['test_source']
+
+def test_get_all_skips_disabled_sources(fake_host):
+    _, sysfs_root = fake_host
+    shutil.rmtree(os.path.join(sysfs_root, 'class', 'thermal'))
+    # Drop the hwmon package sensor too, leaving no package temperature
+    for name in ('temp1_label', 'temp1_input'):
+        os.remove(os.path.join(sysfs_root, 'class', 'hwmon', 'hwmon1', name))
+    Instrumentation.errors.clear()
+    
+    data = SystemData.get_all()
+    assert not Capabilities.available('thermal_zone')
+    assert 'cpu_package_temp' not in data
+    assert 'gpus' not in data
+    assert data['cpu_temps']
+    assert len(data['cpu_percents']) == 8
+    assert 'cpu_package_temp' not in Instrumentation.errors
+    assert SystemData.get_cpu_package_temp() is None
+
+def test_package_temp_prefers_hwmon(fake_host):
+    _, sysfs_root = fake_host
+    with open(os.path.join(sysfs_root, 'class', 'hwmon', 'hwmon1', 'temp1_input')) as f:
+        hwmon = int(f.read()) / 1000
+    assert SystemData.get_cpu_package_temp() == hwmon
+    
+    # Without the hwmon package sensor the thermal zone is read
+    for name in ('temp1_label', 'temp1_input'):
+        os.remove(os.path.join(sysfs_root, 'class', 'hwmon', 'hwmon1', name))
+    Capabilities.reprobe('hwmon')
+    assert SystemData.get_cpu_package_temp() == 52.0
+
+def test_failed_probe_runs_once():
+    calls = []
+    
+    @Capabilities.register('test_missing')
+    def probe():
+        calls.append(None)
+        raise OSError('libmissing.so: cannot open shared object file')
+    
+    try:
+        for _ in range(3):
+            assert not Capabilities.available('test_missing')
+        assert len(calls) == 1
+        assert 'libmissing.so' in Capabilities.get('test_missing').error
+        assert Capabilities.summary()['test_missing'] is False
+        
+        Capabilities.reprobe('test_missing')
+        assert not Capabilities.available('test_missing')
+        assert len(calls) == 2
+    finally:
+        Capabilities.reprobe('test_missing')
+        del Capabilities._probes['test_missing']
+
+def test_use_releases_on_error():
+    handle = Handle()
+    Capabilities.register('test_source')(lambda: Capability('test_source', True, handle=handle))
+    try:
+        try:
+            with Capabilities.use('test_source') as capability:
+                assert capability.users == 1
+                raise ValueError('bad reading')
+        except ValueError:
+            pass
+        assert capability.users == 0
+        # Nobody holds it, so a reprobe closes the handle at once
+        Capabilities.reprobe('test_source')
+        assert handle.closed
+    finally:
+        Capabilities.reprobe('test_source')
+        del Capabilities._probes['test_source']
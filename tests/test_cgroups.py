@@ -0,0 +1,117 @@
+"""
+Cgroup Scanner Tests
+Every leaf read every scan, a bounded set of open descriptors, tree churn
+"""
+import os
+import resource
+
+import pytest
+
+from cgroups import CgroupScanner
+from fakefs import add_cgroup, make_cgroupfs, remove_cgroup, touch_cgroups
+
+COUNT = 3000
+
+@pytest.fixture
+def tree(tmp_path):
+    """(sysfs_root, cgroup root, leaf paths) of a generated hierarchy"""
+    sysfs_root = str(tmp_path)
+    leaves = make_cgroupfs(sysfs_root, COUNT)
+    return sysfs_root, os.path.join(sysfs_root, 'fs', 'cgroup'), leaves
+
+def _open_fds():
+    return len(os.listdir('/proc/self/fd'))
+
+def test_every_leaf_read_each_scan(tree):
+    sysfs_root, root, leaves = tree
+    scanner = CgroupScanner(root)
+    try:
+        result = scanner.scan(0.0)
+        assert result['count'] >= COUNT
+        assert scanner.reads >= len(leaves)
+        # Load anywhere in the tree shows up on the very next scan
+        busy = leaves[-7:]
+        touch_cgroups(sysfs_root, busy, seed=1)
+        result = scanner.scan(1.0)
+        top = [row for row in result['cpu'] if row['path'] in busy]
+        assert len(top) == scanner.top_n
+        assert all(row['cpu'] > 0 for row in top)
+    finally:
+        scanner.close()
+
+def test_open_descriptors_bounded(tree):
+    _, root, leaves = tree
+    limits = resource.getrlimit(resource.RLIMIT_NOFILE)
+    before = _open_fds()
+    scanner = CgroupScanner(root, max_open_fds=64)
+    try:
+        for tick in range(3):
+            scanner.scan(float(tick))
+            assert scanner.open_fds <= 64
+            # the cgroup.stat of the root stays open too
+            assert _open_fds() - before == scanner.open_fds + 1
+        # Shown cgroups hold the slots
+        shown = [info for info in scanner._shown if info.fds is not None]
+        assert len(shown) == min(len(scanner._shown), 64 // 4)
+    finally:
+        scanner.close()
+    assert _open_fds() == before
+    assert resource.getrlimit(resource.RLIMIT_NOFILE) == limits
+
+def test_added_and_removed_cgroups(tree):
+    sysfs_root, root, leaves = tree
+    scanner = CgroupScanner(root)
+    try:
+        count = scanner.scan(0.0)['count']
+        # Separate ticks: the fake tree cannot return ENODEV, so only the
+        # descendant count reveals the change
+        add_cgroup(sysfs_root, 'system.slice/new.service')
+        assert scanner.scan(1.0)['count'] == count + 1
+        touch_cgroups(sysfs_root, ['system.slice/new.service'], seed=2)
+        result = scanner.scan(2.0)
+        assert 'system.slice/new.service' in {row['path'] for row in result['cpu']}
+        remove_cgroup(sysfs_root, leaves[0])
+        assert scanner.scan(3.0)['count'] == count
+        assert leaves[0] not in scanner._cgroups
+    finally:
+        scanner.close()
+
+def test_leaf_gaining_children(tree):
+    sysfs_root, root, leaves = tree
+    scanner = CgroupScanner(root)
+    try:
+        count = scanner.scan(0.0)['count']
+        # Only the leaf's own cgroup.stat changes below its parent
+        add_cgroup(sysfs_root, f'{leaves[0]}/child')
+        assert scanner.scan(1.0)['count'] == count + 1
+        assert f'{leaves[0]}/child' in scanner._cgroups
+        assert scanner._cgroups[leaves[0]] not in scanner._leaves()
+    finally:
+        scanner.close()
+
+def test_added_and_removed_in_one_tick(tree):
+    sysfs_root, root, leaves = tree
+    # Read by path, so the removal shows up as a failed open
+    scanner = CgroupScanner(root, max_open_fds=0)
+    try:
+        count = scanner.scan(0.0)['count']
+        remove_cgroup(sysfs_root, leaves[0])
+        add_cgroup(sysfs_root, 'system.slice/new.service')
+        assert scanner.scan(1.0)['count'] == count
+        assert leaves[0] not in scanner._cgroups
+        assert 'system.slice/new.service' in scanner._cgroups
+    finally:
+        scanner.close()
+
+def test_all_leaves_read_by_path(tree):
+    sysfs_root, root, leaves = tree
+    # No descriptor room at all: every cgroup is read by path
+    scanner = CgroupScanner(root, max_open_fds=0)
+    try:
+        scanner.scan(0.0)
+        touch_cgroups(sysfs_root, leaves[:3], seed=3)
+        result = scanner.scan(1.0)
+        assert scanner.open_fds == 0
+        assert {row['path'] for row in result['cpu']} >= set(leaves[:3])
+    finally:
+        scanner.close()
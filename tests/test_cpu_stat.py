@@ -0,0 +1,65 @@
+"""
+CPU Stat Collector Tests
+Per-CPU usage and frequencies keyed by CPU number, with holes and hotplug
+"""
+import os
+import shutil
+
+from cpu_stat import CPUStatCollector
+from fakefs import make_cpu_topology, make_proc_stat
+
+def _write_freq(sysfs_root, cpu, khz):
+    directory = os.path.join(sysfs_root, 'devices', 'system', 'cpu', f'cpu{cpu}', 'cpufreq')
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'scaling_cur_freq'), 'w') as f:
+        f.write(f'{khz}\n')
+
+def _collector(tmp_path, offline=()):
+    proc_root = str(tmp_path / 'proc')
+    sysfs_root = str(tmp_path / 'sys')
+    make_proc_stat(proc_root, 8)
+    make_cpu_topology(sysfs_root, 'arm-biglittle', offline=offline)
+    for cpu in range(8):
+        _write_freq(sysfs_root, cpu, 1000000 + cpu * 100000)
+    return CPUStatCollector(proc_root, sysfs_root), sysfs_root
+
+def test_frequencies_by_cpu_number(tmp_path):
+    collector, sysfs_root = _collector(tmp_path, offline={2})
+    # cpu4 has no cpufreq directory: a hole, not the end of the list
+    shutil.rmtree(os.path.join(sysfs_root, 'devices', 'system', 'cpu', 'cpu4', 'cpufreq'))
+    try:
+        freqs = collector.read_frequencies()
+        assert freqs == [1000.0, 1100.0, None, 1300.0, None, 1500.0, 1600.0, 1700.0]
+    finally:
+        collector.close()
+
+def test_frequencies_follow_hotplug(tmp_path):
+    collector, sysfs_root = _collector(tmp_path, offline={7})
+    try:
+        assert len(collector.read_frequencies()) == 7
+        make_cpu_topology(sysfs_root, 'arm-biglittle')
+        assert collector.read_frequencies()[7] == 1700.0
+    finally:
+        collector.close()
+
+def test_cpuinfo_fallback_keeps_cpu_numbers(tmp_path):
+    proc_root = tmp_path / 'proc'
+    make_proc_stat(str(proc_root), 4)
+    (proc_root / 'cpuinfo').write_text(
+        'processor\t: 0\ncpu MHz\t\t: 1200.000\n\n'
+        'processor\t: 2\ncpu MHz\t\t: 3400.500\n\n')
+    collector = CPUStatCollector(str(proc_root), str(tmp_path / 'sys'))
+    try:
+        assert collector.read_frequencies() == [1200.0, None, 3400.5]
+    finally:
+        collector.close()
+
+def test_percents_by_cpu_number(tmp_path):
+    collector, _ = _collector(tmp_path)
+    try:
+        assert collector.read_percents() == [0.0] * 8
+        percents = collector.read_percents()
+        assert len(percents) == 8
+        assert all(0.0 <= p <= 100.0 for p in percents)
+    finally:
+        collector.close()
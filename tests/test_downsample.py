@@ -0,0 +1,74 @@
+"""
+Downsampling Tests
+LTTB picks, min/max columns, gaps between runs and resampling
+"""
+import math
+
+from downsample import MAX_SAMPLE_GAP, ZoomLevel, ZoomSeries, lttb
+
+# Wall-clock start of the generated series (a whole number of columns)
+T0 = 1_700_000_000.0
+
+def test_lttb_keeps_ends_and_spikes():
+    ts = list(range(1000))
+    vs = [math.sin(t / 50) for t in ts]
+    vs[503] = 25.0
+    picked = lttb(ts, vs, 100)
+    assert len(picked) == 100
+    assert picked[0] == 0 and picked[-1] == 999
+    assert picked == sorted(picked)
+    assert 503 in picked
+    # Nothing to reduce
+    assert lttb(ts[:10], vs[:10], 100) == list(range(10))
+
+def test_columns_hold_min_max_and_a_real_sample():
+    level = ZoomLevel(span=60, columns=6)
+    samples = {T0 + t: float(t % 7) for t in range(60)}
+    for t, value in samples.items():
+        assert level.add(t, value)
+    assert not level.add(T0 + 30, 99.0)     # older than the newest sample
+    
+    runs = level.runs()
+    assert len(runs) == 1 and len(runs[0]) == 6
+    for column, (centre, low, high, line_t, line_v) in enumerate(runs[0]):
+        start = T0 + column * 10
+        assert centre == start + 5
+        values = [v for t, v in samples.items() if start <= t < start + 10]
+        assert (low, high) == (min(values), max(values))
+        if column == 4:
+            # Pending its LTTB pick until the next column completes: the mean
+            assert (line_t, line_v) == (centre, sum(values) / len(values))
+        else:
+            # Picks (and the newest sample) are real samples, not averages
+            assert samples[line_t] == line_v and start <= line_t < start + 10
+
+def test_gap_splits_runs():
+    level = ZoomLevel(span=3600, columns=360)
+    for t in range(0, 300, 5):
+        level.add(T0 + t, 1.0)
+    for t in range(300 + int(MAX_SAMPLE_GAP) + 100, 1000, 5):
+        level.add(T0 + t, 2.0)
+    runs = level.runs()
+    assert len(runs) == 2
+    assert {column[4] for column in runs[0]} == {1.0}
+    assert {column[4] for column in runs[1]} == {2.0}
+
+def test_old_columns_fall_out_of_the_window():
+    level = ZoomLevel(span=60, columns=6)
+    for t in range(200):
+        level.add(T0 + t, float(t))
+    columns = [column for run in level.runs() for column in run]
+    assert len(columns) == 6
+    assert columns[0][1] == 140.0 and columns[-1][2] == 199.0
+
+def test_resampling_keeps_extremes():
+    series = ZoomSeries('cpu', columns=96, spans=(60,))
+    for t in range(60):
+        series.add(T0 + t, 100.0 if t == 17 else 10.0)
+    series.add(T0 + 60, None)    # not collected: ignored
+    narrow = series.level(0, 12)
+    assert narrow.columns == 12
+    assert series.level(0, 12) is narrow
+    columns = [column for run in narrow.runs() for column in run]
+    assert max(high for _, _, high, _, _ in columns) == 100.0
+    assert min(low for _, low, _, _, _ in columns) == 10.0
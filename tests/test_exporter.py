@@ -0,0 +1,88 @@
+"""
+Metrics Exporter Tests
+Snapshot serialization and the scrape endpoint
+"""
+import gzip
+import urllib.error
+import urllib.request
+
+import pytest
+
+from exporter import DEFAULT_HOST, MetricsExporter, parse_address, serialize
+from sampler import Sample, Snapshot
+
+def _lines(data, now=None):
+    return serialize(data, now).decode().split('\n')
+
+def test_serialize_families():
+    lines = _lines({
+        'cpu_percents': [12.5, 100],
+        'cpu_temps': {0: {1: 48.0, 0: 45.0}},
+        'cpu_package_temp': None,
+        'cuda_available': False,
+        'disk_io': {'devices': {'nvme0n1': {'read_bytes': 4096.0, 'util': None}}},
+    })
+    assert '# TYPE sysmon_cpu_usage_percent gauge' in lines
+    assert '# UNIT sysmon_cpu_usage_percent percent' in lines
+    assert 'sysmon_cpu_usage_percent{cpu="0"} 12.5' in lines
+    assert 'sysmon_cpu_usage_percent{cpu="1"} 100' in lines
+    # Sorted by package, then core
+    temps = [line for line in lines if line.startswith('sysmon_cpu_core_temperature_celsius{')]
+    assert temps == ['sysmon_cpu_core_temperature_celsius{package="0",core="0"} 45.0',
+                     'sysmon_cpu_core_temperature_celsius{package="0",core="1"} 48.0']
+    assert 'sysmon_cuda_available 0' in lines
+    assert 'sysmon_disk_read_bytes_per_second{device="nvme0n1"} 4096.0' in lines
+    # Unknown values and empty families are left out entirely
+    assert not any('cpu_package_temperature' in line for line in lines)
+    assert not any('disk_busy_percent' in line for line in lines)
+    assert lines[-2:] == ['# EOF', '']
+
+def test_non_finite_values():
+    lines = _lines({'cpu_percents': [float('nan'), float('inf'), float('-inf')]})
+    assert 'sysmon_cpu_usage_percent{cpu="0"} NaN' in lines
+    assert 'sysmon_cpu_usage_percent{cpu="1"} +Inf' in lines
+    assert 'sysmon_cpu_usage_percent{cpu="2"} -Inf' in lines
+
+def test_label_values_escaped():
+    lines = _lines({'network_stats': {'interfaces': {'we"ird\\nic': {'rx_bytes': 1.0}}}})
+    assert 'sysmon_network_receive_bytes_per_second{interface="we\\"ird\\\\nic"} 1.0' in lines
+
+def test_sample_ages_from_a_snapshot():
+    snapshot = Snapshot({'cpu_percents': Sample([5.0], 100.0, 1)}, {'cpu_percents': 0.5})
+    assert 'sysmon_sample_age_seconds{collector="cpu_percents"} 1.25' in \
+        _lines(snapshot, now=101.25)
+
+def test_parse_address():
+    assert parse_address('9100') == (DEFAULT_HOST, 9100)
+    assert parse_address('0.0.0.0:9100') == ('0.0.0.0', 9100)
+
+@pytest.fixture
+def exporter():
+    exporter = MetricsExporter(port=0)
+    exporter.start()
+    yield exporter
+    exporter.close()
+
+def _get(exporter, path, **headers):
+    host, port = exporter.address
+    request = urllib.request.Request(f'http://{host}:{port}{path}', headers=headers)
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.headers, response.read()
+
+def test_scrapes_serve_the_published_buffer(exporter):
+    exporter.publish({'processes': {'count': 321}})
+    headers, body = _get(exporter, '/metrics')
+    assert headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert b'sysmon_processes 321\n' in body
+    
+    headers, compressed = _get(exporter, '/metrics', **{
+        'Accept': 'application/openmetrics-text', 'Accept-Encoding': 'gzip'})
+    assert headers['Content-Type'].startswith('application/openmetrics-text')
+    assert headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed) == body
+    assert exporter.scrapes == 2
+
+def test_unknown_path(exporter):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        _get(exporter, '/')
+    assert error.value.code == 404
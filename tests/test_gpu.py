@@ -0,0 +1,133 @@
+"""
+GPU Backend Tests
+nvidia-smi stream parsing, restarts and backoff with fake binaries
+"""
+import os
+import time
+
+import pytest
+
+import gpu
+from fakefs import make_fake_bin
+from gpu import SMIStreamBackend, open_backend
+
+LINE = '{index}, {temp}, 30.50, 250.00, 500, 24564'
+
+def _script(tmp_path, name, body):
+    path = tmp_path / name
+    path.write_text('#!/bin/sh\n' + body)
+    path.chmod(0o755)
+    return str(path)
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+@pytest.fixture
+def no_nvml(monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise OSError('no NVML in tests')
+    monkeypatch.setattr(gpu, 'NVMLBackend', unavailable)
+
+def test_parse_line():
+    index, stats = SMIStreamBackend.parse_line('1, 45, 120.25, [N/A], 812, 24564\n')
+    assert index == 1
+    assert stats == {'temp': 45, 'power_draw': 120.25, 'power_limit': None,
+                     'mem_used': 812, 'mem_total': 24564}
+    assert SMIStreamBackend.parse_line('garbage\n') is None
+    assert SMIStreamBackend.parse_line('x, 1, 2, 3, 4, 5\n') is None
+
+def test_stream_from_fake_nvidia_smi(tmp_path, no_nvml):
+    bin_dir = make_fake_bin(str(tmp_path), 1, gpus=3)
+    backend = open_backend(os.path.join(bin_dir, 'nvidia-smi'), loop_ms=50)
+    try:
+        assert backend.name == 'nvidia-smi'
+        assert _wait(lambda: len(backend.read()) == 3)
+        assert all(stats['mem_total'] == 24564 for stats in backend.read())
+    finally:
+        backend.close()
+
+def test_vanished_gpu_drops_out(tmp_path):
+    lines = [LINE.format(index=0, temp=40), LINE.format(index=1, temp=41),
+             LINE.format(index=0, temp=42), LINE.format(index=0, temp=43)]
+    command = _script(tmp_path, 'smi', ''.join(f'echo "{line}"\n' for line in lines)
+                      + 'exec sleep 30\n')
+    backend = SMIStreamBackend(command)
+    try:
+        assert _wait(lambda: [s['temp'] for s in backend.read()] == [43])
+    finally:
+        backend.close()
+
+def test_restart_after_crash(tmp_path):
+    command = _script(tmp_path, 'smi', f'echo "{LINE.format(index=0, temp=40)}"\n')
+    backend = SMIStreamBackend(command)
+    try:
+        assert backend.wait_ready()
+        # Exits after every sample: restarted at once, never given up on
+        assert _wait(lambda: backend.read() is not None and backend.restarts >= 3)
+        assert backend.available
+        assert backend.failures == 0
+    finally:
+        backend.close()
+
+def test_backoff_then_give_up(tmp_path, monkeypatch):
+    monkeypatch.setattr(gpu, 'SMI_RESTART_DELAY', 0.05)
+    command = _script(tmp_path, 'smi', 'exit 1\n')
+    backend = SMIStreamBackend(command)
+    try:
+        assert not backend.wait_ready()
+        starts = []
+        deadline = time.monotonic() + 10
+        while backend.available and time.monotonic() < deadline:
+            backend.read()
+            if not starts or starts[-1][0] != backend.restarts:
+                starts.append((backend.restarts, time.monotonic()))
+            time.sleep(0.005)
+        assert not backend.available
+        assert backend.failures == gpu.SMI_MAX_FAILURES
+        assert backend.restarts == gpu.SMI_MAX_FAILURES - 1
+        # Each wait is about twice the one before
+        gaps = [b[1] - a[1] for a, b in zip(starts, starts[1:])]
+        assert all(later > earlier * 1.5 for earlier, later in zip(gaps, gaps[1:]))
+        assert backend.read() == []
+    finally:
+        backend.close()
+
+def test_probe_needs_output(tmp_path, no_nvml):
+    command = _script(tmp_path, 'nvidia-smi', 'exit 9\n')
+    assert open_backend(command).name == 'none'
+
+def test_gpu_collectors_share_one_read(monkeypatch):
+    from capabilities import Capabilities, Capability
+    from system_data import SystemData
+    
+    class Backend:
+        available = True
+        reads = 0
+        
+        def read(self):
+            self.reads += 1
+            return [{'temp': 60 + self.reads}]
+        
+        def close(self):
+            pass
+    
+    backend = Backend()
+    monkeypatch.setitem(Capabilities._probes, 'gpu',
+                        lambda: Capability('gpu', True, handle=backend))
+    Capabilities.reprobe('gpu')
+    try:
+        assert SystemData.get_gpus() == [{'temp': 61}]
+        assert SystemData.get_gpu_stats() == {'temp': 61}
+        assert backend.reads == 1
+        # The next tick reads again
+        time.sleep(SystemData.gpu_reuse)
+        assert SystemData.get_gpu_stats() == {'temp': 62}
+        assert backend.reads == 2
+    finally:
+        Capabilities.reprobe('gpu')
+        SystemData.shutdown()
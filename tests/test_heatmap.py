@@ -0,0 +1,41 @@
+"""
+CPU Heatmap Tests
+Palette endpoints and one pixel per thread and column
+"""
+import sys
+
+import pytest
+
+pytest.importorskip('gi')
+cairo = pytest.importorskip('cairo')
+
+from cpu_arch import CPUArchitecture
+from cpu_heatmap import PALETTE, CPUHeatmap
+from cpu_topology import CPUTopology
+from fakefs import make_cpu_topology
+
+def _argb(pixel):
+    return tuple(pixel[::-1] if sys.byteorder == 'little' else pixel)
+
+def test_palette_runs_black_orange_white():
+    assert len(PALETTE) == 101
+    assert _argb(PALETTE[0]) == (255, 0, 0, 0)
+    assert _argb(PALETTE[60]) == (255, 255, 163, 0)
+    assert _argb(PALETTE[100]) == (255, 255, 255, 255)
+
+def test_newest_column_painted_per_thread(tmp_path, monkeypatch):
+    make_cpu_topology(str(tmp_path), 'ryzen-5950x')
+    monkeypatch.setattr(CPUArchitecture, '_topology', CPUTopology(str(tmp_path)))
+    # The pixel buffer alone, without the GTK widgets
+    heatmap = CPUHeatmap.__new__(CPUHeatmap)
+    heatmap.max_points = 8
+    heatmap.history = None
+    heatmap._stride = cairo.ImageSurface.format_stride_for_width(cairo.FORMAT_ARGB32, 8)
+    heatmap._layout()
+    
+    heatmap.history.push([float(cpu) for cpu in range(heatmap.history.rows)])
+    heatmap._paint(1)
+    newest = (heatmap.history.cursor - 1) % heatmap.max_points
+    for row, cpu in enumerate(heatmap.row_threads):
+        offset = row * heatmap._stride + newest * 4
+        assert bytes(heatmap._pixels[offset:offset + 4]) == PALETTE[cpu]
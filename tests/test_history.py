@@ -0,0 +1,47 @@
+"""
+History Ring Tests
+Fixed wall-clock columns whatever the sampling rate
+"""
+from history import HistoryRing
+
+def _values(ring):
+    return list(ring.row(0))
+
+def test_push_keeps_window_contiguous():
+    ring = HistoryRing(1, 4)
+    for value in range(6):
+        ring.push((value,))
+    assert _values(ring) == [2, 3, 4, 5]
+    assert ring.latest(0) == 5
+
+def test_burst_samples_average_into_one_column():
+    ring = HistoryRing(1, 4, slot=0.5)
+    assert ring.push_at(10.0, (10,)) == 1
+    assert ring.push_at(10.25, (30,)) == 0
+    assert ring.count == 1
+    assert ring.latest(0) == 20
+
+def test_idle_gap_repeats_the_value():
+    ring = HistoryRing(1, 4, slot=0.5)
+    ring.push_at(10.0, (10,))
+    assert ring.push_at(11.0, (40,)) == 2
+    assert _values(ring)[-3:] == [10, 40, 40]
+
+def test_same_time_scale_at_any_rate():
+    # 2 s of samples at 0.25 s, 0.5 s and 1 s intervals: always 4 columns
+    for interval in (0.25, 0.5, 1.0):
+        ring = HistoryRing(1, 50, slot=0.5)
+        steps = int(2.0 / interval)
+        for step in range(steps + 1):
+            ring.push_at(100.0 + step * interval, (50,))
+        assert ring.count == 5
+
+def test_old_and_amended_samples_bump_revision():
+    ring = HistoryRing(2, 4, slot=0.5)
+    ring.push_at(10.0, (1, 2))
+    revision = ring.revision
+    assert ring.push_at(9.0, (5, 5)) == 0
+    assert ring.revision == revision
+    ring.push_at(10.1, (3,))
+    assert ring.revision == revision + 1
+    assert list(ring.row(1))[-1] == 1.0
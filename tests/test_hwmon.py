@@ -0,0 +1,83 @@
+"""
+Hwmon Reader Tests
+Per-package core temperature mapping on fixture sysfs trees
+"""
+import os
+
+import pytest
+
+from cpu_topology import CPUTopology
+from fakefs import MACHINES, make_cpu_topology, make_machine_hwmon
+from hwmon import HwmonReader
+
+def _open_fds():
+    return len(os.listdir('/proc/self/fd'))
+
+@pytest.mark.parametrize('machine', ['i9-14900k', 'ryzen-5950x', 'xeon-6248-2s', 'epyc-9654-2s'])
+def test_every_thread_gets_its_own_core_temperature(tmp_path, machine):
+    sysfs_root = str(tmp_path)
+    threads = make_cpu_topology(sysfs_root, machine)
+    expected = make_machine_hwmon(sysfs_root, machine)
+    topology = CPUTopology(sysfs_root)
+    reader = HwmonReader(os.path.join(sysfs_root, 'class', 'hwmon'))
+    try:
+        temps = reader.read()
+        assert sum(len(cores) for cores in temps.values()) == len(expected)
+        for cpu, (package, core, _) in enumerate(threads):
+            assert topology.core_of(cpu) == (package, core)
+            assert temps[package][core] == expected[package, core]
+    finally:
+        reader.close()
+
+def test_two_socket_cores_do_not_collide(tmp_path):
+    sysfs_root = str(tmp_path)
+    make_cpu_topology(sysfs_root, 'xeon-6248-2s')
+    expected = make_machine_hwmon(sysfs_root, 'xeon-6248-2s', seed=3)
+    topology = CPUTopology(sysfs_root)
+    reader = HwmonReader(os.path.join(sysfs_root, 'class', 'hwmon'))
+    try:
+        temps = reader.read()
+        # Thread 0 is core 0 of package 0, thread 20 core 0 of package 1
+        assert topology.core_of(0) == (0, 0)
+        assert topology.core_of(20) == (1, 0)
+        assert temps[0][0] == expected[0, 0]
+        assert temps[1][0] == expected[1, 0]
+        assert len(reader.package_fds) == 2
+    finally:
+        reader.close()
+
+def test_replaced_sensor_files_are_closed(tmp_path):
+    root = tmp_path / 'class' / 'hwmon'
+    for device in ('hwmon1', 'hwmon2'):
+        (root / device).mkdir(parents=True)
+        (root / device / 'name').write_text('coretemp\n')
+        (root / device / 'temp1_label').write_text('Package id 0\n')
+        (root / device / 'temp1_input').write_text('50000\n')
+        (root / device / 'temp2_label').write_text('Core 0\n')
+        (root / device / 'temp2_input').write_text('45000\n')
+    before = _open_fds()
+    reader = HwmonReader(str(root))
+    assert _open_fds() - before == len(reader.core_fds) + len(reader.package_fds) == 3
+    reader.close()
+    assert _open_fds() == before
+
+def test_no_cpu_sensors(tmp_path):
+    reader = HwmonReader(str(tmp_path / 'missing'))
+    assert not reader.available
+    assert reader.read() == {}
+    assert reader.read_package() is None
+
+def test_package_sensor_without_cores(tmp_path):
+    # AMD Tctl only: a package temperature, but no per-core readings
+    device = tmp_path / 'class' / 'hwmon' / 'hwmon1'
+    device.mkdir(parents=True)
+    (device / 'name').write_text('k10temp\n')
+    (device / 'temp1_label').write_text('Tctl\n')
+    (device / 'temp1_input').write_text('61500\n')
+    reader = HwmonReader(str(tmp_path / 'class' / 'hwmon'))
+    try:
+        assert not reader.available
+        assert reader.read() == {}
+        assert reader.read_package() == 61.5
+    finally:
+        reader.close()
@@ -0,0 +1,68 @@
+"""
+Instrumentation Tests
+Latency histograms, error and timeout counters, and the text report
+"""
+import time
+
+import pytest
+
+from instrumentation import Instrumentation, LatencyHistogram
+from sampler import Collector, Sampler
+
+@pytest.fixture
+def instrumentation(monkeypatch):
+    """Instrumentation with empty tables, restored afterwards"""
+    for table in ('collectors', 'timings', 'errors', 'timeouts', 'milestones'):
+        monkeypatch.setattr(Instrumentation, table, {})
+    monkeypatch.setattr(Instrumentation, 'enabled', False)
+    return Instrumentation
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for _ in range(90):
+        histogram.record(0.0001)    # 100 us: the bucket below 128 us
+    for _ in range(10):
+        histogram.record(0.05)
+    assert histogram.count == 100
+    assert histogram.max == 0.05
+    assert histogram.mean == pytest.approx((90 * 0.0001 + 10 * 0.05) / 100)
+    assert histogram.percentile(0.5) == 128e-6
+    # Never above the largest recorded duration
+    assert histogram.percentile(0.99) == 0.05
+    assert LatencyHistogram().percentile(0.5) == 0.0
+
+def test_errors_and_timeouts_counted(instrumentation):
+    instrumentation.report_error('gpus', OSError('nvidia-smi exited'))
+    instrumentation.report_error('gpus', ValueError('bad line'))
+    instrumentation.report_timeout('gpus')
+    assert instrumentation.errors['gpus'].count == 2
+    assert instrumentation.errors['gpus'].last == 'ValueError: bad line'
+    assert instrumentation.timeouts == {'gpus': 1}
+    report = instrumentation.report()
+    assert 'error    gpus: 2 (last: ValueError: bad line)' in report
+    assert 'timeout  gpus: 1' in report
+
+def test_milestones_keep_the_first_time(instrumentation):
+    instrumentation.milestone('start')
+    instrumentation.milestone('first_paint')
+    first = instrumentation.milestones['first_paint']
+    instrumentation.milestone('first_paint')
+    assert instrumentation.milestones['first_paint'] == first
+    assert 'startup  first_paint: +' in instrumentation.report()
+
+def test_collector_timing_only_while_enabled(instrumentation):
+    def run(key):
+        done = []
+        sampler = Sampler([Collector(key, lambda: done.append(None), interval=0.05)])
+        sampler.start()
+        deadline = time.monotonic() + 3.0
+        while len(done) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        sampler.stop()
+    
+    run('quiet')
+    assert 'quiet' not in instrumentation.collectors
+    instrumentation.enable()
+    run('timed')
+    assert instrumentation.collectors['timed'].count >= 2
+    assert 'collector' in instrumentation.report()
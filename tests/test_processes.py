@@ -0,0 +1,72 @@
+"""
+Process Scanner Tests
+Ranking freshness, malformed /proc/[pid]/stat handling and scan failures on a fake /proc
+"""
+import os
+
+from fakefs import make_proc_pids, touch_proc_pids
+from processes import ProcessScanner
+
+def _burn(proc_root, pid, jiffies):
+    """Add jiffies of user time to pid's stat line"""
+    path = os.path.join(proc_root, str(pid), 'stat')
+    with open(path) as f:
+        line = f.read()
+    close = line.rfind(')')
+    fields = line[close + 2:].split()
+    fields[11] = str(int(fields[11]) + jiffies)
+    with open(path, 'w') as f:
+        f.write(line[:close + 2] + ' '.join(fields) + '\n')
+
+def test_busy_process_ranked_next_scan(tmp_path):
+    proc_root = str(tmp_path)
+    pids = make_proc_pids(proc_root, 3000)
+    scanner = ProcessScanner(proc_root)
+    scanner.scan(now=0.0)
+    scanner.scan(now=1.0)
+    
+    # An existing process deep in the list starts burning CPU
+    busy = pids[2500]
+    _burn(proc_root, busy, 10**6)
+    result = scanner.scan(now=2.0)
+    assert result['cpu'][0]['pid'] == busy
+    assert scanner.stat_reads == len(pids)
+
+def test_unchanged_processes_keep_ranking(tmp_path):
+    proc_root = str(tmp_path)
+    pids = make_proc_pids(proc_root, 200)
+    scanner = ProcessScanner(proc_root, top_n=3)
+    scanner.scan(now=0.0)
+    touch_proc_pids(proc_root, pids[:3], seed=1)
+    first = scanner.scan(now=1.0)
+    second = scanner.scan(now=2.0)
+    assert {p['pid'] for p in first['rss']} == {p['pid'] for p in second['rss']}
+    assert len(second['cpu']) == 3
+
+def test_malformed_stat_is_skipped(tmp_path):
+    proc_root = str(tmp_path)
+    pids = make_proc_pids(proc_root, 10)
+    scanner = ProcessScanner(proc_root)
+    scanner.scan(now=0.0)
+    for text in ('1 (short) S 1 2\n', '1 (bad) S ' + 'x ' * 30 + '\n'):
+        with open(os.path.join(proc_root, str(pids[0]), 'stat'), 'w') as f:
+            f.write(text)
+        result = scanner.scan(now=1.0)
+        assert result['count'] == len(pids)
+
+def test_scan_failure_reported(fake_host, monkeypatch):
+    from capabilities import Capabilities
+    from instrumentation import Instrumentation
+    from system_data import SystemData
+    
+    proc_root, _ = fake_host
+    make_proc_pids(proc_root, 10)
+    os.symlink('1', os.path.join(proc_root, 'self'))
+    with Capabilities.use('processes') as processes:
+        assert processes.handle is not None
+        def scan():
+            raise PermissionError(13, 'Permission denied', '/proc')
+        monkeypatch.setattr(processes.handle, 'scan', scan)
+    monkeypatch.setattr(Instrumentation, 'errors', {})
+    assert SystemData.get_processes() == {}
+    assert Instrumentation.errors['processes'].count == 1
@@ -0,0 +1,140 @@
+"""
+Sampler Tests
+Snapshots published off the caller's thread, per-collector cadence, sample age and warm-up
+"""
+import threading
+import time
+
+from instrumentation import Instrumentation
+from sampler import Collector, Sample, Sampler, Snapshot, align
+
+def _wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+def test_snapshots_published_from_the_sampler_thread():
+    threads = []
+    snapshots = []
+    
+    def on_snapshot(snapshot):
+        threads.append(threading.current_thread().name)
+        snapshots.append(snapshot)
+    
+    sampler = Sampler([Collector('answer', lambda: 42, interval=0.05)], on_snapshot)
+    sampler.start()
+    try:
+        assert _wait_for(lambda: snapshots)
+    finally:
+        sampler.stop()
+    assert set(threads) == {'sampler'}
+    assert snapshots[0]['answer'] == 42
+    assert sampler.latest()['answer'] == 42
+    # Snapshots are read-only
+    assert not hasattr(snapshots[0], '__setitem__')
+
+def test_stuck_collector_does_not_hold_up_the_others():
+    release = threading.Event()
+    fast = []
+    sampler = Sampler([
+        Collector('stuck', lambda: release.wait(5.0), interval=0.05, timeout=0.1),
+        Collector('fast', lambda: fast.append(None) or len(fast), interval=0.05),
+    ])
+    sampler.start()
+    try:
+        assert _wait_for(lambda: len(fast) >= 5 and sampler.timeouts['stuck'])
+        snapshot = sampler.latest()
+        assert snapshot['fast'] >= 2
+        assert 'stuck' not in snapshot
+    finally:
+        release.set()
+        sampler.stop()
+
+def test_failing_collector_keeps_its_last_value():
+    calls = []
+    
+    def flaky():
+        calls.append(None)
+        if len(calls) > 1:
+            raise OSError('gone')
+        return 'first'
+    
+    sampler = Sampler([Collector('flaky', flaky, interval=0.05)])
+    sampler.start()
+    try:
+        assert _wait_for(lambda: len(calls) >= 3)
+        assert sampler.latest()['flaky'] == 'first'
+        assert Instrumentation.errors['flaky'].last == 'OSError: gone'
+    finally:
+        sampler.stop()
+        Instrumentation.errors.pop('flaky', None)
+
+def test_align_to_the_interval_grid():
+    assert align(10.2, 0.5) == 10.5
+    assert align(10.5, 0.5) == 11.0
+    assert align(59.0, 60.0) == 60.0
+
+def test_snapshot_age_and_staleness():
+    snapshot = Snapshot({'cpu': Sample([1.0], 100.0, 7), 'disk': Sample({}, 90.0, 3)},
+                        {'cpu': 0.5, 'disk': 30.0}, timestamp=100.0)
+    assert snapshot['cpu'] == [1.0]
+    assert snapshot.age('cpu', now=101.0) == 1.0
+    assert snapshot.seq('cpu') == 7
+    assert snapshot.interval('disk') == 30.0
+    # Stale once two refreshes (plus slack) were missed
+    assert not snapshot.is_stale('cpu', now=101.4)
+    assert snapshot.is_stale('cpu', now=101.6)
+    assert not snapshot.is_stale('disk', now=101.6)
+    assert snapshot.age('missing') is None
+    assert snapshot.seq('missing') is None
+    assert not snapshot.is_stale('missing')
+
+def test_collectors_run_on_their_own_cadence():
+    runs = {'fast': 0, 'slow': 0}
+    
+    def counter(key):
+        def collect():
+            runs[key] += 1
+            return runs[key]
+        return collect
+    
+    sampler = Sampler([Collector('fast', counter('fast'), interval=0.05),
+                       Collector('slow', counter('slow'), interval=10.0)])
+    sampler.start()
+    try:
+        assert _wait_for(lambda: runs['fast'] >= 10)
+        snapshot = sampler.latest()
+    finally:
+        sampler.stop()
+    # The slow collector ran once, at startup, and its sample keeps aging
+    assert runs['slow'] == 1
+    assert snapshot.seq('fast') > snapshot.seq('slow')
+    assert snapshot.age('slow') > snapshot.age('fast')
+    assert snapshot.interval('fast') == 0.05
+
+def test_sections_published_as_they_first_report():
+    snapshots = []
+    release = threading.Event()
+    sampler = Sampler([
+        Collector('fast', lambda: 1, interval=10.0),
+        Collector('slow', lambda: release.wait(2.0) and 2, interval=10.0),
+        Collector('absent', lambda: 3, interval=10.0, enabled=lambda: False),
+    ], snapshots.append)
+    sampler.start()
+    try:
+        # The fast section shows before the slow one has reported
+        assert _wait_for(lambda: any('fast' in s for s in snapshots))
+        assert not snapshots[0].warm
+        assert 'slow' not in snapshots[0]
+        release.set()
+        assert _wait_for(lambda: snapshots[-1].warm)
+    finally:
+        release.set()
+        sampler.stop()
+    # A disabled source counts as reported but publishes nothing
+    assert snapshots[-1]['slow'] == 2
+    assert 'absent' not in snapshots[-1]
+    assert sampler.warm
@@ -0,0 +1,36 @@
+"""
+Sampling Policy Tests
+Hidden-window throttling only for collectors nothing else consumes
+"""
+from sampler import Collector
+from sampling_policy import BURST, HIDDEN, SamplingPolicy
+
+def _collectors():
+    return (Collector('cpu_percents', lambda: None, interval=0.5),
+            Collector('processes', lambda: None, interval=1.0))
+
+def test_hidden_throttles_everything_without_consumers():
+    policy = SamplingPolicy()
+    policy.set_visible(False)
+    assert policy.state == HIDDEN
+    assert [policy.interval(c) for c in _collectors()] == [30.0, 30.0]
+
+def test_hidden_keeps_recorded_collectors():
+    policy = SamplingPolicy()
+    policy.set_recorded(['cpu_percents'])
+    policy.set_visible(False)
+    cpu, processes = _collectors()
+    assert policy.interval(cpu) == 0.5
+    assert policy.interval(processes) == 30.0
+
+def test_hidden_recorded_collectors_follow_load():
+    policy = SamplingPolicy()
+    changes = []
+    policy.on_change = lambda: changes.append(policy.load_state)
+    policy.set_recorded(['cpu_percents'])
+    policy.set_visible(False)
+    policy._last_spike = policy._last_change
+    policy._update(policy._last_change)
+    assert policy.state == HIDDEN and policy.load_state == BURST
+    assert changes[-1] == BURST
+    assert policy.interval(_collectors()[0]) == policy.BURST_INTERVAL
@@ -0,0 +1,66 @@
+"""
+Shared-Memory Feed Tests
+Round trip through the seqlocked region and refusal of untrusted feed files
+"""
+import os
+
+import pytest
+
+from sampler import Sample, Snapshot
+from shm_feed import FeedReader, FeedWriter
+
+def _snapshot():
+    samples = {'cpu_percents': Sample([12.5, 80.0], 100.0, 1),
+               'cpu_temps': Sample({0: {0: 45.0}, 1: {0: 90.0}}, 100.0, 2)}
+    return Snapshot(samples, {'cpu_percents': 0.5}, 100.5)
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'feed')
+    writer = FeedWriter(path, size=65536)
+    reader = FeedReader(path)
+    try:
+        assert os.stat(path).st_mode & 0o777 == 0o600
+        writer.publish(_snapshot())
+        snapshot = reader.read()
+        assert snapshot['cpu_temps'] == {0: {0: 45.0}, 1: {0: 90.0}}
+        assert snapshot.interval('cpu_percents') == 0.5
+    finally:
+        reader.close()
+        writer.close()
+    
+    # The next daemon reuses its own feed
+    FeedWriter(path, size=65536).close()
+
+def test_symlink_refused(tmp_path):
+    target = tmp_path / 'elsewhere'
+    target.write_bytes(b'')
+    path = tmp_path / 'feed'
+    path.symlink_to(target)
+    with pytest.raises(RuntimeError):
+        FeedWriter(str(path), size=65536)
+    reader = FeedReader(str(path))
+    assert reader.read() is None
+    assert not reader.attached
+
+def test_shared_file_refused(tmp_path):
+    path = str(tmp_path / 'feed')
+    writer = FeedWriter(path, size=65536)
+    writer.publish(_snapshot())
+    writer.close()
+    os.chmod(path, 0o666)
+    reader = FeedReader(path)
+    assert reader.read() is None
+    assert 'other users' in reader.refused
+
+@pytest.mark.skipif(os.getuid() != 0, reason="needs root to create another user's file")
+def test_foreign_owner_refused(tmp_path):
+    path = str(tmp_path / 'feed')
+    writer = FeedWriter(path, size=65536)
+    writer.publish(_snapshot())
+    writer.close()
+    os.chown(path, 12345, 12345)
+    reader = FeedReader(path)
+    assert reader.read() is None
+    assert 'owned by uid 12345' in reader.refused
+    with pytest.raises(RuntimeError):
+        FeedWriter(path, size=65536)
@@ -0,0 +1,80 @@
+"""
+Snapshot Codec Tests
+Encode/decode round trips, including empty containers and special floats
+"""
+import math
+
+from snapshot_codec import (FLOAT_SCALE, KEYFRAME_INTERVAL, SnapshotDecoder, SnapshotEncoder,
+                            SnapshotRecorder, read_recording, read_varint, unzigzag,
+                            write_varint, zigzag)
+
+def _frames(snapshots):
+    encoder = SnapshotEncoder()
+    decoder = SnapshotDecoder()
+    for index, snapshot in enumerate(snapshots):
+        yield decoder.decode(encoder.encode(snapshot, float(index)))[1]
+
+def test_varint_and_zigzag():
+    for value in (0, 1, -1, 63, -64, 2**40, -2**40, 10**30):
+        out = bytearray()
+        write_varint(out, zigzag(value))
+        decoded, pos = read_varint(out, 0)
+        assert unzigzag(decoded) == value
+        assert pos == len(out)
+
+def test_round_trip():
+    snapshots = [
+        {'cpu_percents': [12.5, 99.999], 'cpu_temps': {0: {0: 45.0, 1: 47.0}, 1: {0: 90.0}},
+         'gpus': [{'temp': 61, 'power_draw': 120.25, 'name': 'RTX'}],
+         'cuda_available': True, 'cpu_package_temp': None,
+         'disk_io': {'nvme0n1': {'read_bytes': 12345678.5, 'util': 3.25}}},
+        {'cpu_percents': [13.0, 0.0], 'cpu_temps': {}, 'gpus': [],
+         'cuda_available': False, 'cgroups': {'cpu': [], 'memory': [], 'io': []},
+         'disk_io': {}},
+        {'cpu_percents': [math.inf, -math.inf], 'cpu_temps': {0: {0: 50.0}}, 'gpus': [],
+         'memory_stats': {'total': 2**40, 'percent': 55.125}},
+    ]
+    for expected, decoded in zip(snapshots, _frames(snapshots)):
+        assert decoded == expected
+
+def test_nan():
+    decoded = list(_frames([{'power': math.nan}, {'power': 1.5}, {'power': math.nan}]))
+    assert math.isnan(decoded[0]['power'])
+    assert decoded[1]['power'] == 1.5
+    assert math.isnan(decoded[2]['power'])
+
+def test_empty_containers_are_fresh_objects():
+    first, second = _frames([{'gpus': [], 'cpu_temps': {}}] * 2)
+    first['gpus'].append(1)
+    assert second['gpus'] == []
+
+def test_float_quantization():
+    value = 33.3333333
+    decoded = list(_frames([{'cpu_percents': [value]}]))[0]
+    assert abs(decoded['cpu_percents'][0] - value) <= 0.5 / FLOAT_SCALE
+
+def test_keyframes_repeat_every_leaf():
+    snapshots = [{'cpu_percents': [float(i % 3)], 'gpus': []}
+                 for i in range(KEYFRAME_INTERVAL + 2)]
+    encoder = SnapshotEncoder()
+    frames = [encoder.encode(s, float(i)) for i, s in enumerate(snapshots)]
+    # Decoding from the keyframe alone restores the whole snapshot
+    decoder = SnapshotDecoder()
+    decoder.names = list(encoder.names)
+    assert decoder.decode(frames[KEYFRAME_INTERVAL])[1] == snapshots[KEYFRAME_INTERVAL]
+
+def test_recording_file(tmp_path):
+    path = str(tmp_path / 'rec')
+    recorder = SnapshotRecorder(path)
+    snapshots = [{'cpu_percents': [float(i)], 'cpu_temps': {} if i % 2 else {0: {0: 40.0 + i}}}
+                 for i in range(5)]
+    for snapshot in snapshots:
+        recorder.write(snapshot)
+    recorder.close()
+    
+    # A truncated final frame is ignored
+    with open(path, 'ab') as f:
+        f.write(b'\x20\x00')
+    header, frames = read_recording(path)
+    assert 'started' in header
+    assert [data for _, data, _ in frames] == snapshots
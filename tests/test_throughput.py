@@ -0,0 +1,58 @@
+"""
+Throughput Rate Tests
+Counter resets versus 32-bit wraps, and link speed after a carrier change
+"""
+import os
+
+from fakefs import make_proc_net_dev
+from throughput import WRAP_32, NetStats, counter_delta
+
+def test_counter_delta_grows():
+    assert counter_delta(1500, 1000) == 500
+
+def test_counter_delta_reset_is_zero():
+    # Interface down/up on a 64-bit kernel: a small counter starts over
+    assert counter_delta(10, 3 * 10**9) == 0
+    assert counter_delta(0, 5000) == 0
+    assert counter_delta(10, 2 * WRAP_32) == 0
+
+def test_counter_delta_wraps_near_2_32():
+    assert counter_delta(100, WRAP_32 - 400) == 500
+
+def _write(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+
+def test_link_speed_reread_after_carrier_change(tmp_path):
+    proc_root = str(tmp_path / 'proc')
+    sysfs_root = str(tmp_path / 'sys')
+    make_proc_net_dev(proc_root, sysfs_root)
+    interface = os.path.join(sysfs_root, 'class', 'net', 'eno1')
+    # Link down at startup
+    _write(os.path.join(interface, 'speed'), '-1\n')
+    _write(os.path.join(interface, 'carrier'), '0\n')
+    stats = NetStats(proc_root, sysfs_root)
+    try:
+        assert stats.read()['interfaces']['eno1']['util'] is None
+        _write(os.path.join(interface, 'speed'), '1000\n')
+        _write(os.path.join(interface, 'carrier'), '1\n')
+        assert stats.read()['interfaces']['eno1']['util'] == 0.0
+        # Renegotiated while up: carrier drops and comes back at 10 Gb/s
+        _write(os.path.join(interface, 'carrier'), '0\n')
+        stats.read()
+        _write(os.path.join(interface, 'speed'), '10000\n')
+        _write(os.path.join(interface, 'carrier'), '1\n')
+        stats.read()
+        assert stats._devices['eno1'].speed() == 10000 * 1e6 / 8
+    finally:
+        stats.close()
+
+def test_only_physical_interfaces(tmp_path):
+    proc_root = str(tmp_path / 'proc')
+    sysfs_root = str(tmp_path / 'sys')
+    make_proc_net_dev(proc_root, sysfs_root)
+    stats = NetStats(proc_root, sysfs_root)
+    try:
+        assert list(stats.read()['interfaces']) == ['eno1']
+    finally:
+        stats.close()
@@ -0,0 +1,59 @@
+"""
+CPU Topology Tests
+Parse every fixture machine's cpu*/topology tree
+"""
+import pytest
+
+from cpu_topology import CPUTopology, parse_cpu_list
+from fakefs import MACHINES, make_cpu_topology
+
+def test_parse_cpu_list():
+    assert parse_cpu_list('0-3,8,10-11\n') == [0, 1, 2, 3, 8, 10, 11]
+    assert parse_cpu_list('') == []
+
+@pytest.mark.parametrize('machine', sorted(MACHINES))
+def test_fixture_machines(tmp_path, machine):
+    threads = make_cpu_topology(str(tmp_path), machine)
+    topology = CPUTopology(str(tmp_path))
+    assert topology.num_threads == len(threads)
+    for cpu, (package, core, kind) in enumerate(threads):
+        assert topology.core_of(cpu) == (package, core)
+        siblings = [other for other, t in enumerate(threads) if t[:2] == (package, core)]
+        assert topology.siblings[cpu] == tuple(siblings)
+        assert topology.core_type(cpu) == (kind or '')
+    assert topology.is_hybrid == any(kind == 'E' for _, _, kind in threads)
+    
+    # SMT siblings of a core sit next to each other
+    order = topology.grouped_threads()
+    assert sorted(order) == list(range(len(threads)))
+    for cpu in order:
+        position = order.index(cpu)
+        group = topology.siblings[cpu]
+        assert order[position - group.index(cpu):][:len(group)] == list(group)
+
+def test_offline_cpus(tmp_path):
+    make_cpu_topology(str(tmp_path), 'xeon-6248-2s', offline={5, 60})
+    topology = CPUTopology(str(tmp_path))
+    assert topology.num_threads == 78
+    assert 5 not in topology.online
+    assert topology.core_of(5) == (0, 5)    # unknown thread: its own id
+    assert not topology.refresh()
+    generation = topology.generation
+    
+    make_cpu_topology(str(tmp_path), 'xeon-6248-2s')
+    assert topology.refresh()
+    assert topology.num_threads == 80
+    assert topology.generation == generation + 1
+
+def test_poll_hotplug_regroups(tmp_path, monkeypatch):
+    import cpu_arch
+    from cpu_arch import CPUArchitecture
+    make_cpu_topology(str(tmp_path), 'ryzen-5950x', offline={3})
+    monkeypatch.setattr(CPUArchitecture, '_topology', CPUTopology(str(tmp_path)))
+    monkeypatch.setattr(cpu_arch, 'HOTPLUG_CHECK_SECONDS', 0.0)
+    generation = CPUArchitecture.poll_hotplug()
+    assert 3 not in CPUArchitecture.topology().grouped_threads()
+    
+    make_cpu_topology(str(tmp_path), 'ryzen-5950x')
+    assert CPUArchitecture.poll_hotplug() == generation + 1
+    assert 3 in CPUArchitecture.topology().grouped_threads()
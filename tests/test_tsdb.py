@@ -0,0 +1,46 @@
+"""
+Time-Series Store Tests
+Rollups, reads and concurrent access from the sampler and UI threads
+"""
+import threading
+
+from tsdb import TimeSeriesStore
+
+def _mappings(directory):
+    with open('/proc/self/maps') as f:
+        return sum(1 for line in f if directory in line)
+
+def test_add_and_read(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    try:
+        for second in range(20):
+            store.add('memory_stats.percent', 1000.0 + second, float(second))
+        step, points = store.read('memory_stats.percent', 1000.0, 1019.0, step=10)
+        assert step == 10
+        assert [p[1:] for p in points if p is not None] == [(0.0, 4.5, 9.0), (10.0, 14.5, 19.0)]
+    finally:
+        store.close()
+
+def test_concurrent_open_maps_each_series_once(tmp_path):
+    directory = str(tmp_path)
+    store = TimeSeriesStore(directory)
+    names = [f'cpu_percents[{cpu}]' for cpu in range(64)]
+    barrier = threading.Barrier(8)
+    
+    def worker(index):
+        barrier.wait()
+        for name in names:
+            if index % 2:
+                store.add(name, 1000.0, 50.0)
+            else:
+                store.read(name, 990.0, 1000.0, step=1)
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store._series) == len(names)
+    assert _mappings(directory) == len(names)
+    store.close()
+    assert _mappings(directory) == 0
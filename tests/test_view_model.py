@@ -0,0 +1,53 @@
+"""
+View Model Tests
+Widgets touched only when the formatted text changes
+"""
+from view_model import ViewModel
+
+def test_unchanged_values_are_skipped():
+    shown = []
+    formatted = []
+    
+    def formatter(value):
+        formatted.append(value)
+        return f"{value:.0f}%"
+    
+    vm = ViewModel()
+    vm.bind('cpu', shown.append, formatter)
+    vm.begin_tick()
+    vm.set('cpu', 42.0)
+    vm.end_tick()
+    assert shown == ['42%']
+    assert (vm.last_pushed, vm.last_skipped) == (1, 0)
+    
+    # Same raw value: not even formatted
+    vm.begin_tick()
+    vm.set('cpu', 42.0)
+    vm.end_tick()
+    assert formatted == [42.0]
+    # New raw value with the same text: formatted, widget left alone
+    vm.begin_tick()
+    vm.set('cpu', 42.3)
+    vm.end_tick()
+    assert formatted == [42.0, 42.3]
+    assert shown == ['42%']
+    assert (vm.last_pushed, vm.last_skipped) == (0, 1)
+    assert (vm.total_pushed, vm.total_skipped) == (1, 2)
+
+def test_first_value_is_always_shown():
+    shown = []
+    vm = ViewModel()
+    vm.bind('gpu', shown.append, lambda value: 'N/A' if value is None else str(value))
+    vm.set('gpu', None)
+    assert shown == ['N/A']
+
+def test_staleness_pushed_on_change_only():
+    flags = []
+    vm = ViewModel()
+    vm.bind('disk', lambda text: None, stale_setter=flags.append)
+    vm.set('disk', 1)
+    vm.set('disk', 1)
+    vm.set('disk', 1, stale=True)
+    vm.set('disk', 2, stale=True)
+    vm.set('disk', 2)
+    assert flags == [False, True, False]
@@ -0,0 +1,303 @@
+"""
+Throughput Rates
+Per-disk and per-NIC rates from one bulk /proc/diskstats and /proc/net/dev read
+"""
+import os
+import time
+
+from cpu_stat import read_all
+
+# /proc/diskstats counts 512-byte sectors regardless of the device's sector size
+SECTOR_SIZE = 512
+
+# Counters are unsigned long (32 bits on 32-bit kernels) or u64
+WRAP_32 = 1 << 32
+
+# A decrease is only taken as a 32-bit wrap when the counter was within
+# this much of 2**32 and restarted below it
+WRAP_MARGIN = 1 << 28
+
+def counter_delta(current, previous):
+    """Increase of a monotonically growing kernel counter
+    
+    A counter going backwards was reset (interface down/up, driver
+    reload, device re-added) and that interval counts as 0, unless it
+    went from just under 2**32 to just over 0, which is a 32-bit wrap.
+    Small counters on 64-bit kernels reset too, so previous < 2**32 on
+    its own is not taken as proof of a 32-bit counter.
+    """
+    if current >= previous:
+        return current - previous
+    if WRAP_32 - WRAP_MARGIN <= previous < WRAP_32 and current < WRAP_MARGIN:
+        return current + WRAP_32 - previous
+    return 0
+
+class _RateReader:
+    """Kept-open counter file turned into per-device rates
+    
+    Subclasses parse the file into {device: counters} for the devices
+    worth reporting; this class keeps the previous counters and turns
+    them into per-second rates with monotonic-clock deltas.
+    """
+    
+    # Relative path of the counter file under proc_root
+    PATH = None
+    
+    def __init__(self, proc_root='/proc', sysfs_root='/sys'):
+        """
+        proc_root / sysfs_root: tree roots (point at a fake tree for testing)
+        """
+        self.proc_root = proc_root
+        self.sysfs_root = sysfs_root
+        self._fd = os.open(os.path.join(proc_root, self.PATH), os.O_RDONLY)
+        self._size = 4096
+        self._devices = {}     # name -> device info, or None when filtered out
+        self._prev = {}        # name -> counters of the previous read
+        self._prev_time = None
+    
+    def close(self):
+        """Close the counter file and whatever _classify() opened"""
+        for info in self._devices.values():
+            if info is not None:
+                self._forget(info)
+        self._devices = {}
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+    
+    def _classify(self, name):
+        """Device info for name, or None to skip it (e.g. virtual devices)"""
+        raise NotImplementedError
+    
+    def _forget(self, info):
+        """Release what _classify() opened for a device that went away"""
+    
+    def _parse(self, data):
+        """Counter file contents -> [(name, counters)] for every device"""
+        raise NotImplementedError
+    
+    def _rates(self, info, delta, elapsed):
+        """Counter deltas over elapsed seconds -> rate dict of one device"""
+        raise NotImplementedError
+    
+    def _device(self, name):
+        """Cached device info (classified once per device name)"""
+        try:
+            return self._devices[name]
+        except KeyError:
+            info = self._devices[name] = self._classify(name)
+            return info
+    
+    def read_rates(self):
+        """Per-device rates since the previous call
+        
+        Devices seen for the first time report zero rates.
+        """
+        data = read_all(self._fd, self._size)
+        now = time.monotonic()
+        self._size = max(self._size, len(data) + 1)
+        
+        elapsed = now - self._prev_time if self._prev_time is not None else 0.0
+        prev = self._prev
+        seen = set()
+        current = {}
+        rates = {}
+        for name, counters in self._parse(data):
+            seen.add(name)
+            info = self._device(name)
+            if info is None:
+                continue
+            current[name] = counters
+            previous = prev.get(name)
+            if previous is None or elapsed <= 0:
+                delta = (0,) * len(counters)
+            else:
+                delta = tuple(map(counter_delta, counters, previous))
+            rates[name] = self._rates(info, delta, elapsed or 1.0)
+        
+        # Forget removed devices so a re-added one is classified again
+        if len(seen) != len(self._devices):
+            for name in self._devices.keys() - seen:
+                info = self._devices.pop(name)
+                if info is not None:
+                    self._forget(info)
+        self._prev = current
+        self._prev_time = now
+        return rates
+
+class DiskStats(_RateReader):
+    """Per-disk throughput, IOPS and utilization from /proc/diskstats
+    
+    Only whole physical disks are reported: partitions (no
+    /sys/block/<name>) would count their disk's traffic twice, and
+    devices without a backing device (loop, ram, zram, dm-*, md*) are
+    views of other disks.
+    """
+    
+    PATH = 'diskstats'
+    
+    def _classify(self, name):
+        """True for whole disks backed by a device"""
+        block = os.path.join(self.sysfs_root, 'block', name)
+        return True if os.path.isdir(os.path.join(block, 'device')) else None
+    
+    def _parse(self, data):
+        """One line per block device: major minor name counters..."""
+        for line in data.split(b'\n'):
+            fields = line.split()
+            if len(fields) < 14:
+                continue
+            # Named as in sysfs ('cciss/c0d0' -> 'cciss!c0d0')
+            name = fields[2].decode().replace('/', '!')
+            # reads, sectors read, writes, sectors written, ms doing I/O
+            yield (name, (int(fields[3]), int(fields[5]), int(fields[7]),
+                          int(fields[9]), int(fields[12])))
+    
+    def _rates(self, info, delta, elapsed):
+        """Bytes/s, IOPS and % of time busy"""
+        reads, sectors_read, writes, sectors_written, io_ms = delta
+        return {
+            'read_bytes': sectors_read * SECTOR_SIZE / elapsed,
+            'write_bytes': sectors_written * SECTOR_SIZE / elapsed,
+            'read_iops': reads / elapsed,
+            'write_iops': writes / elapsed,
+            'util': min(100.0, io_ms / (elapsed * 10)),
+        }
+    
+    def read(self):
+        """Totals over all disks plus per-disk rates
+        
+        Bytes and IOPS are per second; util is the busiest disk's
+        percentage of time with I/O in flight.
+        """
+        devices = self.read_rates()
+        rates = devices.values()
+        return {
+            'read_bytes': sum(d['read_bytes'] for d in rates),
+            'write_bytes': sum(d['write_bytes'] for d in rates),
+            'read_iops': sum(d['read_iops'] for d in rates),
+            'write_iops': sum(d['write_iops'] for d in rates),
+            'util': max((d['util'] for d in rates), default=0.0),
+            'devices': devices,
+        }
+
+class _Link:
+    """Link speed of one NIC, re-read while unknown or after a carrier change
+    
+    speed reads -1 or fails with EINVAL while the link is down, so a NIC
+    that was unplugged at startup or renegotiated (1G -> 10G) gets its
+    speed again once carrier changes, instead of keeping the first value.
+    """
+    
+    __slots__ = ('_speed_fd', '_carrier_fd', '_carrier', '_bytes')
+    
+    def __init__(self, interface):
+        """
+        interface: /sys/class/net/<name> directory
+        """
+        self._speed_fd = self._open(os.path.join(interface, 'speed'))
+        self._carrier_fd = self._open(os.path.join(interface, 'carrier'))
+        self._carrier = None
+        self._bytes = 0
+    
+    @staticmethod
+    def _open(path):
+        try:
+            return os.open(path, os.O_RDONLY)
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _read_int(fd):
+        """Integer in a kept-open sysfs attribute (None if unreadable)"""
+        if fd is None:
+            return None
+        try:
+            return int(os.pread(fd, 32, 0))
+        except (OSError, ValueError):
+            return None
+    
+    def close(self):
+        for fd in (self._speed_fd, self._carrier_fd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._speed_fd = self._carrier_fd = None
+    
+    def speed(self):
+        """Link speed in bytes/s (0 if unknown)"""
+        carrier = self._read_int(self._carrier_fd)
+        if not self._bytes or carrier != self._carrier:
+            self._carrier = carrier
+            speed = self._read_int(self._speed_fd)   # Mb/s
+            self._bytes = max(speed or 0, 0) * 1e6 / 8
+        return self._bytes
+
+class NetStats(_RateReader):
+    """Per-NIC throughput, packet rates and utilization from /proc/net/dev
+    
+    Only interfaces backed by a device are reported; loopback, bridges,
+    veth pairs, tunnels and bonds carry traffic already counted on a
+    physical NIC. Utilization uses the negotiated link speed, when the
+    driver reports one.
+    """
+    
+    PATH = os.path.join('net', 'dev')
+    
+    def _classify(self, name):
+        """Kept-open link state for NICs backed by a device"""
+        interface = os.path.join(self.sysfs_root, 'class', 'net', name)
+        if not os.path.isdir(os.path.join(interface, 'device')):
+            return None
+        return _Link(interface)
+    
+    def _forget(self, link):
+        """Close the removed NIC's speed and carrier files"""
+        link.close()
+    
+    def _parse(self, data):
+        """Two header lines, then 'name: rx counters... tx counters...'"""
+        for line in data.split(b'\n')[2:]:
+            name, _, counters = line.partition(b':')
+            fields = counters.split()
+            if len(fields) < 10:
+                continue
+            # rx bytes, rx packets, tx bytes, tx packets
+            yield (name.strip().decode(), (int(fields[0]), int(fields[1]),
+                                           int(fields[8]), int(fields[9])))
+    
+    def _rates(self, link, delta, elapsed):
+        """Bytes/s, packets/s and % of link speed"""
+        link_bytes = link.speed()
+        rx_bytes, rx_packets, tx_bytes, tx_packets = delta
+        rx, tx = rx_bytes / elapsed, tx_bytes / elapsed
+        return {
+            'rx_bytes': rx,
+            'tx_bytes': tx,
+            'rx_packets': rx_packets / elapsed,
+            'tx_packets': tx_packets / elapsed,
+            'util': min(100.0, 100.0 * max(rx, tx) / link_bytes) if link_bytes else None,
+        }
+    
+    def read(self):
+        """Totals over all NICs plus per-NIC rates
+        
+        Bytes and packets are per second; util is the busiest NIC's
+        percentage of its link speed (None when no NIC reports one).
+        """
+        interfaces = self.read_rates()
+        rates = interfaces.values()
+        utils = [i['util'] for i in rates if i['util'] is not None]
+        return {
+            'rx_bytes': sum(i['rx_bytes'] for i in rates),
+            'tx_bytes': sum(i['tx_bytes'] for i in rates),
+            'rx_packets': sum(i['rx_packets'] for i in rates),
+            'tx_packets': sum(i['tx_packets'] for i in rates),
+            'util': max(utils) if utils else None,
+            'interfaces': interfaces,
+        }
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+CPU Collector Benchmark
+Compare the /proc/stat + cpufreq collector against the psutil + cpuinfo path
+
+Usage:
+    python3 tools/bench_cpu.py [--iterations 200] [--cpus 32,128,256]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add repository root to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import psutil
+
+from cpu_stat import CPUStatCollector
+from fakefs import make_tree
+
+def legacy_percents():
+    """Previous get_cpu_percents: psutil per-CPU times"""
+    return psutil.cpu_percent(percpu=True, interval=None)
+
+def legacy_frequencies(proc_root):
+    """Previous get_cpu_frequencies: line scan of /proc/cpuinfo"""
+    freqs = []
+    with open(f'{proc_root}/cpuinfo', 'r') as f:
+        for line in f:
+            if 'cpu MHz' in line:
+                freqs.append(float(line.split(':')[1].strip()))
+    return freqs
+
+def time_per_call(func, iterations):
+    """Average wall time of func() in microseconds"""
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--cpus', default='32,128,256')
+    args = parser.parse_args()
+    
+    print(f"{'cpus':>5} {'path':<10} {'usage µs':>10} {'freq µs':>10} {'total µs':>10}")
+    for ncpus in (int(n) for n in args.cpus.split(',')):
+        with tempfile.TemporaryDirectory() as tmp:
+            proc_root, sysfs_root = make_tree(tmp, ncpus)
+            
+            psutil.PROCFS_PATH = proc_root
+            usage = time_per_call(legacy_percents, args.iterations)
+            freq = time_per_call(lambda: legacy_frequencies(proc_root), args.iterations)
+            print(f"{ncpus:>5} {'legacy':<10} {usage:>10.1f} {freq:>10.1f} {usage + freq:>10.1f}")
+            
+            collector = CPUStatCollector(proc_root, sysfs_root)
+            usage = time_per_call(collector.read_percents, args.iterations)
+            freq = time_per_call(collector.read_frequencies, args.iterations)
+            print(f"{ncpus:>5} {'procfs':<10} {usage:>10.1f} {freq:>10.1f} {usage + freq:>10.1f}")
+            collector.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Downsampling Benchmark
+Per-frame cost of long-range graphs: every point, one-shot LTTB, cached columns
+
+A history of --samples one-second samples is reduced to the graph's
+pixel width three ways each frame: mapping every sample to a point,
+running LTTB over the whole history, and reading the incrementally
+maintained ZoomLevel columns (one sample is added per frame). With
+pycairo installed the points are also drawn onto an offscreen surface.
+
+Usage:
+    python3 tools/bench_downsample.py [--samples 3600,86400] [--widths 96,320,640]
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add repository root to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from downsample import lttb, ZoomLevel
+
+def make_history(count, seed=0):
+    """count one-second samples of a noisy wave with a few spikes"""
+    rng = random.Random(seed)
+    start = time.time() - count
+    ts = [start + i for i in range(count)]
+    vs = [min(100.0, max(0.0, 50 + 30 * math.sin(i / 900) + rng.gauss(0, 5)))
+          for i in range(count)]
+    for i in rng.sample(range(count), 5):
+        vs[i] = 100.0
+    return ts, vs
+
+def per_call(func, min_time=0.3):
+    """Milliseconds per call of func, repeated for at least min_time"""
+    func()
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time:
+        func()
+        calls += 1
+    return (time.perf_counter() - start) / calls * 1000
+
+def bench(count, width, height=54):
+    """{method: ms per frame} for one history length and width"""
+    ts, vs = make_history(count)
+    span = ts[-1] - ts[0] + 1
+    x_scale = width / span
+    start = ts[0]
+    
+    def every_point():
+        return [((t - start) * x_scale, height - v * height / 100) for t, v in zip(ts, vs)]
+    
+    def one_shot():
+        return [((ts[i] - start) * x_scale, height - vs[i] * height / 100)
+                for i in lttb(ts, vs, width)]
+    
+    level = ZoomLevel(span, width)
+    for t, v in zip(ts, vs):
+        level.add(t, v)
+    clock = [ts[-1]]
+    
+    def cached():
+        clock[0] += 1.0
+        level.add(clock[0], 50.0)
+        return [[((c[3] - start) * x_scale, height - c[4] * height / 100) for c in run]
+                for run in level.runs(clock[0])]
+    
+    results = {'every point': per_call(every_point), 'lttb': per_call(one_shot),
+               'cached': per_call(cached)}
+    
+    try:
+        import cairo
+        from history_graph import render_history, ORANGE
+    except ImportError:
+        return results
+    target = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+    
+    def draw_every_point():
+        cr = cairo.Context(target)
+        points = every_point()
+        cr.move_to(*points[0])
+        for point in points[1:]:
+            cr.line_to(*point)
+        cr.stroke()
+    
+    def draw_cached():
+        clock[0] += 1.0
+        level.add(clock[0], 50.0)
+        render_history(cairo.Context(target), width, height,
+                       [(level.runs(clock[0]), ORANGE)], span, 100.0, clock[0])
+    
+    results['draw every point'] = per_call(draw_every_point)
+    results['draw cached'] = per_call(draw_cached)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--samples', default='3600,86400')
+    parser.add_argument('--widths', default='96,320,640')
+    args = parser.parse_args()
+    
+    ts, vs = make_history(86400)
+    level = ZoomLevel(86400, 320)
+    start = time.perf_counter()
+    for t, v in zip(ts, vs):
+        level.add(t, v)
+    print(f"ZoomLevel.add: {(time.perf_counter() - start) / len(ts) * 1e6:.2f} us per sample")
+    
+    header = None
+    for count in (int(n) for n in args.samples.split(',')):
+        for width in (int(w) for w in args.widths.split(',')):
+            results = bench(count, width)
+            if header is None:
+                header = list(results)
+                print(f"{'samples':>8} {'width':>6} " + " ".join(f"{name:>16}" for name in header))
+            print(f"{count:>8} {width:>6} " +
+                  " ".join(f"{results[name]:>13.3f} ms" for name in header))
+
+if __name__ == "__main__":
+    main()
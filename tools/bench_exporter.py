@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Exporter Load Test
+Scrape the metrics endpoint from many keep-alive clients at once
+
+By default a MetricsExporter is started on a free localhost port and
+fed a synthetic snapshot (fake /proc tree, --cpus threads) once per
+tick, as the sampler would. Client threads then scrape it as fast as
+they can for --duration seconds. The report shows scrape throughput
+and latency, and that the buffer was serialized once per tick however
+many scrapes arrived. --url points the clients at a running monitor
+(main.py --exporter) instead.
+
+Usage:
+    python3 tools/bench_exporter.py [--clients 8] [--duration 10] [--cpus 256]
+    python3 tools/bench_exporter.py --url http://127.0.0.1:9179/metrics
+"""
+import argparse
+import http.client
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Add repository root to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from exporter import MetricsExporter, serialize
+from sampler import Sample, Snapshot
+from system_data import SystemData
+
+from fakefs import make_tree, make_fake_bin
+from bench_suite import point_at, wait_for_gpu
+
+def fake_host_data(cpus):
+    """One get_all() result from a fake host with cpus threads"""
+    with tempfile.TemporaryDirectory() as root:
+        proc_root, sysfs_root = make_tree(root, cpus)
+        point_at(proc_root, sysfs_root, make_fake_bin(root, max(1, cpus // 2)))
+        SystemData.get_cpu_percents()   # Prime the CPU deltas
+        SystemData.get_disk_io()
+        SystemData.get_network_stats()
+        wait_for_gpu()
+        data = SystemData.get_all()
+        SystemData.shutdown()
+    return data
+
+def scrape_loop(host, port, path, headers, stop, latencies, errors):
+    """One client: scrape over a single keep-alive connection until stop"""
+    connection = http.client.HTTPConnection(host, port, timeout=5)
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors.append(1)
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=5)
+            continue
+        if response.status != 200:
+            errors.append(1)
+            continue
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+
+def publish_loop(exporter, data, interval, stop, ticks):
+    """Stand-in for the sampler: one fresh snapshot per tick"""
+    seq = 0
+    while not stop.wait(interval):
+        seq += 1
+        now = time.monotonic()
+        exporter.publish(Snapshot({key: Sample(value, now, seq) for key, value in data.items()},
+                                  {key: interval for key in data}, timestamp=now))
+        ticks.append(now)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('--url', help="scrape a running exporter instead of a local one")
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--interval', type=float, default=1.0, help="seconds per tick")
+    parser.add_argument('--cpus', type=int, default=256)
+    parser.add_argument('--gzip', action='store_true', help="ask for gzip bodies")
+    args = parser.parse_args()
+    
+    stop = threading.Event()
+    ticks = []
+    exporter = None
+    publisher = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port, path = url.hostname, url.port or 80, url.path or '/metrics'
+    else:
+        data = fake_host_data(args.cpus)
+        exporter = MetricsExporter('127.0.0.1', 0)
+        exporter.publish(Snapshot({key: Sample(value, time.monotonic(), 0)
+                                   for key, value in data.items()}))
+        exporter.start()
+        host, port = exporter.address
+        path = '/metrics'
+        started = time.perf_counter()
+        size = len(serialize(data))
+        print(f"{args.cpus} CPUs: {size / 1024:.1f} KiB per scrape, "
+              f"serialized in {(time.perf_counter() - started) * 1000:.2f} ms")
+        publisher = threading.Thread(target=publish_loop,
+                                     args=(exporter, data, args.interval, stop, ticks),
+                                     daemon=True)
+        publisher.start()
+    
+    headers = {'Accept': 'application/openmetrics-text'}
+    if args.gzip:
+        headers['Accept-Encoding'] = 'gzip'
+    latencies = []
+    errors = []
+    clients = [threading.Thread(target=scrape_loop,
+                                args=(host, port, path, headers, stop, latencies, errors),
+                                daemon=True)
+               for _ in range(args.clients)]
+    for client in clients:
+        client.start()
+    time.sleep(args.duration)
+    stop.set()
+    for client in clients:
+        client.join(timeout=5)
+    
+    latencies.sort()
+    count = len(latencies)
+    print(f"{args.clients} clients, {args.duration:.0f} s: {count} scrapes "
+          f"({count / args.duration:.0f}/s), {len(errors)} errors")
+    if count:
+        p99 = latencies[min(count - 1, int(count * 0.99))]
+        print(f"latency p50 {statistics.median(latencies) * 1000:.2f} ms, "
+              f"p99 {p99 * 1000:.2f} ms")
+    if exporter is not None:
+        publisher.join(timeout=args.interval + 1)
+        # One initial publish plus one per tick: scrapes never serialize
+        print(f"{len(ticks)} ticks, {exporter.published - 1} buffers serialized, "
+              f"{exporter.scrapes} scrapes served")
+        exporter.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+CPU Graph Frame-Time Benchmark
+Compare full redraws against incremental scrolling in CPUGraph
+
+Renders onto an offscreen cairo ImageSurface, pushing one sample before
+every frame like the live grid does.
+
+Usage:
+    python3 tools/bench_graph.py [--frames 300] [--points 50,600,3600]
+                                 [--sizes 96x54,320x180,640x360]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add repository root to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cairo
+
+from cpu_graph import CPUGraph
+
+class FakeWidget:
+    """Just enough of Gtk.DrawingArea for CPUGraph.draw"""
+    
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+    
+    def get_allocated_width(self):
+        return self.width
+    
+    def get_allocated_height(self):
+        return self.height
+
+def frame_time(points, width, height, incremental, frames):
+    """Average milliseconds per push + draw"""
+    rng = random.Random(0)
+    graph = CPUGraph(0, max_points=points, incremental=incremental)
+    for _ in range(points):
+        graph.update(rng.uniform(0, 100))
+    
+    widget = FakeWidget(width, height)
+    target = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+    graph.draw(widget, cairo.Context(target))  # warm the cache
+    
+    start = time.perf_counter()
+    for _ in range(frames):
+        graph.update(rng.uniform(0, 100))
+        graph.draw(widget, cairo.Context(target))
+    return (time.perf_counter() - start) / frames * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--points', default='50,600,3600')
+    parser.add_argument('--sizes', default='96x54,320x180,640x360')
+    args = parser.parse_args()
+    
+    print(f"{'points':>7} {'size':>9} {'full ms':>9} {'incr ms':>9} {'speedup':>8}")
+    for points in (int(p) for p in args.points.split(',')):
+        for size in args.sizes.split(','):
+            width, height = (int(v) for v in size.split('x'))
+            full = frame_time(points, width, height, False, args.frames)
+            incr = frame_time(points, width, height, True, args.frames)
+            print(f"{points:>7} {size:>9} {full:>9.3f} {incr:>9.3f} {full / incr:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
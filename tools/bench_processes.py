@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Process Scanner Benchmark
+Time ProcessScanner.scan() against a synthetic /proc with many PIDs
+
+Each tick advances the CPU time of a few processes and, with --churn,
+replaces some PIDs, so the scan sees realistic load and PID turnover.
+
+Usage:
+    python3 tools/bench_processes.py [--pids 1000,10000,20000] [--ticks 50]
+                                     [--churn 20]
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add repository root to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from processes import ProcessScanner
+from fakefs import make_proc_pids, touch_proc_pids
+
+def bench(count, ticks, churn):
+    """Median and worst scan time in ms, after the initial discovery scan"""
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as proc_root:
+        pids = make_proc_pids(proc_root, count)
+        scanner = ProcessScanner(proc_root)
+        
+        start = time.perf_counter()
+        scanner.scan()
+        first = (time.perf_counter() - start) * 1000
+        
+        next_pid = pids[-1] + 1
+        times = []
+        for tick in range(ticks):
+            touch_proc_pids(proc_root, rng.sample(pids, 10), seed=tick)
+            for _ in range(churn):
+                gone = pids.pop(rng.randrange(len(pids)))
+                shutil.rmtree(os.path.join(proc_root, str(gone)))
+                pids += make_proc_pids(proc_root, 1, first_pid=next_pid, seed=next_pid)
+                next_pid += 1
+            start = time.perf_counter()
+            scanner.scan()
+            times.append((time.perf_counter() - start) * 1000)
+        return first, statistics.median(times), max(times), scanner.stat_reads
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pids', default='1000,10000,20000')
+    parser.add_argument('--ticks', type=int, default=50)
+    parser.add_argument('--churn', type=int, default=20,
+                        help="PIDs replaced before every tick")
+    args = parser.parse_args()
+    
+    print(f"{'pids':>7} {'churn':>6} {'first ms':>9} {'median ms':>10} {'max ms':>8} {'reads':>6}")
+    for count in (int(n) for n in args.pids.split(',')):
+        for churn in sorted({0, args.churn}):
+            first, median, worst, reads = bench(count, args.ticks, churn)
+            print(f"{count:>7} {churn:>6} {first:>9.2f} {median:>10.2f} {worst:>8.2f} {reads:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Replay Throughput Benchmark
+Push a recording through CPUGrid, CPUGraph and SystemInfo as fast as possible
+
+Every frame is applied to the views, each CPU graph is drawn onto an
+offscreen cairo surface, and pending GTK work (label relayout) is run,
+so the numbers cover the whole update and draw path of the window.
+Without a recording a synthetic one is generated.
+
+Usage:
+    python3 tools/bench_replay.py [recording] [--frames 2000] [--cpus 32]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add repository root to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cairo
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk
+
+from cpu_grid import CPUGrid
+from system_info import SystemInfo
+from replay import ReplaySampler
+from sampler import Sample, Snapshot
+from snapshot_codec import SnapshotRecorder
+
+def synthesize(path, frames, cpus, interval=0.5):
+    """Record a random-walk load pattern shaped like SystemData.get_all()"""
+    rng = random.Random(0)
+    load = [rng.uniform(0, 100) for _ in range(cpus)]
+    used = 16 * 1024**3
+    recorder = SnapshotRecorder(path)
+    for i in range(frames):
+        load = [min(100.0, max(0.0, v + rng.gauss(0, 8))) for v in load]
+        used = min(60 * 1024**3, max(1024**3, used + rng.randint(-2**26, 2**26)))
+        data = {
+            'cpu_percents': [round(v, 1) for v in load],
+            'cpu_freqs': [round(rng.uniform(800, 5800)) for _ in range(cpus)],
+            'cpu_temps': {0: {core: round(rng.uniform(35, 95)) for core in range(cpus // 2)}},
+            'cpu_package_temp': round(rng.uniform(35, 95), 1),
+            'gpu_stats': {'temp': rng.randint(30, 80), 'power_draw': rng.uniform(20, 300),
+                          'power_limit': 450.0, 'mem_used': rng.randint(500, 20000),
+                          'mem_total': 24564},
+            'cuda_available': True,
+            'memory_stats': {'total': 64 * 1024**3, 'used': used,
+                             'percent': used / (64 * 1024**3) * 100},
+            'disk_io': {'read_bytes': rng.uniform(0, 5 * 10**8),
+                        'write_bytes': rng.uniform(0, 2 * 10**8),
+                        'read_iops': rng.uniform(0, 50000), 'write_iops': rng.uniform(0, 20000),
+                        'util': rng.uniform(0, 100)},
+            'disk_usage': {'total': 2000 * 1024**3, 'used': 900 * 1024**3, 'percent': 45.0},
+            'network_stats': {'rx_bytes': rng.uniform(0, 5 * 10**6),
+                              'tx_bytes': rng.uniform(0, 5 * 10**5),
+                              'rx_packets': rng.uniform(0, 5000),
+                              'tx_packets': rng.uniform(0, 500), 'util': rng.uniform(0, 40)},
+        }
+        timestamp = i * interval
+        recorder.write(Snapshot({key: Sample(value, timestamp, i) for key, value in data.items()},
+                                {key: interval for key in data}, timestamp))
+    recorder.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('recording', nargs='?')
+    parser.add_argument('--frames', type=int, default=2000,
+                        help="frames to synthesize when no recording is given")
+    parser.add_argument('--cpus', type=int, default=32)
+    args = parser.parse_args()
+    
+    path = args.recording
+    if path is None:
+        path = tempfile.mktemp(suffix='.rec')
+        synthesize(path, args.frames, args.cpus)
+    
+    grid = CPUGrid()
+    info = SystemInfo()
+    box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+    box.pack_start(grid.widget, False, False, 0)
+    box.pack_start(info.widget, False, False, 0)
+    window = Gtk.OffscreenWindow()
+    window.add(box)
+    window.show_all()
+    
+    surfaces = [cairo.ImageSurface(cairo.FORMAT_ARGB32, 96, 54) for _ in grid.cpu_graphs]
+    timings = {'update': 0.0, 'draw': 0.0, 'gtk': 0.0}
+    frames = 0
+    for _, snapshot in ReplaySampler(path, speed=None).snapshots():
+        start = time.perf_counter()
+        grid.update(snapshot)
+        info.update(snapshot)
+        updated = time.perf_counter()
+        for graph, area, surface in zip(grid.cpu_graphs, grid.drawing_areas, surfaces):
+            graph.draw(area, cairo.Context(surface))
+        drawn = time.perf_counter()
+        while Gtk.events_pending():
+            Gtk.main_iteration_do(False)
+        done = time.perf_counter()
+        
+        timings['update'] += updated - start
+        timings['draw'] += drawn - updated
+        timings['gtk'] += done - drawn
+        frames += 1
+    
+    total = sum(timings.values())
+    print(f"{frames} frames, {frames / total:.0f} frames/s")
+    for name, seconds in timings.items():
+        print(f"{name:>8} {seconds / frames * 1000:8.3f} ms/frame")
+    skipped = grid.view_model.total_skipped + info.view_model.total_skipped
+    pushed = grid.view_model.total_pushed + info.view_model.total_pushed
+    print(f"labels: {pushed} pushed, {skipped} skipped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Time-to-first-paint and time-to-first-full-snapshot of main.py
+
+Each run starts main.py with --startup-report, which prints when it
+reached each startup milestone on the monotonic clock and exits once
+every collector has reported. Times are measured from the moment this
+script spawned the process, so interpreter start-up is included.
+The window mode needs a display (DISPLAY or WAYLAND_DISPLAY); headless
+mode always runs.
+
+--slow-tools puts fake `sensors` and `nvidia-smi` that sleep first on
+PATH, to check that the window appears before slow collectors answer.
+
+Usage:
+    python3 tools/bench_startup.py [--runs 5] [--modes window,headless]
+    python3 tools/bench_startup.py --slow-tools 1.5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add repository root to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fakefs import make_fake_bin
+
+MAIN = str(Path(__file__).parent.parent / 'main.py')
+
+# Milestones in the order they are reported
+MILESTONES = ('start', 'imports', 'window_built', 'first_paint', 'first_snapshot',
+              'full_snapshot')
+
+def run_once(mode, env, timeout):
+    """Start main.py once; {milestone: ms after spawn}"""
+    with tempfile.TemporaryDirectory() as root:
+        command = [sys.executable, MAIN, '--startup-report', '--no-history']
+        if mode == 'headless':
+            command += ['--headless', '--feed', os.path.join(root, 'bench.feed')]
+        spawned = time.monotonic()
+        result = subprocess.run(command, env=env, capture_output=True, text=True,
+                                timeout=timeout)
+    times = {}
+    for line in result.stderr.splitlines():
+        parts = line.split()
+        if len(parts) == 3 and parts[0] == 'startup':
+            times[parts[1]] = (float(parts[2]) - spawned) * 1000
+    if result.returncode != 0 or 'full_snapshot' not in times:
+        raise RuntimeError(f"{mode} run failed ({result.returncode}): {result.stderr.strip()}")
+    return times
+
+def has_display():
+    """Whether a window can be opened"""
+    if not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')):
+        return False
+    try:
+        import gi
+        gi.require_version('Gtk', '3.0')
+    except (ImportError, ValueError):
+        return False
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--modes', default='window,headless',
+                        help="comma-separated: window, headless")
+    parser.add_argument('--slow-tools', type=float, default=0.0, metavar='SECONDS',
+                        help="fake sensors/nvidia-smi that sleep this long")
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args()
+    
+    env = dict(os.environ)
+    with tempfile.TemporaryDirectory() as root:
+        if args.slow_tools:
+            bin_dir = make_fake_bin(root, os.cpu_count() or 1, delay=args.slow_tools)
+            env['PATH'] = bin_dir + os.pathsep + env['PATH']
+        
+        print(f"{'mode':<10}" + ''.join(f"{m:>16}" for m in MILESTONES) + "   (median ms)")
+        for mode in args.modes.split(','):
+            if mode == 'window' and not has_display():
+                print(f"{mode:<10} skipped: no display or no PyGObject")
+                continue
+            runs = [run_once(mode, env, args.timeout) for _ in range(args.runs)]
+            row = f"{mode:<10}"
+            for milestone in MILESTONES:
+                values = [r[milestone] for r in runs if milestone in r]
+                row += f"{statistics.median(values):>16.1f}" if values else f"{'-':>16}"
+            print(row)
+
+if __name__ == "__main__":
+    main()
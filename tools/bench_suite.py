@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+Time every collector, get_all() and the render/format paths on fake hosts
+
+For each CPU count a procfs/sysfs tree (see fakefs), fake `sensors` and
+a fake `nvidia-smi` are generated, SystemData and psutil are pointed at
+them, and each measurement is repeated for at least --min-time seconds.
+Results are written as JSON; --compare checks them against an earlier
+run and exits non-zero when anything got slower than --threshold.
+
+Usage:
+    python3 tools/bench_suite.py [--cpus 8,32,128,512] [--output bench.json]
+    python3 tools/bench_suite.py --compare baseline.json [--threshold 1.25]
+    python3 tools/bench_suite.py --compare baseline.json --results new.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add repository root to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import psutil
+
+from system_data import SystemData
+from fakefs import make_tree, make_fake_bin
+
+# SystemData collectors timed one by one
+COLLECTORS = (
+    'get_cpu_percents',
+    'get_cpu_frequencies',
+    'get_cpu_temperatures',
+    'get_sensors_temperatures',
+    'get_cpu_package_temp',
+    'get_gpus',
+    'get_gpu_stats',
+    'get_cuda_status',
+    'get_memory_stats',
+    'get_disk_io',
+    'get_disk_usage',
+    'get_network_stats',
+    'get_pressure',
+    'get_cgroups',
+)
+
+def measure(func, min_time=0.2, max_iterations=10000):
+    """Call func repeatedly; per-call timing stats in microseconds"""
+    func()  # warm caches and probes
+    times = []
+    deadline = time.perf_counter() + min_time
+    while len(times) < max_iterations:
+        start = time.perf_counter()
+        func()
+        end = time.perf_counter()
+        times.append((end - start) * 1e6)
+        if end >= deadline and len(times) >= 5:
+            break
+    times.sort()
+    return {
+        'mean_us': statistics.fmean(times),
+        'p50_us': times[len(times) // 2],
+        'p95_us': times[min(len(times) - 1, int(len(times) * 0.95))],
+        'iterations': len(times),
+    }
+
+def point_at(proc_root, sysfs_root, bin_dir):
+    """Make SystemData, psutil and PATH use a fake host"""
+    SystemData.shutdown()
+    SystemData.proc_root = proc_root
+    SystemData.sysfs_root = sysfs_root
+    psutil.PROCFS_PATH = proc_root
+    os.environ['PATH'] = bin_dir + os.pathsep + os.environ['PATH']
+
+def wait_for_gpu(timeout=3.0):
+    """Let the streaming nvidia-smi backend deliver its first sample"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if SystemData.get_gpus():
+            return
+        time.sleep(0.05)
+
+def bench_collectors(results, prefix, min_time):
+    """Time each collector and get_all()"""
+    wait_for_gpu()
+    for name in COLLECTORS:
+        results[f'{prefix}/{name}'] = measure(getattr(SystemData, name), min_time)
+    results[f'{prefix}/get_all'] = measure(SystemData.get_all, min_time)
+
+def bench_graph(results, prefix, min_time):
+    """Time CPUGraph.draw onto an offscreen ImageSurface"""
+    try:
+        import cairo
+        from bench_graph import FakeWidget
+        from cpu_graph import CPUGraph
+    except ImportError as e:
+        results[f'{prefix}/CPUGraph.draw'] = {'skipped': str(e)}
+        return
+    
+    rng = random.Random(0)
+    widget = FakeWidget(96, 54)
+    target = cairo.ImageSurface(cairo.FORMAT_ARGB32, 96, 54)
+    for incremental in (False, True):
+        graph = CPUGraph(0, incremental=incremental)
+        for _ in range(graph.max_points):
+            graph.update(rng.uniform(0, 100))
+        
+        def frame():
+            graph.update(rng.uniform(0, 100))
+            graph.draw(widget, cairo.Context(target))
+        
+        mode = 'incremental' if incremental else 'full'
+        results[f'{prefix}/CPUGraph.draw[{mode}]'] = measure(frame, min_time)
+
+def bench_system_info(results, prefix, min_time):
+    """Time SystemInfo.update with changing values"""
+    try:
+        import gi
+        gi.require_version('Gtk', '3.0')
+        from system_info import SystemInfo
+    except (ImportError, ValueError) as e:
+        results[f'{prefix}/SystemInfo.update'] = {'skipped': str(e)}
+        return
+    
+    info = SystemInfo()
+    data = SystemData.get_all()
+    rng = random.Random(0)
+    
+    def update():
+        data['memory_stats'] = dict(data.get('memory_stats') or {},
+                                    percent=rng.uniform(0, 100))
+        data['network_stats'] = dict(data.get('network_stats') or {},
+                                     rx_bytes=rng.uniform(0, 10**6),
+                                     tx_bytes=rng.uniform(0, 10**5))
+        info.update(data)
+    
+    results[f'{prefix}/SystemInfo.update'] = measure(update, min_time)
+
+def run(cpu_counts, min_time):
+    """Run the whole suite; returns {benchmark name: stats}"""
+    results = {}
+    path = os.environ['PATH']
+    for ncpus in cpu_counts:
+        prefix = f'cpus={ncpus}'
+        print(f"{prefix} ...", file=sys.stderr)
+        with tempfile.TemporaryDirectory() as root:
+            proc_root, sysfs_root = make_tree(root, ncpus)
+            bin_dir = make_fake_bin(root, max(1, ncpus // 2))
+            point_at(proc_root, sysfs_root, bin_dir)
+            try:
+                bench_collectors(results, prefix, min_time)
+                bench_system_info(results, prefix, min_time)
+            finally:
+                SystemData.shutdown()
+                os.environ['PATH'] = path
+    bench_graph(results, 'render', min_time)
+    return results
+
+def compare(baseline, current, threshold):
+    """Print old/new per benchmark; returns the names that regressed"""
+    regressions = []
+    print(f"{'benchmark':<44} {'old us':>10} {'new us':>10} {'ratio':>7}")
+    for name in sorted(set(baseline) | set(current)):
+        old = baseline.get(name, {}).get('mean_us')
+        new = current.get(name, {}).get('mean_us')
+        if old is None or new is None:
+            old = '-' if old is None else f"{old:.1f}"
+            new = '-' if new is None else f"{new:.1f}"
+            print(f"{name:<44} {old:>10} {new:>10} {'':>7}")
+            continue
+        ratio = new / old if old else float('inf')
+        flag = '  REGRESSED' if ratio > threshold else ''
+        if flag:
+            regressions.append(name)
+        print(f"{name:<44} {old:>10.1f} {new:>10.1f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cpus', default='8,32,128,512')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help="seconds each benchmark runs for")
+    parser.add_argument('--output', default='bench.json')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help="compare against an earlier JSON result")
+    parser.add_argument('--results', metavar='FILE',
+                        help="with --compare: use this result instead of running")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+    
+    if args.results:
+        with open(args.results, 'r') as f:
+            current = json.load(f)
+    else:
+        cpu_counts = [int(n) for n in args.cpus.split(',')]
+        current = {
+            'meta': {
+                'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'host': platform.node(),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'cpus': cpu_counts,
+            },
+            'results': run(cpu_counts, args.min_time),
+        }
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"wrote {args.output}", file=sys.stderr)
+    
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline['results'], current['results'], args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.2f}x")
+            sys.exit(1)
+    else:
+        for name, stats in current['results'].items():
+            if 'mean_us' in stats:
+                print(f"{name:<44} {stats['mean_us']:>10.1f} us")
+            else:
+                print(f"{name:<44} {'skipped':>10}")
+
+if __name__ == "__main__":
+    main()
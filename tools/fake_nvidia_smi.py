@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Fake nvidia-smi
+Stand-in for nvidia-smi on machines without an NVIDIA GPU
+
+Supports the --query-gpu/--format=csv,noheader,nounits/--loop-ms options
+the monitor uses and prints plausible, slowly changing values.
+
+Usage:
+    FAKE_GPU_COUNT=4 tools/fake_nvidia_smi.py --query-gpu=index,temperature.gpu \\
+        --format=csv,noheader,nounits --loop-ms=500
+"""
+import math
+import os
+import sys
+import time
+
+def field_value(field, index, tick):
+    """Value for one query field of GPU index at sample tick"""
+    wave = (math.sin(tick / 5 + index) + 1) / 2
+    values = {
+        'index': str(index),
+        'temperature.gpu': str(40 + index + int(wave * 30)),
+        'power.draw': f"{30 + wave * 200:.2f}",
+        'power.limit': "250.00",
+        'memory.used': str(500 + int(wave * 7000)),
+        'memory.total': "24564",
+    }
+    return values.get(field, '[N/A]')
+
+def main(argv):
+    fields = ['index']
+    loop_ms = None
+    for arg in argv:
+        if arg.startswith('--query-gpu='):
+            fields = arg.split('=', 1)[1].split(',')
+        elif arg.startswith('--loop-ms='):
+            loop_ms = int(arg.split('=', 1)[1])
+    count = int(os.environ.get('FAKE_GPU_COUNT', '1'))
+    
+    tick = 0
+    while True:
+        for index in range(count):
+            print(', '.join(field_value(f, index, tick) for f in fields))
+        sys.stdout.flush()
+        if loop_ms is None:
+            return 0
+        tick += 1
+        time.sleep(loop_ms / 1000)
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main(sys.argv[1:]))
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
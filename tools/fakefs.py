@@ -0,0 +1,477 @@
+"""
+Fake procfs/sysfs Trees
+Generate /proc and /sys fixtures for benchmarks and collector testing
+
+Point SystemData.proc_root / SystemData.sysfs_root (and
+psutil.PROCFS_PATH) at the generated directories.
+"""
+import os
+import random
+import shutil
+import stat
+import sys
+
+def _write(path, text):
+    """Write a fixture file, creating parent directories"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+def make_proc_stat(proc_root, ncpus, seed=0):
+    """Write /proc/stat with ncpus per-CPU lines"""
+    rng = random.Random(seed)
+    lines = []
+    rows = []
+    for _ in range(ncpus):
+        rows.append([rng.randint(10**5, 10**7) for _ in range(10)])
+    totals = [sum(col) for col in zip(*rows)]
+    lines.append('cpu  ' + ' '.join(map(str, totals)))
+    for cpu, row in enumerate(rows):
+        lines.append(f'cpu{cpu} ' + ' '.join(map(str, row)))
+    lines.append('intr 123456789 ' + ' '.join('0' for _ in range(ncpus * 4)))
+    lines.append('ctxt 987654321')
+    lines.append('btime 1700000000')
+    lines.append('processes 123456')
+    lines.append('procs_running 3')
+    lines.append('procs_blocked 0')
+    lines.append('softirq 1234 ' + ' '.join('0' for _ in range(10)))
+    _write(os.path.join(proc_root, 'stat'), '\n'.join(lines) + '\n')
+
+def make_proc_cpuinfo(proc_root, ncpus, seed=0):
+    """Write a realistically sized /proc/cpuinfo (x86 layout)"""
+    rng = random.Random(seed)
+    flags = ' '.join(f'flag{i}' for i in range(120))
+    blocks = []
+    for cpu in range(ncpus):
+        blocks.append(
+            f"processor\t: {cpu}\n"
+            "vendor_id\t: GenuineIntel\n"
+            "cpu family\t: 6\n"
+            "model\t\t: 183\n"
+            "model name\t: Fake(R) Core(TM) CPU\n"
+            "stepping\t: 1\n"
+            f"cpu MHz\t\t: {rng.uniform(800, 5800):.3f}\n"
+            "cache size\t: 36864 KB\n"
+            "physical id\t: 0\n"
+            f"siblings\t: {ncpus}\n"
+            f"core id\t\t: {cpu // 2}\n"
+            f"cpu cores\t: {max(1, ncpus // 2)}\n"
+            f"apicid\t\t: {cpu}\n"
+            "fpu\t\t: yes\n"
+            f"flags\t\t: {flags}\n"
+            "bogomips\t: 6374.40\n"
+            "address sizes\t: 46 bits physical, 48 bits virtual\n")
+    _write(os.path.join(proc_root, 'cpuinfo'), '\n'.join(blocks) + '\n')
+
+def make_cpufreq(sysfs_root, ncpus, seed=0):
+    """Write cpu*/cpufreq/scaling_cur_freq (kHz) for every CPU"""
+    rng = random.Random(seed)
+    root = os.path.join(sysfs_root, 'devices', 'system', 'cpu')
+    for cpu in range(ncpus):
+        _write(os.path.join(root, f'cpu{cpu}', 'cpufreq', 'scaling_cur_freq'),
+               f'{rng.randint(800000, 5800000)}\n')
+
+def make_hwmon(sysfs_root, ncores, driver='coretemp', seed=0):
+    """Write a coretemp hwmon device with a package and ncores core sensors"""
+    rng = random.Random(seed)
+    root = os.path.join(sysfs_root, 'class', 'hwmon')
+    _write(os.path.join(root, 'hwmon0', 'name'), 'acpitz\n')
+    _write(os.path.join(root, 'hwmon0', 'temp1_input'), '27800\n')
+    device = os.path.join(root, 'hwmon1')
+    _write(os.path.join(device, 'name'), f'{driver}\n')
+    _write(os.path.join(device, 'temp1_label'), 'Package id 0\n')
+    _write(os.path.join(device, 'temp1_input'), f'{rng.randint(40, 90) * 1000}\n')
+    for core in range(ncores):
+        sensor = os.path.join(device, f'temp{core + 2}')
+        _write(sensor + '_label', f'Core {core}\n')
+        _write(sensor + '_input', f'{rng.randint(35, 95) * 1000}\n')
+
+def make_thermal_zone(sysfs_root):
+    """Write a single x86_pkg_temp thermal zone"""
+    zone = os.path.join(sysfs_root, 'class', 'thermal', 'thermal_zone0')
+    _write(os.path.join(zone, 'type'), 'x86_pkg_temp\n')
+    _write(os.path.join(zone, 'temp'), '52000\n')
+
+def make_proc_meminfo(proc_root, total_kb=64 * 1024 * 1024, seed=0):
+    """Write /proc/meminfo for a machine with total_kb of RAM"""
+    rng = random.Random(seed)
+    free = rng.randint(total_kb // 10, total_kb // 2)
+    fields = [
+        ('MemTotal', total_kb), ('MemFree', free), ('MemAvailable', free + total_kb // 8),
+        ('Buffers', total_kb // 100), ('Cached', total_kb // 6), ('SwapCached', 0),
+        ('Active', total_kb // 4), ('Inactive', total_kb // 5), ('Shmem', total_kb // 200),
+        ('Slab', total_kb // 50), ('SReclaimable', total_kb // 80),
+        ('SwapTotal', 8 * 1024 * 1024), ('SwapFree', 8 * 1024 * 1024),
+    ]
+    _write(os.path.join(proc_root, 'meminfo'),
+           ''.join(f'{name + ":":<16}{value:>8} kB\n' for name, value in fields))
+
+def make_proc_diskstats(proc_root, sysfs_root, disks=('nvme0n1', 'sda'), partitions=2, seed=0):
+    """Write /proc/diskstats with whole disks, partitions and loop devices
+    
+    /sys/block/<disk>/device exists for the disks only; loop devices get
+    a /sys/block entry without one, partitions get none.
+    """
+    rng = random.Random(seed)
+    lines = []
+    names = [f'loop{i}' for i in range(4)]
+    for name in names:
+        _write(os.path.join(sysfs_root, 'block', name, 'size'), '0\n')
+    for disk in disks:
+        names.append(disk)
+        _write(os.path.join(sysfs_root, 'block', disk, 'device', 'model'), 'Fake Disk\n')
+        for part in range(1, partitions + 1):
+            names.append(f'{disk}p{part}' if disk[-1].isdigit() else f'{disk}{part}')
+    for minor, name in enumerate(names):
+        counters = [rng.randint(0, 10**9) for _ in range(17)]
+        lines.append(f'{259:4d} {minor:7d} {name} ' + ' '.join(map(str, counters)))
+    _write(os.path.join(proc_root, 'diskstats'), '\n'.join(lines) + '\n')
+
+def make_proc_net_dev(proc_root, sysfs_root, interfaces=('lo', 'eno1', 'docker0'),
+                      physical=('eno1',), seed=0):
+    """Write /proc/net/dev and /sys/class/net/<iface> entries
+    
+    Interfaces in physical get a device/ link, carrier and a 10 Gb/s speed.
+    """
+    rng = random.Random(seed)
+    lines = ['Inter-|   Receive                                                |  Transmit',
+             ' face |bytes    packets errs drop fifo frame compressed multicast'
+             '|bytes    packets errs drop fifo colls carrier compressed']
+    for interface in interfaces:
+        counters = [rng.randint(0, 10**12) for _ in range(16)]
+        lines.append(f'{interface:>6}: ' + ' '.join(map(str, counters)))
+        directory = os.path.join(sysfs_root, 'class', 'net', interface)
+        _write(os.path.join(directory, 'operstate'), 'up\n')
+        if interface in physical:
+            _write(os.path.join(directory, 'device', 'vendor'), '0x8086\n')
+            _write(os.path.join(directory, 'speed'), '10000\n')
+            _write(os.path.join(directory, 'carrier'), '1\n')
+    _write(os.path.join(proc_root, 'net', 'dev'), '\n'.join(lines) + '\n')
+
+def _pid_stat(pid, comm, jiffies, rss_pages, start):
+    """One /proc/[pid]/stat line"""
+    fields = ['S', '1', str(pid), str(pid), '0', '-1', '4194560', '1200', '0', '0', '0',
+              str(jiffies // 2), str(jiffies - jiffies // 2), '0', '0', '20', '0', '1', '0',
+              str(start), str(rss_pages * 4096 * 4), str(rss_pages)]
+    fields += ['0'] * 30
+    return f'{pid} ({comm}) ' + ' '.join(fields) + '\n'
+
+def make_proc_pids(proc_root, count, first_pid=1, seed=0):
+    """Write count /proc/[pid] directories (stat, cmdline, io)
+    
+    Returns the list of pids. Use touch_proc_pids() to advance counters.
+    """
+    rng = random.Random(seed)
+    names = ['bash', 'python3', 'chrome', 'kworker/0:1', 'postgres: writer', 'java (gc)']
+    pids = list(range(first_pid, first_pid + count))
+    for pid in pids:
+        comm = rng.choice(names)
+        directory = os.path.join(proc_root, str(pid))
+        _write(os.path.join(directory, 'stat'),
+               _pid_stat(pid, comm, rng.randint(0, 10**6), rng.randint(100, 10**5), pid * 10))
+        _write(os.path.join(directory, 'cmdline'),
+               '' if comm.startswith('kworker') else f'/usr/bin/{comm}\0--flag\0')
+        _write(os.path.join(directory, 'io'),
+               f'rchar: 0\nwchar: 0\nsyscr: 0\nsyscw: 0\n'
+               f'read_bytes: {rng.randint(0, 10**9)}\nwrite_bytes: {rng.randint(0, 10**9)}\n'
+               'cancelled_write_bytes: 0\n')
+    # Last field of /proc/loadavg is the most recently created PID
+    _write(os.path.join(proc_root, 'loadavg'), f'0.52 0.58 0.59 2/{count} {pids[-1]}\n')
+    return pids
+
+def touch_proc_pids(proc_root, pids, seed=0):
+    """Advance the CPU time of pids (simulates a tick of load)"""
+    rng = random.Random(seed)
+    for pid in pids:
+        path = os.path.join(proc_root, str(pid), 'stat')
+        with open(path, 'r') as f:
+            line = f.read()
+        close = line.rfind(')')
+        fields = line[close + 2:].split()
+        fields[11] = str(int(fields[11]) + rng.randint(0, 100))
+        with open(path, 'w') as f:
+            f.write(line[:close + 2] + ' '.join(fields) + '\n')
+
+def _pressure(rng, full=True):
+    """Contents of a PSI file"""
+    some = rng.uniform(0, 20)
+    text = (f'some avg10={some:.2f} avg60={some / 2:.2f} avg300={some / 4:.2f} '
+            f'total={rng.randint(0, 10**9)}\n')
+    full_value = some / 3 if full else 0.0
+    return text + (f'full avg10={full_value:.2f} avg60={full_value / 2:.2f} '
+                   f'avg300={full_value / 4:.2f} total={rng.randint(0, 10**8)}\n')
+
+def make_proc_pressure(proc_root, seed=0):
+    """Write /proc/pressure/{cpu,memory,io}"""
+    rng = random.Random(seed)
+    for name in ('cpu', 'memory', 'io'):
+        _write(os.path.join(proc_root, 'pressure', name), _pressure(rng))
+
+def _cgroup_files(directory, rng):
+    """Usage and pressure files of one cgroup"""
+    usage = rng.randint(0, 10**12)
+    _write(os.path.join(directory, 'cpu.stat'),
+           f'usage_usec {usage}\nuser_usec {usage // 2}\nsystem_usec {usage - usage // 2}\n'
+           'nr_periods 0\nnr_throttled 0\nthrottled_usec 0\n')
+    _write(os.path.join(directory, 'memory.current'), f'{rng.randint(0, 8 * 1024**3)}\n')
+    _write(os.path.join(directory, 'io.stat'),
+           f'259:0 rbytes={rng.randint(0, 10**11)} wbytes={rng.randint(0, 10**11)} '
+           f'rios={rng.randint(0, 10**7)} wios={rng.randint(0, 10**7)} dbytes=0 dios=0\n')
+    for name in ('cpu', 'memory', 'io'):
+        _write(os.path.join(directory, f'{name}.pressure'), _pressure(rng))
+    _write(os.path.join(directory, 'cgroup.procs'), '')
+
+def _write_descendants(directory, count):
+    _write(os.path.join(directory, 'cgroup.stat'),
+           f'nr_descendants {count}\nnr_dying_descendants 0\n')
+
+def _set_descendants(cgroup_root):
+    """Write every cgroup's cgroup.stat with the number of cgroups below it"""
+    counts = {}
+    for directory, dirs, _ in os.walk(cgroup_root, topdown=False):
+        counts[directory] = sum(1 + counts[os.path.join(directory, d)] for d in dirs)
+        _write_descendants(directory, counts[directory])
+
+def _adjust_descendants(cgroup_root, path, delta):
+    """Add delta to nr_descendants of every ancestor of path"""
+    parts = path.split('/')[:-1]
+    for depth in range(len(parts) + 1):
+        directory = os.path.join(cgroup_root, *parts[:depth])
+        with open(os.path.join(directory, 'cgroup.stat')) as f:
+            count = int(f.readline().split()[1])
+        _write_descendants(directory, count + delta)
+
+def make_cgroupfs(sysfs_root, count, seed=0):
+    """Write a cgroup v2 hierarchy of about count cgroups under sys/fs/cgroup
+    
+    Shaped like a systemd host running Kubernetes: system services,
+    a user session and pods of one to three containers.
+    Returns the leaf cgroup paths (relative to the mount point).
+    """
+    rng = random.Random(seed)
+    root = os.path.join(sysfs_root, 'fs', 'cgroup')
+    _write(os.path.join(root, 'cgroup.controllers'),
+           'cpuset cpu io memory hugetlb pids rdma misc\n')
+    _write(os.path.join(root, 'cpu.stat'), f'usage_usec {rng.randint(0, 10**13)}\n')
+    _write(os.path.join(root, 'io.stat'), '')
+    for name in ('cpu', 'memory', 'io'):
+        _write(os.path.join(root, f'{name}.pressure'), _pressure(rng))
+    
+    paths = ['init.scope', 'system.slice', 'user.slice', 'user.slice/user-1000.slice',
+             'user.slice/user-1000.slice/session-2.scope', 'kubepods.slice',
+             'kubepods.slice/kubepods-burstable.slice']
+    leaves = ['init.scope', 'user.slice/user-1000.slice/session-2.scope']
+    services = max(1, count // 10)
+    for i in range(services):
+        path = f'system.slice/svc-{i}.service'
+        paths.append(path)
+        leaves.append(path)
+    while len(paths) < count:
+        pod = ('kubepods.slice/kubepods-burstable.slice/'
+               f'kubepods-burstable-pod{rng.getrandbits(64):016x}.slice')
+        paths.append(pod)
+        for _ in range(rng.randint(1, 3)):
+            path = f'{pod}/cri-containerd-{rng.getrandbits(128):032x}.scope'
+            paths.append(path)
+            leaves.append(path)
+    for path in paths:
+        _cgroup_files(os.path.join(root, path), rng)
+    _set_descendants(root)
+    return leaves
+
+def touch_cgroups(sysfs_root, paths, seed=0):
+    """Advance CPU time and I/O of cgroups (simulates a tick of load)"""
+    rng = random.Random(seed)
+    root = os.path.join(sysfs_root, 'fs', 'cgroup')
+    for path in paths:
+        stat_path = os.path.join(root, path, 'cpu.stat')
+        with open(stat_path, 'r') as f:
+            lines = f.read().split('\n')
+        usage = int(lines[0].split()[1]) + rng.randint(0, 2 * 10**6)
+        lines[0] = f'usage_usec {usage}'
+        with open(stat_path, 'w') as f:
+            f.write('\n'.join(lines))
+
+def add_cgroup(sysfs_root, path, seed=0):
+    """Create one leaf cgroup (and update its ancestors' nr_descendants)"""
+    root = os.path.join(sysfs_root, 'fs', 'cgroup')
+    _cgroup_files(os.path.join(root, path), random.Random(seed))
+    _write_descendants(os.path.join(root, path), 0)
+    _adjust_descendants(root, path, 1)
+
+def remove_cgroup(sysfs_root, path):
+    """Remove one cgroup and its children (and update nr_descendants)"""
+    root = os.path.join(sysfs_root, 'fs', 'cgroup')
+    removed = sum(len(dirs) for _, dirs, _ in os.walk(os.path.join(root, path))) + 1
+    shutil.rmtree(os.path.join(root, path))
+    _adjust_descendants(root, path, -removed)
+
+def make_fake_bin(root, ncores, gpus=1, delay=0.0):
+    """Write fake `sensors` and `nvidia-smi` executables into root/bin
+    
+    Prepend the returned directory to PATH so collectors find them.
+    delay: seconds each tool sleeps before answering (slow hardware)
+    """
+    bin_dir = os.path.join(root, 'bin')
+    tools = os.path.dirname(os.path.abspath(__file__))
+    output = ['coretemp-isa-0000', 'Adapter: ISA adapter',
+              'Package id 0:  +52.0°C  (high = +80.0°C, crit = +100.0°C)']
+    output += [f'Core {core}:        +{40 + core % 50}.0°C  (high = +80.0°C, crit = +100.0°C)'
+               for core in range(ncores)]
+    sleep = f"sleep {delay}\n" if delay else ""
+    scripts = {
+        'sensors': "#!/bin/sh\n" + sleep + "cat <<'EOF'\n" + '\n'.join(output) + "\nEOF\n",
+        'nvidia-smi': (f"#!/bin/sh\n{sleep}FAKE_GPU_COUNT={gpus} exec {sys.executable} "
+                       f"{os.path.join(tools, 'fake_nvidia_smi.py')} \"$@\"\n"),
+    }
+    for name, text in scripts.items():
+        path = os.path.join(bin_dir, name)
+        _write(path, text)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return bin_dir
+
+def make_tree(root, ncpus, seed=0):
+    """Generate proc/ and sys/ under root for an ncpus-thread machine
+    
+    Returns (proc_root, sysfs_root).
+    """
+    proc_root = os.path.join(root, 'proc')
+    sysfs_root = os.path.join(root, 'sys')
+    make_proc_stat(proc_root, ncpus, seed)
+    make_proc_cpuinfo(proc_root, ncpus, seed)
+    make_proc_meminfo(proc_root, seed=seed)
+    # One NVMe drive per 16 threads and one NIC per 32, like a storage server
+    disks = [f'nvme{i}n1' for i in range(max(1, ncpus // 16))] + ['sda']
+    make_proc_diskstats(proc_root, sysfs_root, disks, seed=seed)
+    nics = [f'ens{i}f0' for i in range(max(1, ncpus // 32))]
+    make_proc_net_dev(proc_root, sysfs_root, ['lo', 'docker0', 'veth1a2b'] + nics,
+                      physical=nics, seed=seed)
+    make_cpufreq(sysfs_root, ncpus, seed)
+    make_hwmon(sysfs_root, max(1, ncpus // 2), seed=seed)
+    make_thermal_zone(sysfs_root)
+    make_proc_pressure(proc_root, seed)
+    # Eight cgroups per thread: a busy container host
+    make_cgroupfs(sysfs_root, ncpus * 8, seed)
+    return proc_root, sysfs_root
+
+def _cpu_list(cpus):
+    """Format CPUs as a sysfs list ('0-3,8')"""
+    cpus = sorted(cpus)
+    parts = []
+    start = prev = None
+    for cpu in cpus:
+        if start is None:
+            start = prev = cpu
+        elif cpu == prev + 1:
+            prev = cpu
+        else:
+            parts.append(f'{start}-{prev}' if prev != start else f'{start}')
+            start = prev = cpu
+    if start is not None:
+        parts.append(f'{start}-{prev}' if prev != start else f'{start}')
+    return ','.join(parts)
+
+def _layout_14900k():
+    """Intel i9-14900K: 8 HT P-cores (ids 0,4..28) + 16 E-cores (ids 32-47)"""
+    threads = []
+    for p in range(8):
+        for _ in range(2):
+            threads.append((0, p * 4, 'P'))
+    for e in range(16):
+        threads.append((0, 32 + e, 'E'))
+    return threads
+
+def _layout_5950x():
+    """AMD Ryzen 9 5950X: 16 cores, sibling of cpu N is N+16"""
+    return [(0, cpu % 16, None) for cpu in range(32)]
+
+def _layout_epyc_2s():
+    """2x AMD EPYC 9654: 96 cores per socket, siblings in the upper half"""
+    threads = []
+    for cpu in range(384):
+        core = cpu % 192
+        threads.append((core // 96, core % 96, None))
+    return threads
+
+def _layout_xeon_2s():
+    """2x Intel Xeon Gold 6248: 20 cores per socket with gaps in core ids"""
+    core_ids = [0, 1, 2, 3, 4, 8, 9, 10, 11, 12, 16, 17, 18, 19, 20, 24, 25, 26, 27, 28]
+    threads = []
+    for cpu in range(80):
+        core = cpu % 40
+        threads.append((core // 20, core_ids[core % 20], None))
+    return threads
+
+def _layout_biglittle():
+    """Arm 4+4 big.LITTLE: cpu 0-3 little (capacity 485), 4-7 big (1024)"""
+    return [(0, cpu, 'E' if cpu < 4 else 'P') for cpu in range(8)]
+
+# Fixture machines for make_cpu_topology(): name -> [(package, core_id, type)]
+MACHINES = {
+    'i9-14900k': _layout_14900k,
+    'ryzen-5950x': _layout_5950x,
+    'epyc-9654-2s': _layout_epyc_2s,
+    'xeon-6248-2s': _layout_xeon_2s,
+    'arm-biglittle': _layout_biglittle,
+}
+
+def make_cpu_topology(sysfs_root, machine, offline=()):
+    """Write cpu*/topology (and hybrid PMU / capacity files) for a machine
+    
+    machine: key of MACHINES
+    offline: CPUs to leave out of the 'online' list (hotplug)
+    """
+    threads = MACHINES[machine]()
+    root = os.path.join(sysfs_root, 'devices', 'system', 'cpu')
+    online = [cpu for cpu in range(len(threads)) if cpu not in offline]
+    _write(os.path.join(root, 'online'), _cpu_list(online) + '\n')
+    _write(os.path.join(root, 'possible'), _cpu_list(range(len(threads))) + '\n')
+    
+    for cpu, (package, core, kind) in enumerate(threads):
+        siblings = [other for other, t in enumerate(threads) if t[:2] == (package, core)]
+        topology = os.path.join(root, f'cpu{cpu}', 'topology')
+        _write(os.path.join(topology, 'core_id'), f'{core}\n')
+        _write(os.path.join(topology, 'physical_package_id'), f'{package}\n')
+        _write(os.path.join(topology, 'thread_siblings_list'), _cpu_list(siblings) + '\n')
+        _write(os.path.join(topology, 'core_cpus_list'), _cpu_list(siblings) + '\n')
+        if machine == 'arm-biglittle':
+            _write(os.path.join(root, f'cpu{cpu}', 'cpu_capacity'),
+                   '1024\n' if kind == 'P' else '485\n')
+    
+    if machine == 'i9-14900k':
+        devices = os.path.join(sysfs_root, 'devices')
+        p_cpus = [cpu for cpu, t in enumerate(threads) if t[2] == 'P']
+        e_cpus = [cpu for cpu, t in enumerate(threads) if t[2] == 'E']
+        _write(os.path.join(devices, 'cpu_core', 'cpus'), _cpu_list(p_cpus) + '\n')
+        _write(os.path.join(devices, 'cpu_atom', 'cpus'), _cpu_list(e_cpus) + '\n')
+    return threads
+
+def make_machine_hwmon(sysfs_root, machine, seed=0):
+    """Write one coretemp device per package of a MACHINES layout
+    
+    Sensors are labelled with the machine's core ids, which repeat in
+    every package; devices are numbered in reverse package order so the
+    'Package id N' label is the only way to tell them apart. Returns
+    {(package, core_id): temp}.
+    """
+    rng = random.Random(seed)
+    root = os.path.join(sysfs_root, 'class', 'hwmon')
+    _write(os.path.join(root, 'hwmon0', 'name'), 'acpitz\n')
+    _write(os.path.join(root, 'hwmon0', 'temp1_input'), '27800\n')
+    packages = {}
+    for package, core, _ in MACHINES[machine]():
+        cores = packages.setdefault(package, [])
+        if core not in cores:
+            cores.append(core)
+    temps = {}
+    for number, package in enumerate(sorted(packages, reverse=True)):
+        device = os.path.join(root, f'hwmon{number + 1}')
+        _write(os.path.join(device, 'name'), 'coretemp\n')
+        _write(os.path.join(device, 'temp1_label'), f'Package id {package}\n')
+        _write(os.path.join(device, 'temp1_input'), f'{rng.randint(40, 90) * 1000}\n')
+        for index, core in enumerate(packages[package]):
+            temps[package, core] = float(rng.randint(35, 95))
+            sensor = os.path.join(device, f'temp{index + 2}')
+            _write(sensor + '_label', f'Core {core}\n')
+            _write(sensor + '_input', f'{int(temps[package, core]) * 1000}\n')
+    return temps
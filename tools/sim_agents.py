@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Simulated Agents
+Many fake agents on one machine, streaming to an aggregator
+
+Each simulated host random-walks a --cpus thread machine and sends one
+delta frame per --interval over its own TCP connection, exactly as
+main.py --agent would; agents start spread over the first interval.
+With --target the agents stream to a running aggregator (e.g. a window
+started with --aggregate). Without it an Aggregator is started in this
+process and the agents run in a child process, so the CPU time
+reported is the aggregator's alone.
+
+The CPU figures cover the steady state only: measuring starts two
+intervals after the agents are launched (connections and keyframes
+are not counted), so that window holds fewer frames than were sent.
+The total received is printed separately and should match the child's
+"sent" line.
+
+Usage:
+    python3 tools/sim_agents.py [--agents 100] [--cpus 64] [--duration 30]
+    python3 tools/sim_agents.py --target 127.0.0.1:9180 --agents 100
+"""
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add repository root to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import hello, frame, parse_address
+from aggregator import Aggregator
+from sampler import Sample, Snapshot
+from snapshot_codec import SnapshotEncoder
+
+class FakeHost:
+    """Random-walk load for one simulated machine, shaped like get_all()"""
+    
+    def __init__(self, cpus, seed):
+        self.rng = random.Random(seed)
+        self.cpus = cpus
+        self.load = [self.rng.uniform(0, 100) for _ in range(cpus)]
+        self.used = 16 * 1024**3
+        self.seq = 0
+    
+    def snapshot(self, interval):
+        """Next sample as a Snapshot"""
+        rng = self.rng
+        self.load = [min(100.0, max(0.0, v + rng.gauss(0, 8))) for v in self.load]
+        self.used = min(60 * 1024**3, max(1024**3, self.used + rng.randint(-2**26, 2**26)))
+        data = {
+            'cpu_percents': [round(v, 1) for v in self.load],
+            'cpu_freqs': [round(rng.uniform(800, 5800)) for _ in range(self.cpus)],
+            'cpu_temps': {0: {core: round(rng.uniform(35, 95)) for core in range(self.cpus // 2)}},
+            'cpu_package_temp': round(rng.uniform(35, 95), 1),
+            'gpus': [{'temp': rng.randint(30, 80), 'power_draw': round(rng.uniform(20, 300), 1),
+                      'power_limit': 450.0, 'mem_used': rng.randint(500, 20000),
+                      'mem_total': 24564}],
+            'cuda_available': True,
+            'memory_stats': {'total': 64 * 1024**3, 'used': self.used,
+                             'percent': round(self.used / (64 * 1024**3) * 100, 1)},
+            'disk_io': {'read_bytes': round(rng.uniform(0, 5 * 10**8)),
+                        'write_bytes': round(rng.uniform(0, 2 * 10**8)),
+                        'read_iops': round(rng.uniform(0, 50000)),
+                        'write_iops': round(rng.uniform(0, 20000)),
+                        'util': round(rng.uniform(0, 100), 1)},
+            'network_stats': {'rx_bytes': round(rng.uniform(0, 5 * 10**6)),
+                              'tx_bytes': round(rng.uniform(0, 5 * 10**5)),
+                              'rx_packets': round(rng.uniform(0, 5000)),
+                              'tx_packets': round(rng.uniform(0, 500)),
+                              'util': round(rng.uniform(0, 40), 1)},
+        }
+        self.seq += 1
+        now = time.monotonic()
+        return Snapshot({key: Sample(value, now, self.seq) for key, value in data.items()},
+                        {key: interval for key in data}, now)
+
+async def run_agent(index, args, host, port, stats):
+    """One simulated agent: connect, say hello, send a frame per interval"""
+    fake = FakeHost(args.cpus, index)
+    encoder = SnapshotEncoder()
+    await asyncio.sleep(args.interval * index / args.agents)
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(hello(f"sim-{index:03d}", cpus=args.cpus))
+    deadline = time.monotonic() + args.duration
+    next_send = time.monotonic()
+    while time.monotonic() < deadline:
+        snapshot = fake.snapshot(args.interval)
+        payload = encoder.encode(snapshot, snapshot.timestamp)
+        writer.write(frame(payload))
+        await writer.drain()
+        stats['frames'] += 1
+        stats['bytes'] += len(payload)
+        next_send += args.interval
+        await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+    writer.close()
+
+async def run_agents(args, host, port):
+    stats = {'frames': 0, 'bytes': 0}
+    await asyncio.gather(*(run_agent(i, args, host, port, stats) for i in range(args.agents)))
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('--target', metavar='HOST:PORT',
+                        help="stream to a running aggregator instead of a local one")
+    parser.add_argument('--agents', type=int, default=100)
+    parser.add_argument('--cpus', type=int, default=64)
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--duration', type=float, default=30.0)
+    args = parser.parse_args()
+    
+    if args.target:
+        host, port = parse_address(args.target)
+        stats = asyncio.run(run_agents(args, host or '127.0.0.1', port))
+        print(f"{args.agents} agents sent {stats['frames']} frames, "
+              f"{stats['bytes'] / max(1, stats['frames']):.0f} bytes/frame on average")
+        return
+    
+    aggregator = Aggregator('127.0.0.1', 0)
+    aggregator.start()
+    host, port = aggregator.address
+    command = [sys.executable, __file__, '--target', f'{host}:{port}',
+               '--agents', str(args.agents), '--cpus', str(args.cpus),
+               '--interval', str(args.interval), '--duration', str(args.duration)]
+    child = subprocess.Popen(command)
+    # Measure the steady state once every agent is connected and keyed
+    time.sleep(args.interval * 2)
+    cpu = time.process_time()
+    wall = time.monotonic()
+    frames = aggregator.frames
+    child.wait()
+    cpu = time.process_time() - cpu
+    wall = time.monotonic() - wall
+    frames = aggregator.frames - frames
+    # Let the loop finish frames still in the socket buffers
+    total = -1
+    while total != aggregator.frames:
+        total = aggregator.frames
+        time.sleep(0.2)
+    
+    hosts = aggregator.snapshot()
+    print(f"aggregator: {len(hosts)} hosts, {total} frames received in total, "
+          f"{aggregator.errors} errors, {aggregator.refused} refused")
+    print(f"steady state (from {args.interval * 2:.0f} s after launch): {frames} frames "
+          f"in {wall:.1f} s ({frames / wall:.0f}/s)")
+    print(f"aggregator CPU: {cpu / wall * 100:.1f}% of one core, "
+          f"{cpu / max(1, frames) * 1e6:.0f} us per frame")
+    aggregator.close()
+
+if __name__ == "__main__":
+    main()
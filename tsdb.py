@@ -0,0 +1,275 @@
+"""
+Time-Series Store
+RRD-style fixed-size memory-mapped history with multi-resolution rollups
+"""
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+from urllib.parse import quote, unquote
+
+from metrics import flatten
+
+MAGIC = b'SYSMTSDB'
+VERSION = 1
+
+# (step seconds, slots): 1 s for an hour, 10 s for a day, 1 min for a
+# week and 1 h for 90 days
+ARCHIVES = (
+    (1, 3600),
+    (10, 8640),
+    (60, 10080),
+    (3600, 2160),
+)
+
+# magic, version, archive count, then (step, slots) per archive
+HEADER = struct.Struct('<8sII' + 'II' * len(ARCHIVES))
+HEADER_SIZE = 64
+
+# bucket number (time // step, 0 = empty), min, max, sum, count
+SLOT = struct.Struct('<Iffff')
+
+SUFFIX = '.ts'
+
+# Snapshot keys holding rankings rather than time series
+EXCLUDED_KEYS = frozenset({'processes', 'cgroups'})
+
+def default_directory():
+    """Per-user store location under XDG_DATA_HOME"""
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    return os.path.join(data_home, 'gtk-system-monitor', 'tsdb')
+
+class Series:
+    """One metric's file: a fixed ring of slots per archive
+    
+    Slot i of an archive holds the bucket whose number is i modulo the
+    archive's size, so writing a sample and seeking to any time are
+    both a single offset computation. Each slot remembers its bucket
+    number; a slot holding an older bucket is a gap.
+    """
+    
+    SIZE = HEADER_SIZE + sum(slots for _, slots in ARCHIVES) * SLOT.size
+    
+    def __init__(self, path, writable=True):
+        """
+        path: series file
+        writable: create/repair the file and allow add()
+        """
+        self.path = path
+        self.writable = writable
+        self.offsets = []
+        offset = HEADER_SIZE
+        for _, slots in ARCHIVES:
+            self.offsets.append(offset)
+            offset += slots * SLOT.size
+        
+        header = HEADER.pack(MAGIC, VERSION, len(ARCHIVES),
+                             *[n for archive in ARCHIVES for n in archive])
+        flags = os.O_RDWR | os.O_CREAT if writable else os.O_RDONLY
+        fd = os.open(path, flags, 0o644)
+        try:
+            current = os.pread(fd, HEADER.size, 0)
+            if current != header:
+                if not writable:
+                    raise ValueError(f"{path}: not a series file of this layout")
+                # New file or a different layout: start over
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, self.SIZE)
+                os.pwrite(fd, header, 0)
+            access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            self._map = mmap.mmap(fd, self.SIZE, access=access)
+        finally:
+            os.close(fd)
+    
+    def add(self, timestamp, value):
+        """Fold one sample into every archive"""
+        data = self._map
+        for (step, slots), base in zip(ARCHIVES, self.offsets):
+            bucket = int(timestamp // step)
+            offset = base + (bucket % slots) * SLOT.size
+            old, low, high, total, count = SLOT.unpack_from(data, offset)
+            if old == bucket:
+                SLOT.pack_into(data, offset, bucket, min(low, value),
+                               max(high, value), total + value, count + 1)
+            else:
+                SLOT.pack_into(data, offset, bucket, value, value, value, 1)
+    
+    def read(self, archive, start, end):
+        """
+        Points of one archive between wall-clock times start and end
+        Returns (timestamp, min, avg, max) per bucket; gaps are None.
+        """
+        step, slots = ARCHIVES[archive]
+        base = self.offsets[archive]
+        first = int(start // step)
+        last = int(end // step)
+        first = max(first, last - slots + 1)
+        
+        # The range is at most two contiguous runs of slots
+        begin = first % slots
+        count = last - first + 1
+        runs = [(begin, min(count, slots - begin))]
+        if runs[0][1] < count:
+            runs.append((0, count - runs[0][1]))
+        
+        points = []
+        bucket = first
+        for slot, length in runs:
+            offset = base + slot * SLOT.size
+            raw = self._map[offset:offset + length * SLOT.size]
+            for stored, low, high, total, samples in SLOT.iter_unpack(raw):
+                if stored == bucket and samples:
+                    points.append((bucket * step, low, total / samples, high))
+                else:
+                    points.append(None)
+                bucket += 1
+        return points
+    
+    def close(self):
+        """Unmap the file"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+class TimeSeriesStore:
+    """Directory of Series files, one per flattened metric name
+    
+    write() takes sampler snapshots and stores every numeric leaf
+    (see metrics.flatten) under its wall-clock sample time. Only one
+    process writes; others (or a second instance) open it read-only.
+    The sampler thread writes while the UI thread reads, so opening,
+    using and closing series happens under one lock.
+    
+    Every per-CPU, per-disk and per-interface leaf gets its own
+    Series.SIZE (~478 KiB) file once its archives fill: about 60
+    files / 28 MiB on an 8-thread desktop, 220 / 100 MiB at 64 threads
+    and 790 / 370 MiB at 256 threads.
+    """
+    
+    def __init__(self, directory=None, readonly=False):
+        """
+        directory: store location (default: default_directory())
+        readonly: never write, e.g. a window attached to a daemon
+        """
+        self.directory = directory or default_directory()
+        self.writable = False
+        self._series = {}
+        self._seqs = {}
+        self._lock = threading.Lock()
+        self._lock_fd = None
+        
+        if not readonly:
+            os.makedirs(self.directory, exist_ok=True)
+            self._lock_fd = os.open(os.path.join(self.directory, '.lock'),
+                                    os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self.writable = True
+            except OSError:
+                # Another process is recording; read its history instead
+                os.close(self._lock_fd)
+                self._lock_fd = None
+    
+    def _path(self, name):
+        return os.path.join(self.directory, quote(name, safe='[]._-') + SUFFIX)
+    
+    def _open(self, name):
+        """Lock held: get the Series for name, or None if it does not exist"""
+        series = self._series.get(name)
+        if series is None:
+            path = self._path(name)
+            if not self.writable and not os.path.exists(path):
+                return None
+            try:
+                series = Series(path, self.writable)
+            except (OSError, ValueError):
+                return None
+            self._series[name] = series
+        return series
+    
+    def names(self):
+        """All metric names in the store"""
+        try:
+            files = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted(unquote(f[:-len(SUFFIX)]) for f in files if f.endswith(SUFFIX))
+    
+    def add(self, name, timestamp, value):
+        """Store one sample of one metric"""
+        with self._lock:
+            series = self._open(name)
+            if series is not None:
+                series.add(timestamp, value)
+    
+    def write(self, snapshot):
+        """Store every value of snapshot that arrived since the last write"""
+        if not self.writable:
+            return
+        now = time.time()
+        for key in snapshot:
+            if key in EXCLUDED_KEYS:
+                continue
+            seq = snapshot.seq(key) if hasattr(snapshot, 'seq') else None
+            if seq is not None and seq == self._seqs.get(key):
+                continue
+            self._seqs[key] = seq
+            age = snapshot.age(key) if hasattr(snapshot, 'age') else 0.0
+            timestamp = now - (age or 0.0)
+            for name, value in flatten(key, snapshot[key]).items():
+                self.add(name, timestamp, value)
+    
+    @staticmethod
+    def archive_for(start, end, now=None):
+        """Finest archive that still covers start..end"""
+        now = time.time() if now is None else now
+        for index, (step, slots) in enumerate(ARCHIVES):
+            if start >= now - step * slots:
+                return index
+        return len(ARCHIVES) - 1
+    
+    def read(self, name, start, end=None, step=None):
+        """
+        Points of name between wall-clock times start and end
+        step: archive step in seconds (default: finest covering the range)
+        Returns (step, points) where points are (timestamp, min, avg, max)
+        tuples or None for gaps.
+        """
+        end = time.time() if end is None else end
+        if step is None:
+            archive = self.archive_for(start, end)
+        else:
+            archive = [s for s, _ in ARCHIVES].index(step)
+        with self._lock:
+            series = self._open(name)
+            if series is None:
+                return ARCHIVES[archive][0], []
+            return ARCHIVES[archive][0], series.read(archive, start, end)
+    
+    def recent(self, names, count, step=1, end=None):
+        """
+        The last count averages of several metrics, oldest first
+        Returns one list of values per time step (gaps are 0.0), trimmed
+        to the steps between the first and last with any data.
+        """
+        end = time.time() if end is None else end
+        start = end - (count - 1) * step
+        series = [self.read(name, start, end, step)[1] for name in names]
+        rows = list(zip(*series))
+        present = [i for i, points in enumerate(rows) if any(points)]
+        if not present:
+            return []
+        return [[p[2] if p is not None else 0.0 for p in points]
+                for points in rows[present[0]:present[-1] + 1]]
+    
+    def close(self):
+        """Unmap every series and release the writer lock"""
+        with self._lock:
+            for series in self._series.values():
+                series.close()
+            self._series.clear()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
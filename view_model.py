@@ -0,0 +1,77 @@
+"""
+View Model
+Change-suppressing bridge between snapshot values and GTK widgets
+"""
+
+class Field:
+    """One displayed value with its last raw input and formatted text"""
+    
+    __slots__ = ('setter', 'formatter', 'raw', 'text', 'stale', 'stale_setter')
+    
+    def __init__(self, setter, formatter, stale_setter=None):
+        self.setter = setter
+        self.formatter = formatter
+        self.stale_setter = stale_setter
+        self.raw = Field       # sentinel: nothing shown yet
+        self.text = None
+        self.stale = None
+
+class ViewModel:
+    """Push widget updates only for values that actually changed
+    
+    A value is formatted only when its raw input differs from last tick,
+    and the widget is only touched when the formatted text differs from
+    what it already shows. Counters record how many updates each tick
+    pushed and how many were skipped.
+    """
+    
+    def __init__(self):
+        self.fields = {}
+        self.pushed = 0
+        self.skipped = 0
+        self.last_pushed = 0
+        self.last_skipped = 0
+        self.total_pushed = 0
+        self.total_skipped = 0
+    
+    def bind(self, name, setter, formatter=str, stale_setter=None):
+        """
+        name: field name used with set()
+        setter: called with the new text (e.g. label.set_text)
+        formatter: raw value -> display text
+        stale_setter: optional, called with True/False when staleness flips
+        """
+        self.fields[name] = Field(setter, formatter, stale_setter)
+    
+    def begin_tick(self):
+        """Reset the per-tick counters"""
+        self.pushed = 0
+        self.skipped = 0
+    
+    def end_tick(self):
+        """Record this tick's counters"""
+        self.last_pushed = self.pushed
+        self.last_skipped = self.skipped
+        self.total_pushed += self.pushed
+        self.total_skipped += self.skipped
+    
+    def set(self, name, raw, stale=False):
+        """Show raw in field name, skipping unchanged values"""
+        field = self.fields[name]
+        
+        if field.stale_setter is not None and stale != field.stale:
+            field.stale = stale
+            field.stale_setter(stale)
+        
+        if raw == field.raw:
+            self.skipped += 1
+            return
+        field.raw = raw
+        
+        text = field.formatter(raw)
+        if text == field.text:
+            self.skipped += 1
+            return
+        field.text = text
+        field.setter(text)
+        self.pushed += 1
@@ -0,0 +1,396 @@
+"""
+Monitor Window
+GTK window hosting the CPU, system, process and cgroup sections
+"""
+import functools
+import os
+import signal
+import sys
+import time
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, Gdk, GLib
+
+from system_data import SystemData
+from sampler import Sampler
+from sampling_policy import SamplingPolicy
+from cpu_grid import CPUGrid
+from cpu_heatmap import CPUHeatmap
+from cpu_arch import CPUArchitecture
+from system_info import SystemInfo
+from system_graphs import SystemGraphs
+from process_view import ProcessView
+from cgroup_view import CgroupView
+from instrumentation import Instrumentation
+from downsample import ZOOM_LABELS
+
+# How often an attached window polls the shared-memory feed
+FEED_POLL_MS = 250
+
+# How often the instrumentation overlay refreshes
+INSTRUMENTATION_MS = 1000
+
+# Start sampling anyway if the window has not painted by then (e.g. minimized)
+FIRST_PAINT_TIMEOUT_MS = 1000
+
+# How often the aggregated host table refreshes (agents report at ~1 Hz)
+HOSTS_MS = 1000
+
+class SystemMonitor(Gtk.Window):
+    """Main monitoring window
+    
+    The constructor only builds the section skeletons. Loading history
+    and starting the data source wait until the first paint, and
+    sections fill in as their collectors report, so the window appears
+    before the slowest collector (sensors, nvidia-smi) has answered.
+    """
+    
+    def __init__(self, view='auto', update_stats=False, attach=False, feed_path=None,
+                 history=True, history_dir=None, record=None, replay=None, speed=1.0,
+                 instrument=False, adaptive=True, exit_when_ready=False, exporter=None,
+                 aggregator=None):
+        """
+        view: CPU section style; 'auto' uses the heatmap when the grid
+              cannot show every thread
+        update_stats: show a footer with widget updates pushed/skipped per tick
+        attach: show a headless collector's shared-memory feed instead of
+                running the collectors in this process
+        feed_path: feed file for attach (default: shm_feed.default_path())
+        history: record snapshots to the time-series store and start the
+                 graphs from it
+        history_dir: store directory (default: tsdb.default_directory())
+        record: file to record every snapshot to (see snapshot_codec)
+        replay: recording to show instead of sampling
+        speed: replay speed factor, or None for as fast as possible
+        instrument: time collectors, updates and draws and show them in an
+                    overlay section
+        adaptive: slow sampling down while hidden or idle and speed it up
+                  during load spikes (see sampling_policy)
+        exit_when_ready: close once every collector has been shown (startup
+                         benchmark)
+        exporter: started MetricsExporter to publish every snapshot to
+        aggregator: started Aggregator whose hosts are listed next to the
+                    local sections
+        """
+        super().__init__(title="System Monitor")
+        self.set_default_size(400, 800)
+        self._setup_transparency()
+        
+        # Main container
+        self.main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        
+        # Initialize sections
+        if view == 'auto':
+            view = 'heatmap' if (os.cpu_count() or 1) > CPUGrid.CAPACITY else 'grid'
+        self.cpu_view = CPUHeatmap() if view == 'heatmap' else CPUGrid()
+        self.metrics = SystemInfo()  # Tree-style metrics
+        self.graphs = SystemGraphs()
+        self.processes = ProcessView()
+        self.cgroups = CgroupView()
+        
+        # Pack into UI
+        self.main_box.pack_start(self._build_zoom_bar(), False, False, 0)
+        self.main_box.pack_start(self.cpu_view.widget, False, False, 0)
+        self.main_box.pack_start(self.metrics.widget, False, False, 0)
+        self.main_box.pack_start(self.graphs.widget, False, False, 0)
+        self.main_box.pack_start(self.processes.widget, False, False, 0)
+        self.main_box.pack_start(self.cgroups.widget, False, False, 0)
+        
+        self.stats_label = None
+        if update_stats:
+            self.stats_label = Gtk.Label()
+            self.stats_label.set_halign(Gtk.Align.END)
+            self.stats_label.set_margin_end(10)
+            self.main_box.pack_start(self.stats_label, False, False, 0)
+        
+        # A no-op unless main() enabled instrumentation before building the window
+        for section, name in ((self.cpu_view, 'cpu'), (self.metrics, 'system'),
+                              (self.graphs, 'graphs'), (self.processes, 'processes'),
+                              (self.cgroups, 'cgroups')):
+            Instrumentation.time_draws(section.widget, name)
+        self.instrumentation = None
+        if instrument:
+            from instrumentation_view import InstrumentationView
+            self.instrumentation = InstrumentationView()
+            self.main_box.pack_start(self.instrumentation.widget, False, False, 0)
+            GLib.timeout_add(INSTRUMENTATION_MS, self.instrumentation.refresh)
+        
+        self.aggregator = aggregator
+        self.hosts = None
+        if aggregator is not None:
+            from host_summary import HostSummary
+            self.hosts = HostSummary()
+            Instrumentation.time_draws(self.hosts.widget, 'hosts')
+            self.set_default_size(1000, 800)
+            # Local sections on the left, the other hosts beside them
+            outer = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
+            outer.pack_start(self.main_box, False, False, 0)
+            outer.pack_start(self.hosts.widget, True, True, 0)
+            self.add(outer)
+            GLib.timeout_add(HOSTS_MS, self._refresh_hosts)
+        else:
+            self.add(self.main_box)
+        self.apply_css()
+        
+        self.store = None
+        self.sampler = None
+        self.policy = None
+        self.feed = None
+        self.recorder = None
+        self.exporter = exporter
+        self.exit_when_ready = exit_when_ready
+        self._refresh_queued = False
+        self.connect("destroy", self._on_destroy)
+        # SIGHUP re-probes hardware sources after GPU/NIC hotplug
+        GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal.SIGHUP, self._on_hotplug)
+        # SIGUSR1 dumps the instrumentation report to stderr
+        GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal.SIGUSR1, self._on_dump)
+        
+        if not attach and not replay and adaptive:
+            self.policy = SamplingPolicy()
+            self._track_visibility()
+        
+        # Show the skeleton first; history and data follow the first paint
+        self._started = False
+        self._start = functools.partial(self._start_sources, attach, feed_path, history,
+                                        history_dir, record, replay, speed)
+        self._first_paint = self.connect_after("draw", self._on_first_paint)
+        GLib.timeout_add(FIRST_PAINT_TIMEOUT_MS, self._start)
+    
+    def _build_zoom_bar(self):
+        """Buttons choosing the graphs' time window"""
+        bar = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=0)
+        bar.set_halign(Gtk.Align.END)
+        bar.set_margin_end(10)
+        bar.set_margin_top(5)
+        group = None
+        for zoom, label in [(None, 'live')] + list(enumerate(ZOOM_LABELS)):
+            button = Gtk.RadioButton.new_with_label_from_widget(group, label)
+            button.set_mode(False)  # Toggle buttons rather than radio dots
+            button.connect("toggled", self._on_zoom, zoom)
+            bar.pack_start(button, False, False, 0)
+            group = group or button
+        return bar
+    
+    def _on_zoom(self, button, zoom):
+        """Switch the CPU and system graphs to another time window"""
+        if not button.get_active():
+            return
+        # The heatmap only has the live view
+        for section in (self.cpu_view, self.graphs):
+            set_zoom = getattr(section, 'set_zoom', None)
+            if set_zoom is not None:
+                set_zoom(zoom)
+    
+    def _on_first_paint(self, widget, cr):
+        """After the skeleton is on screen, start loading data"""
+        self.disconnect(self._first_paint)
+        Instrumentation.milestone('first_paint')
+        GLib.idle_add(self._start)
+        return False
+    
+    def _start_sources(self, attach, feed_path, history, history_dir, record, replay, speed):
+        """Load recorded history and start the feed, replay or sampler (once)"""
+        if self._started:
+            return False
+        self._started = True
+        
+        # Recorded history fills the graphs before the first sample arrives
+        if history and not replay:
+            from tsdb import TimeSeriesStore
+            try:
+                self.store = TimeSeriesStore(history_dir, readonly=attach)
+            except OSError as e:
+                # Unwritable or full history directory: monitor without it
+                print(f"cannot open history in {history_dir}: {e}", file=sys.stderr)
+            else:
+                self.cpu_view.prefill(self.store)
+                self.graphs.prefill(self.store)
+        if record:
+            from snapshot_codec import SnapshotRecorder
+            self.recorder = SnapshotRecorder(record)
+        
+        if attach:
+            # Another process collects; just poll its feed (no syscalls when idle)
+            from shm_feed import FeedReader
+            self.feed = FeedReader(feed_path)
+            GLib.timeout_add(FEED_POLL_MS, self._poll_feed)
+        elif replay:
+            from replay import ReplaySampler
+            self.sampler = ReplaySampler(replay, speed, on_snapshot=self._on_snapshot,
+                                         loop=True)
+            self.sampler.start()
+        else:
+            # Sample in the background; the UI only picks up finished snapshots
+            collectors = SystemData.collectors()
+            if self.policy is not None:
+                self.policy.set_recorded(self._recorded_keys(collectors))
+            self.sampler = Sampler(collectors, on_snapshot=self._on_snapshot,
+                                   policy=self.policy)
+            self.sampler.start()
+        return False
+    
+    def _recorded_keys(self, collectors):
+        """Collector keys consumed outside the window (kept at rate while hidden)"""
+        if self.recorder is not None or self.exporter is not None:
+            return [c.key for c in collectors]
+        if self.store is not None:
+            from tsdb import EXCLUDED_KEYS
+            return [c.key for c in collectors if c.key not in EXCLUDED_KEYS]
+        return []
+    
+    def _setup_transparency(self):
+        """Enable window transparency"""
+        screen = self.get_screen()
+        visual = screen.get_rgba_visual()
+        if visual and screen.is_composited():
+            self.set_visual(visual)
+        self.set_app_paintable(True)
+    
+    def _track_visibility(self):
+        """Tell the sampling policy when the window is minimized, covered or unmapped"""
+        self._mapped = False
+        self._iconified = False
+        self._obscured = False
+        self.add_events(Gdk.EventMask.VISIBILITY_NOTIFY_MASK)
+        self.connect("map-event", self._on_visibility, '_mapped', True)
+        self.connect("unmap-event", self._on_visibility, '_mapped', False)
+        self.connect("window-state-event", self._on_window_state)
+        self.connect("visibility-notify-event", self._on_visibility_notify)
+    
+    def _on_visibility(self, widget, event, attribute, value):
+        """Record one visibility input and update the policy"""
+        setattr(self, attribute, value)
+        self.policy.set_visible(self._mapped and not self._iconified and not self._obscured)
+        return False
+    
+    def _on_window_state(self, widget, event):
+        """Minimized windows (or windows on another workspace) are hidden"""
+        iconified = bool(event.new_window_state & Gdk.WindowState.ICONIFIED)
+        return self._on_visibility(widget, event, '_iconified', iconified)
+    
+    def _on_visibility_notify(self, widget, event):
+        """Fully covered windows are hidden (X11 without compositing only)"""
+        obscured = event.state == Gdk.VisibilityState.FULLY_OBSCURED
+        return self._on_visibility(widget, event, '_obscured', obscured)
+    
+    def _on_destroy(self, *args):
+        """Stop sampling and release collector resources"""
+        if self.sampler is not None:
+            self.sampler.stop()
+            SystemData.shutdown()
+        if self.feed is not None:
+            self.feed.close()
+        if self.store is not None:
+            self.store.close()
+        if self.recorder is not None:
+            self.recorder.close()
+    
+    def _on_hotplug(self):
+        """Rediscover hardware sources on SIGHUP"""
+        if self.sampler is not None:
+            SystemData.reprobe()
+        CPUArchitecture.refresh()
+        return True
+    
+    def _on_dump(self):
+        """Print the instrumentation report on SIGUSR1"""
+        Instrumentation.dump()
+        return True
+    
+    def _on_snapshot(self, snapshot):
+        """Sampler thread: record the snapshot, schedule a UI refresh unless queued"""
+        if self.store is not None:
+            self.store.write(snapshot)
+        if self.recorder is not None:
+            self.recorder.write(snapshot)
+        if self.exporter is not None:
+            self.exporter.publish(snapshot)
+        if not self._refresh_queued:
+            self._refresh_queued = True
+            GLib.idle_add(self._update)
+    
+    def _refresh_hosts(self):
+        """Timer: show the aggregated hosts' newest summaries"""
+        self.hosts.update(self.aggregator.snapshot())
+        return True
+    
+    def _poll_feed(self):
+        """Timer: show the feed's newest snapshot
+        
+        Unchanged values are skipped by the view models, and re-showing
+        the same snapshot lets values dim once the daemon stops publishing.
+        """
+        data = self.feed.read()
+        if data is not None:
+            self._show(data)
+        return True
+    
+    def _update(self):
+        """Update all sections from the newest snapshot"""
+        self._refresh_queued = False
+        self._show(self.sampler.latest())
+        return False
+    
+    def _show(self, data):
+        """Update all sections from data"""
+        started = time.perf_counter() if Instrumentation.enabled else None
+        self.cpu_view.update(data)
+        self.metrics.update(data)
+        self.graphs.update(data)
+        self.processes.update(data)
+        self.cgroups.update(data)
+        if started is not None:
+            Instrumentation.record('update', time.perf_counter() - started)
+        if len(data):
+            Instrumentation.milestone('first_snapshot')
+            if getattr(data, 'warm', True):
+                Instrumentation.milestone('full_snapshot')
+                if self.exit_when_ready:
+                    # Idle priority: the frame showing every section paints first
+                    self.exit_when_ready = False
+                    GLib.idle_add(self.destroy)
+        if self.stats_label is not None:
+            self._update_stats()
+    
+    def _update_stats(self):
+        """Show how many widget updates the last tick pushed and skipped"""
+        pushed = skipped = 0
+        for section in (self.cpu_view, self.metrics, self.graphs, self.processes,
+                        self.cgroups, self.hosts):
+            view_model = getattr(section, 'view_model', None)
+            if view_model is not None:
+                pushed += view_model.last_pushed
+                skipped += view_model.last_skipped
+        text = f"updates {pushed} pushed / {skipped} skipped"
+        if self.policy is not None:
+            text += f", sampling {self.policy.state}"
+        self.stats_label.set_text(text)
+    
+    def apply_css(self):
+        """Apply global styling"""
+        css_provider = Gtk.CssProvider()
+        css = b"""
+        window {
+            background-color: rgba(0, 0, 0, 0.7);
+        }
+        frame {
+            border: .5px solid #FFFFFF;
+            background-color: transparent;
+        }
+        box {
+            background-color: transparent;
+        }
+        label {
+            color: white;
+            font-family: monospace;
+            font-size: 12px;
+        }
+        """
+        css_provider.load_from_data(css)
+        Gtk.StyleContext.add_provider_for_screen(
+            Gdk.Screen.get_default(),
+            css_provider,
+            Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
+        )